@@ -1,12 +1,18 @@
-import statistics
 import tkinter as tk
 import random
 import time
-import math
-import random
-from collections import namedtuple
 
-Point = namedtuple("Point", ["x", "y"])
+
+class Point:
+    """
+    A point that can be moved without making a new one
+    """
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
 
 
 class Ball:
@@ -35,7 +41,8 @@ class Ball:
             # It passed the left wall, so the left player won
             return "Left player"
 
-        self.pos = Point(self.pos.x + self.xspeed, self.pos.y + self.yspeed)
+        self.pos.x += self.xspeed
+        self.pos.y += self.yspeed
         self.top_y += self.yspeed
         self.bottom_y += self.yspeed
         self.left_x += self.xspeed
@@ -0,0 +1,24 @@
+"""
+A headless version of the pong game from this tutorial.
+
+The physics (walls, paddles and the ball) live in physics.py and don't need
+tkinter, so games can be simulated without opening a window. render.py
+draws a game onto a tkinter canvas.
+"""
+
+from .physics import (
+    LEFT_DOWN,
+    LEFT_HOLD_DOWN,
+    LEFT_HOLD_UP,
+    LEFT_RELEASE,
+    LEFT_UP,
+    RIGHT_DOWN,
+    RIGHT_HOLD_DOWN,
+    RIGHT_HOLD_UP,
+    RIGHT_RELEASE,
+    RIGHT_UP,
+    Ball,
+    Game,
+    Paddle,
+    StraightLine,
+)
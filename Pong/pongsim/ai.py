@@ -0,0 +1,149 @@
+"""
+A computer player that works out where the ball is going to be.
+
+Between the top and bottom walls the ball moves in a straight line and
+bounces off each wall like a mirror. So instead of stepping the game
+forward to see where the ball ends up, predict_intercept() carries on the
+straight line as if there were no walls and then folds the answer back
+between them, which takes the same time however many bounces there are.
+
+    game = Game()
+    players = [InterceptAI(game, game.left_paddle, **DIFFICULTIES["easy"]),
+               InterceptAI(game, game.right_paddle)]
+    play(game, players)
+"""
+
+import random
+
+from .physics import (
+    LEFT_HOLD_DOWN,
+    LEFT_HOLD_UP,
+    LEFT_RELEASE,
+    RIGHT_HOLD_DOWN,
+    RIGHT_HOLD_UP,
+    RIGHT_RELEASE,
+)
+
+# Settings for InterceptAI. reaction_ticks is how many ticks it waits
+# between looking at the ball, and error is roughly how many pixels its
+# guesses are off by.
+DIFFICULTIES = {
+    "easy": {"reaction_ticks": 30, "error": 90},
+    "medium": {"reaction_ticks": 15, "error": 40},
+    "hard": {"reaction_ticks": 6, "error": 10},
+    "perfect": {"reaction_ticks": 1, "error": 0},
+}
+
+
+def fold(value, low, high):
+    """
+    Folds `value` back between `low` and `high` as if it had bounced off
+    each end
+    """
+    span = high - low
+    if span <= 0:
+        return (low + high) / 2
+    offset = (value - low) % (2 * span)
+    if offset > span:
+        offset = 2 * span - offset
+    return low + offset
+
+
+def predict_intercept(ball, edge, top_y, bottom_y):
+    """
+    Returns (ticks, y): how many ticks until the ball touches the vertical
+    line `edge`, and where its center will be then. Returns None if the
+    ball is moving away from the line.
+
+    The ball bounces off the walls at `top_y` and `bottom_y`, so its center
+    stays a radius away from them.
+    """
+    radius = ball.radius
+    edge_x = edge.start_x
+    if ball.xspeed > 0 and ball.pos_x < edge_x:
+        ticks = (edge_x - radius - ball.pos_x) / ball.xspeed
+    elif ball.xspeed < 0 and ball.pos_x > edge_x:
+        ticks = (edge_x + radius - ball.pos_x) / ball.xspeed
+    else:
+        return None
+    ticks = max(ticks, 0.0)
+    y = ball.pos_y + ball.yspeed * ticks
+    return ticks, fold(y, top_y + radius, bottom_y - radius)
+
+
+class InterceptAI:
+    """
+    Moves `paddle` towards where the ball will cross its main edge, using
+    the hold actions so it moves at the same speed a player's paddle does.
+
+    Call decide() before every tick. It only looks at the ball every
+    `reaction_ticks` ticks, and each guess is off by a random amount about
+    `error` pixels big. While the ball is going away it heads back to the
+    middle.
+    """
+
+    def __init__(
+        self, game, paddle, reaction_ticks=6, error=10, press=None, rng=random
+    ):
+        self.game = game
+        self.paddle = paddle
+        self.reaction_ticks = max(1, round(reaction_ticks))
+        self.error = error
+        # Defaults to pressing keys in the game, but can be a Recorder's
+        self.press = press or game.press
+        self.rng = rng
+        if paddle.is_on_left:
+            self.actions = (LEFT_HOLD_UP, LEFT_RELEASE, LEFT_HOLD_DOWN)
+        else:
+            self.actions = (RIGHT_HOLD_UP, RIGHT_RELEASE, RIGHT_HOLD_DOWN)
+
+        self.target_y = paddle.pos_y
+        self.next_look = 0
+        self.direction = 0
+
+    def look(self):
+        """
+        Picks where to move the paddle to
+        """
+        game = self.game
+        intercept = predict_intercept(
+            game.ball, self.paddle.main_edge, game.top_wall.start_y,
+            game.bottom_wall.start_y,
+        )
+        if intercept is None:
+            self.target_y = game.height / 2
+        else:
+            self.target_y = intercept[1]
+        if self.error:
+            self.target_y += self.rng.gauss(0, self.error)
+
+    def decide(self):
+        tick = self.game.tick
+        if tick >= self.next_look:
+            self.look()
+            self.next_look = tick + self.reaction_ticks
+
+        paddle = self.paddle
+        distance = self.target_y - paddle.pos_y
+        # Stop once the next move would go past the target
+        if abs(distance) < paddle.speed:
+            direction = 0
+        else:
+            direction = 1 if distance > 0 else -1
+        if direction != self.direction:
+            self.press(self.actions[direction + 1])
+            self.direction = direction
+
+
+def play(game, players, max_ticks=1_000_000):
+    """
+    Runs `game` with the given players deciding before every tick, until
+    somebody wins or `max_ticks` ticks have passed, and returns the winner
+    """
+    step = game.step
+    for _ in range(max_ticks):
+        for player in players:
+            player.decide()
+        if step():
+            break
+    return game.winner
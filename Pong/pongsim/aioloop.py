@@ -0,0 +1,92 @@
+"""
+Runs tkinter and the game as coroutines on one asyncio event loop.
+
+tk.mainloop() never gives anything else a turn, so anything that needs
+asyncio (like a network client) would need a thread of its own, and
+tkinter must only be used from the thread that made the window. Instead,
+pump_tk() handles tkinter's events and redraws with root.update() every
+few milliseconds, and AsyncFixedStepLoop steps and draws the game once a
+frame. In between, other coroutines (network I/O, computer players,
+printing metrics) get their turn on the same thread.
+
+    asyncio.run(run_in_window(root, client.run()))
+
+Anything scheduled with root.after() still runs, because root.update()
+handles it.
+"""
+
+import asyncio
+
+from .loop import FixedStepLoop
+
+
+async def pump_tk(root, interval=0.004):
+    """
+    Handles tkinter's events every `interval` seconds until the window is
+    closed
+    """
+    import tkinter as tk
+
+    try:
+        while True:
+            root.update()
+            await asyncio.sleep(interval)
+    except tk.TclError:
+        # The window was closed, so there's nothing to update any more
+        pass
+
+
+async def run_in_window(root, *coroutines):
+    """
+    Runs `coroutines` alongside pump_tk() until the window is closed, then
+    cancels any of them that are still going
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        await pump_tk(root)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class AsyncFixedStepLoop(FixedStepLoop):
+    """
+    A FixedStepLoop whose frames are a coroutine instead of root.after()
+    callbacks. start() needs to be called while the event loop is running,
+    for example from a key binding or root.after() under pump_tk().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.task = None
+
+    def start(self):
+        # Raises RuntimeError if the event loop isn't running yet, instead
+        # of making a task that would never run
+        loop = asyncio.get_running_loop()
+        self.last_time = self.clock()
+        self.accumulator = 0.0
+        self.previous = self.game.positions()
+        self.task = loop.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        """
+        Draws a frame every frame_ms until the game is over. Frames are
+        timed from when each one was due, so a slow frame doesn't push all
+        the later ones back.
+        """
+        loop = asyncio.get_running_loop()
+        frame_length = self.frame_ms / 1000
+        next_frame = loop.time() + frame_length
+        while True:
+            await asyncio.sleep(max(0.0, next_frame - loop.time()))
+            if not self.frame():
+                break
+            next_frame = max(next_frame + frame_length, loop.time())
+        self.task = None
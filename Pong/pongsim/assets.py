@@ -0,0 +1,133 @@
+"""
+Makes the tutorial's images and animations without a screen.
+
+A game is either played back from a replay or made up from a seed, with
+both paddles following the ball. Every frame is drawn by SceneRasterizer
+and handed straight to the encoder, so nothing is kept in memory between
+frames.
+
+    python -m pongsim.assets Pong_final.gif --seed 3 --seconds 10
+    python -m pongsim.assets glitch.mp4 --replay glitch.pongreplay
+    python -m pongsim.assets start.png --at 0
+"""
+
+import argparse
+import os
+import random
+
+from .encode import FfmpegWriter, GifWriter, write_png
+from .physics import LEFT_DOWN, LEFT_UP, RIGHT_DOWN, RIGHT_UP, Game
+from .raster import SceneRasterizer
+from .replay import Replay, ReplayPlayer
+
+
+class ScriptedGame:
+    """
+    A game where both paddles move towards the ball whenever it's more
+    than a paddle move away, so rallies look like a real game
+    """
+
+    def __init__(self, game):
+        self.game = game
+
+    @property
+    def winner(self):
+        return self.game.winner
+
+    def positions(self):
+        return self.game.positions()
+
+    def step(self):
+        game = self.game
+        ball_y = game.ball.pos_y
+        for paddle, up, down in (
+            (game.left_paddle, LEFT_UP, LEFT_DOWN),
+            (game.right_paddle, RIGHT_UP, RIGHT_DOWN),
+        ):
+            if ball_y < paddle.pos_y - paddle.change:
+                game.press(up)
+            elif ball_y > paddle.pos_y + paddle.change:
+                game.press(down)
+        return game.step()
+
+
+def frames(player, tick_rate, fps, max_seconds):
+    """
+    Steps `player` and yields the positions to draw for each frame
+    """
+    ticks_per_frame = tick_rate / fps
+    max_frames = round(max_seconds * fps)
+    ticks_due = 0.0
+    for _ in range(max_frames):
+        yield player.positions()
+        if player.winner:
+            return
+        ticks_due += ticks_per_frame
+        while ticks_due >= 1 and not player.winner:
+            player.step()
+            ticks_due -= 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Draw a game of pong to a GIF, video or PNG without a window"
+    )
+    parser.add_argument("output", help="a .gif, .png, or anything ffmpeg can write")
+    parser.add_argument("--replay", help="play this replay instead of a made-up game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tick-rate", type=float, default=120)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--seconds", type=float, default=20, help="longest to record")
+    parser.add_argument(
+        "--at", type=float, default=0, help="for a .png, which second to draw"
+    )
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        replay = Replay.load(args.replay)
+        player = ReplayPlayer(replay)
+        tick_rate = replay.tick_rate
+    else:
+        tick_rate = args.tick_rate
+        player = ScriptedGame(
+            Game(
+                rng=random.Random(args.seed),
+                speed_min=150 / tick_rate,
+                speed_max=400 / tick_rate,
+            )
+        )
+
+    rasterizer = SceneRasterizer(player.game)
+    framebuffer = rasterizer.framebuffer
+    extension = os.path.splitext(args.output)[1].lower()
+
+    if extension == ".png":
+        positions = None
+        for positions in frames(player, tick_rate, 1, args.at + 1):
+            pass
+        write_png(args.output, rasterizer.draw(positions))
+        return
+
+    if extension == ".gif":
+        writer = GifWriter(
+            args.output,
+            framebuffer.width,
+            framebuffer.height,
+            framebuffer.colors,
+            fps=args.fps,
+        )
+    else:
+        writer = FfmpegWriter(
+            args.output, framebuffer.width, framebuffer.height, fps=args.fps
+        )
+
+    count = 0
+    with writer:
+        for positions in frames(player, tick_rate, args.fps, args.seconds):
+            writer.write(rasterizer.draw(positions))
+            count += 1
+    print(f"Wrote {count} frames to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
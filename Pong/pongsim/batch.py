@@ -0,0 +1,266 @@
+"""
+Runs lots of games at once using NumPy arrays.
+
+BatchGames keeps one entry per game in each array (ball position, speed and
+radius, and the paddles' positions) and advances all of them together. It
+uses the same rules as Step5_FinishingTouches.py: the ball moves, then
+bounces off the first of the top wall, bottom wall, left paddle and right
+paddle that it should_bounce() off. Every comparison and sign flip is done
+the same way as in that file, so each game ends up in exactly the same
+place as it would if you ran that Ball.update() on its own.
+
+states() and load_states() copy every game to and from an array of the
+fixed-size states in state.py, which can be shared with other processes
+or put into a Game to be drawn.
+
+This needs NumPy, which the rest of pongsim doesn't.
+"""
+
+import numpy as np
+
+from . import state
+
+# Values in BatchGames.winner
+NO_WINNER = 0
+LEFT_PLAYER = 1
+RIGHT_PLAYER = 2
+
+
+class BatchGames:
+    def __init__(
+        self,
+        count,
+        xspeed,
+        yspeed,
+        width=700,
+        height=650,
+        ball_radius=50,
+        paddle_height=200,
+        paddle_width=30,
+        paddle_movement=15,
+    ):
+        """
+        `xspeed`, `yspeed`, `ball_radius`, `paddle_height` and
+        `paddle_movement` can be a single number for every game or an array
+        with one value for each game
+        """
+        self.count = count
+        self.width = width
+        self.height = height
+
+        def column(value):
+            return np.array(np.broadcast_to(value, (count,)), dtype=np.float64)
+
+        self.x = column(width / 2)
+        self.y = column(height / 2)
+        self.xspeed = column(xspeed)
+        self.yspeed = column(yspeed)
+        self.radius = column(ball_radius)
+
+        self.paddle_movement = column(paddle_movement)
+        self.paddle_height = paddle_height = column(paddle_height)
+        # The middle, top and bottom of each paddle's main edge. The ends are
+        # kept separately (like StraightLine.start_y and end_y) instead of
+        # being worked out from the middle so the rounding is the same.
+        self.left_y = self.y.copy()
+        self.left_top = self.left_y - paddle_height / 2
+        self.left_bottom = self.left_top + paddle_height
+        self.right_y = self.y.copy()
+        self.right_top = self.left_top.copy()
+        self.right_bottom = self.left_bottom.copy()
+        # The x coordinates of the paddles' main edges
+        self.left_edge_x = paddle_width
+        self.right_edge_x = width - paddle_width
+
+        self.winner = np.zeros(count, dtype=np.int8)
+        self.ticks = np.zeros(count, dtype=np.int64)
+
+    def _paddle_in_bounds(self, top, bottom, ball_top, ball_bottom):
+        """
+        StraightLine.within_bounds for a paddle edge, for every game at once
+        """
+        return (
+            (bottom <= ball_top) & (ball_top <= top)
+            & (bottom <= ball_bottom) & (ball_bottom <= top)
+        ) | (
+            (top <= ball_top) & (ball_top <= bottom)
+            & (top <= ball_bottom) & (ball_bottom <= bottom)
+        )
+
+    def step(self):
+        """
+        Advances every game that hasn't finished by one tick
+        """
+        x = self.x
+        y = self.y
+        xspeed = self.xspeed
+        yspeed = self.yspeed
+        radius = self.radius
+
+        playing = self.winner == NO_WINNER
+
+        # find_winner(): touching the left or right wall while moving towards it
+        right_won = playing & (xspeed < 0) & (np.abs(0 - x) <= radius)
+        left_won = (
+            playing & ~right_won & (xspeed > 0) & (np.abs(self.width - x) <= radius)
+        )
+        self.winner[right_won] = RIGHT_PLAYER
+        self.winner[left_won] = LEFT_PLAYER
+
+        # Ball.update() still runs once on the tick somebody wins
+        x += np.where(playing, xspeed, 0.0)
+        y += np.where(playing, yspeed, 0.0)
+        self.ticks += playing
+
+        ball_top = y - radius
+        ball_bottom = y + radius
+
+        # Each check only applies if the ball hasn't already bounced off
+        # something earlier in the list this tick
+        bounce = playing & (np.abs(0 - y) <= radius) & (yspeed < 0)
+        still = playing & ~bounce
+        bottom_bounce = still & (np.abs(self.height - y) <= radius) & (yspeed > 0)
+        bounce |= bottom_bounce
+        np.negative(yspeed, out=yspeed, where=bounce)
+
+        still &= ~bottom_bounce
+        bounce = (
+            still
+            & self._paddle_in_bounds(
+                self.left_top, self.left_bottom, ball_top, ball_bottom
+            )
+            & (np.abs(self.left_edge_x - x) <= radius)
+            & (xspeed < 0)
+        )
+        still &= ~bounce
+        bounce |= (
+            still
+            & self._paddle_in_bounds(
+                self.right_top, self.right_bottom, ball_top, ball_bottom
+            )
+            & (np.abs(self.right_edge_x - x) <= radius)
+            & (xspeed > 0)
+        )
+        np.negative(xspeed, out=xspeed, where=bounce)
+
+    def move_paddles(self, left, right):
+        """
+        Moves the paddles in every game. `left` and `right` have -1 to move
+        that game's paddle up, 1 to move it down and 0 to leave it alone,
+        just like pressing the keys once.
+        """
+        change = self.paddle_movement
+        for direction, pos, top, bottom in (
+            (np.asarray(left), self.left_y, self.left_top, self.left_bottom),
+            (np.asarray(right), self.right_y, self.right_top, self.right_bottom),
+        ):
+            up = (direction < 0) & (pos > 0)
+            down = (direction > 0) & (pos < self.height)
+            for values in (pos, top, bottom):
+                np.subtract(values, change, out=values, where=up)
+                np.add(values, change, out=values, where=down)
+
+    def reset(self, which, xspeed, yspeed):
+        """
+        Starts the games where `which` (a boolean array) is true again from
+        the middle, with new ball speeds for those games
+        """
+        y_center = self.height / 2
+        self.x[which] = self.width / 2
+        self.y[which] = y_center
+        self.xspeed[which] = xspeed
+        self.yspeed[which] = yspeed
+        half_height = self.paddle_height[which] / 2
+        for pos, top, bottom in (
+            (self.left_y, self.left_top, self.left_bottom),
+            (self.right_y, self.right_top, self.right_bottom),
+        ):
+            pos[which] = y_center
+            top[which] = y_center - half_height
+            bottom[which] = top[which] + self.paddle_height[which]
+        self.winner[which] = NO_WINNER
+        self.ticks[which] = 0
+
+    def states(self, out=None):
+        """
+        Every game's state as an array in state.py's layout, written into
+        `out` if it's given (for example an array over shared memory). The
+        balls here don't keep track of whether they're bouncing, so that's
+        always false.
+        """
+        if out is None:
+            out = np.zeros(self.count, dtype=state.dtype())
+        out["magic"] = state.MAGIC
+        out["version"] = state.VERSION
+        out["winner"] = self.winner
+        out["left_direction"] = 0
+        out["right_direction"] = 0
+        out["tick"] = self.ticks
+        out["is_bouncing"] = False
+        out["ball_pos_x"] = self.x
+        out["ball_pos_y"] = self.y
+        out["ball_xspeed"] = self.xspeed
+        out["ball_yspeed"] = self.yspeed
+        out["ball_radius"] = self.radius
+        out["ball_top_y"] = self.y - self.radius
+        out["ball_bottom_y"] = self.y + self.radius
+        out["ball_left_x"] = self.x - self.radius
+        out["ball_right_x"] = self.x + self.radius
+        # The x coordinates of each paddle's main edge and of its two ends
+        paddles = (
+            ("left", self.left_y, self.left_top, self.left_bottom),
+            ("right", self.right_y, self.right_top, self.right_bottom),
+        )
+        edge_xs = (
+            (self.left_edge_x, 0, self.left_edge_x),
+            (self.right_edge_x, self.right_edge_x, self.width),
+        )
+        for (side, pos, top, bottom), (main_x, left_x, right_x) in zip(
+            paddles, edge_xs
+        ):
+            out[f"{side}_pos_y"] = pos
+            for edge, start_x, end_x, start_y, end_y in (
+                ("main", main_x, main_x, top, bottom),
+                ("bottom", left_x, right_x, top, top),
+                ("top", left_x, right_x, bottom, bottom),
+            ):
+                out[f"{side}_{edge}_start_x"] = start_x
+                out[f"{side}_{edge}_start_y"] = start_y
+                out[f"{side}_{edge}_end_x"] = end_x
+                out[f"{side}_{edge}_end_y"] = end_y
+        return out
+
+    def load_states(self, states):
+        """
+        Sets every game to the matching state in `states` (an array from
+        states(), or np.frombuffer() of packed states)
+        """
+        if (states["magic"] != state.MAGIC).any():
+            raise state.StateError("not a game state")
+        if (states["version"] != state.VERSION).any():
+            raise state.StateError(f"can only read version {state.VERSION} states")
+        self.winner[:] = states["winner"]
+        self.ticks[:] = states["tick"]
+        self.x[:] = states["ball_pos_x"]
+        self.y[:] = states["ball_pos_y"]
+        self.xspeed[:] = states["ball_xspeed"]
+        self.yspeed[:] = states["ball_yspeed"]
+        self.radius[:] = states["ball_radius"]
+        for side, pos, top, bottom in (
+            ("left", self.left_y, self.left_top, self.left_bottom),
+            ("right", self.right_y, self.right_top, self.right_bottom),
+        ):
+            pos[:] = states[f"{side}_pos_y"]
+            top[:] = states[f"{side}_main_start_y"]
+            bottom[:] = states[f"{side}_main_end_y"]
+
+    def run(self, max_ticks):
+        """
+        Steps every game until they've all finished or `max_ticks` ticks
+        have passed
+        """
+        for _ in range(max_ticks):
+            if not (self.winner == NO_WINNER).any():
+                break
+            self.step()
+        return self.winner
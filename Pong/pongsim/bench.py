@@ -0,0 +1,616 @@
+"""
+Benchmarks the different versions of pong in this repository.
+
+Each version keeps the ball's state differently: plain numbers in the step
+files and pongsim, a Point in pong_point.py, and Vector objects in
+pong-vectors.py (which can also pack them into a VectorArray). This runs
+every version's Ball.update() without a window, from the same seeded
+scenarios, and reports:
+
+* ticks per second
+* bytes allocated per tick: the most extra memory in use at once during a
+  tick, from tracemalloc. That counts every temporary tuple, float and
+  object the tick makes, apart from ones CPython reuses from its free lists.
+* memory blocks kept per tick: how many more blocks are in use after the
+  ticks than before (sys.getallocatedblocks()), which should be 0 unless
+  something keeps growing
+* peak memory used by the game, in bytes
+
+The classes are taken out of each script without running the rest of it
+(which would open a window). They draw onto a NullCanvas that does nothing.
+The scripts aren't part of the pongsim package, so this needs a copy of
+the repository. It's found from where pongsim was imported, or the
+current folder, or can be given with --repo.
+
+It also times how long a fresh Python takes to import what `pong
+headless` needs, and checks that doesn't include tkinter.
+
+Results are added to a JSON lines file, one line per run, and compared
+with the last run from a different commit so slowdowns are easy to spot.
+
+    python -m pongsim.bench --ticks 100000
+"""
+
+import argparse
+import ast
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# Where pongsim was imported from. In the repository that's the Pong
+# folder, but once pongsim is installed it's site-packages.
+PONG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OUTPUT_NAME = "bench-results.jsonl"
+
+WIDTH = 700
+HEIGHT = 650
+BALL_RADIUS = 50
+PADDLE_WIDTH = 30
+# Paddles twice as tall as the window, so every rally keeps going and the
+# benchmark measures bounces rather than the ball flying off the screen
+PADDLE_HEIGHT = HEIGHT * 2
+PADDLE_MOVEMENT = 15
+
+
+class NullCanvas:
+    """
+    Stands in for a tkinter canvas and doesn't draw anything
+    """
+
+    def __init__(self):
+        self.last_id = 0
+
+    def create_oval(self, *args, **kwargs):
+        self.last_id += 1
+        return self.last_id
+
+    create_rectangle = create_oval
+
+    def move(self, *args):
+        pass
+
+    def coords(self, *args):
+        pass
+
+
+def load_classes(path, **module_globals):
+    """
+    Runs only the imports, classes and functions from the script at `path`
+    and returns its namespace. `module_globals` are added first, for the
+    globals (like canvas) that the classes use.
+    """
+    with open(path) as file:
+        tree = ast.parse(file.read(), path)
+
+    def keep(node):
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+            return True
+        if isinstance(node, ast.Import):
+            return all(alias.name != "tkinter" for alias in node.names)
+        if isinstance(node, ast.ImportFrom):
+            return node.module != "tkinter"
+        return False
+
+    module = ast.Module(body=[n for n in tree.body if keep(n)], type_ignores=[])
+    namespace = {"__name__": "bench_" + os.path.basename(path)[:-3]}
+    namespace.update(module_globals)
+    exec(compile(module, path, "exec"), namespace)
+    return namespace
+
+
+class Scenario:
+    """
+    A ball speed and a list of paddle key presses, chosen from a seed
+    """
+
+    def __init__(self, seed, ticks):
+        rng = random.Random(seed)
+        self.seed = seed
+        self.xspeed = rng.uniform(1, 4) * rng.choice((-1, 1))
+        self.yspeed = rng.uniform(1, 4) * rng.choice((-1, 1))
+
+        # Each press is undone a few ticks later so the paddles stay put
+        self.presses = {}
+        tick = rng.randrange(20, 60)
+        while tick < ticks:
+            side = rng.choice(("left", "right"))
+            first, second = rng.choice((("up", "down"), ("down", "up")))
+            self.presses.setdefault(tick, []).append((side, first))
+            self.presses.setdefault(tick + 10, []).append((side, second))
+            tick += rng.randrange(20, 60)
+
+
+# Each setup function builds one version's game from a scenario and returns
+# (ball, {"left": left paddle, "right": right paddle}). Paddles are moved by
+# calling move_up(None) or move_down(None), like the key bindings do.
+
+
+def setup_step3(ns, scenario):
+    line = ns["StraightLine"]
+    walls = [
+        line(0, 0, 0, HEIGHT, position="left", is_wall=True),
+        line(0, 0, WIDTH, 0, position="top", is_wall=True),
+        line(WIDTH, 0, WIDTH, HEIGHT, position="right", is_wall=True),
+        line(0, HEIGHT, WIDTH, HEIGHT, position="bottom", is_wall=True),
+    ]
+    paddles = {
+        side: ns["Paddle"](
+            PADDLE_HEIGHT, PADDLE_WIDTH, x, HEIGHT / 2, "blue", PADDLE_MOVEMENT
+        )
+        for side, x in (("left", PADDLE_WIDTH / 2), ("right", WIDTH - PADDLE_WIDTH / 2))
+    }
+    ball = ns["Ball"](
+        WIDTH / 2, HEIGHT / 2, BALL_RADIUS, scenario.xspeed, scenario.yspeed, walls
+    )
+    return ball, paddles
+
+
+def setup_step4(ns, scenario):
+    line = ns["StraightLine"]
+    paddles = {
+        side: ns["Paddle"](
+            PADDLE_HEIGHT, PADDLE_WIDTH, x, HEIGHT / 2, "blue", PADDLE_MOVEMENT,
+            side == "left",
+        )
+        for side, x in (("left", PADDLE_WIDTH / 2), ("right", WIDTH - PADDLE_WIDTH / 2))
+    }
+    lines = [
+        line(0, 0, WIDTH, 0, position="top", is_wall=True),
+        line(0, HEIGHT, WIDTH, HEIGHT, position="bottom", is_wall=True),
+        paddles["left"].main_edge,
+        paddles["right"].main_edge,
+    ]
+    ball = ns["Ball"](
+        WIDTH / 2, HEIGHT / 2, BALL_RADIUS, scenario.xspeed, scenario.yspeed, lines
+    )
+    return ball, paddles
+
+
+def setup_pong_point(ns, scenario):
+    line = ns["StraightLine"]
+    point = ns["Point"]
+    ns["left_wall"] = line(0, 0, 0, HEIGHT, "left", is_wall=True)
+    ns["right_wall"] = line(WIDTH, 0, WIDTH, HEIGHT, "right", is_wall=True)
+    walls = [
+        line(0, 0, WIDTH, 0, "top", is_wall=True),
+        line(0, HEIGHT, WIDTH, HEIGHT, "bottom", is_wall=True),
+        ns["left_wall"],
+        ns["right_wall"],
+    ]
+    paddles = {
+        side: ns["Paddle"](
+            PADDLE_HEIGHT, PADDLE_WIDTH, "blue", point(x, HEIGHT / 2),
+            side == "left", PADDLE_MOVEMENT,
+        )
+        for side, x in (("left", PADDLE_WIDTH / 2), ("right", WIDTH - PADDLE_WIDTH / 2))
+    }
+    ball = ns["Ball"](
+        point(WIDTH / 2, HEIGHT / 2), scenario.xspeed, scenario.yspeed, BALL_RADIUS,
+        1, walls + paddles["left"].edges + paddles["right"].edges,
+    )
+    return ball, paddles
+
+
+def setup_pong_vectors(packed):
+    def setup(ns, scenario):
+        if packed:
+            # Every point and vector made here, all in one VectorArray: the
+            # walls' ends, where the paddles start, and the ball's position
+            # and speed. (The paddles make their own Points for their edges.)
+            vectors = ns["VectorArray"](12)
+            indexes = iter(range(len(vectors)))
+
+            def point(x, y):
+                vector = vectors.view(next(indexes))
+                vector.x = x
+                vector.y = y
+                return vector
+
+            vector = point
+        else:
+            point = ns["Point"]
+            vector = ns["Vector"]
+        return _setup_pong_vectors(ns, scenario, point, vector)
+
+    return setup
+
+
+def _setup_pong_vectors(ns, scenario, point, vector):
+    line = ns["StraightLine"]
+    ns["left_wall"] = line(point(0, 0), point(0, HEIGHT), "left", "Left wall", True)
+    ns["right_wall"] = line(
+        point(WIDTH, 0), point(WIDTH, HEIGHT), "right", "Right wall", True
+    )
+    walls = [
+        line(point(0, 0), point(WIDTH, 0), "top", "Top wall", True),
+        line(point(0, HEIGHT), point(WIDTH, HEIGHT), "bottom", "Bottom wall", True),
+        ns["left_wall"],
+        ns["right_wall"],
+    ]
+    paddles = {
+        side: ns["Paddle"](
+            PADDLE_HEIGHT, PADDLE_WIDTH, "blue", point(x, HEIGHT / 2),
+            side == "left", PADDLE_MOVEMENT,
+        )
+        for side, x in (("left", PADDLE_WIDTH / 2), ("right", WIDTH - PADDLE_WIDTH / 2))
+    }
+    ball = ns["Ball"](
+        point(WIDTH / 2, HEIGHT / 2), vector(scenario.xspeed, scenario.yspeed),
+        BALL_RADIUS, 1, walls + paddles["left"].edges + paddles["right"].edges,
+    )
+    return ball, paddles
+
+
+def setup_pongsim(swept):
+    def setup(ns, scenario):
+        game = ns["Game"](
+            width=WIDTH,
+            height=HEIGHT,
+            ball_radius=BALL_RADIUS,
+            paddle_height=PADDLE_HEIGHT,
+            paddle_width=PADDLE_WIDTH,
+            paddle_movement=PADDLE_MOVEMENT,
+            xspeed=scenario.xspeed,
+            yspeed=scenario.yspeed,
+            swept=swept,
+        )
+        # Game.step() checks for a winner and then calls Ball.update()
+        game.update = game.step
+        return game, {"left": game.left_paddle, "right": game.right_paddle}
+
+    return setup
+
+
+def _load_pongsim(repo, **module_globals):
+    from . import physics
+
+    return vars(physics)
+
+
+def _script(name):
+    def load_script(repo, **module_globals):
+        return load_classes(script_path(repo, name), **module_globals)
+
+    # So main() can tell which versions need the repository
+    load_script.script = name
+    return load_script
+
+
+# name: (load the namespace, set up a game)
+VARIANTS = {
+    "step3": (_script("Step3_Movement.py"), setup_step3),
+    "step4": (_script("Step4_BounceOffPaddle.py"), setup_step4),
+    "step5": (_script("Step5_FinishingTouches.py"), setup_step4),
+    "pong_point": (_script("pong_point.py"), setup_pong_point),
+    "pong-vectors": (_script("pong-vectors.py"), setup_pong_vectors(packed=False)),
+    "pong-vectors-packed": (_script("pong-vectors.py"), setup_pong_vectors(packed=True)),
+    "pongsim-sampled": (_load_pongsim, setup_pongsim(swept=False)),
+    "pongsim-swept": (_load_pongsim, setup_pongsim(swept=True)),
+}
+
+
+def script_path(repo, name):
+    """
+    Where the script called `name` is in the repository at `repo`.
+    pong-vectors.py is at the top and the rest are in the Pong folder.
+    """
+    path = os.path.join(repo, name)
+    if not os.path.exists(path):
+        path = os.path.join(repo, "Pong", name)
+    return path
+
+
+def find_repo(repo=None):
+    """
+    The top folder of the repository with the scripts to benchmark, or None
+    if it can't be found
+    """
+    if repo is not None:
+        candidates = [repo]
+    else:
+        cwd = os.getcwd()
+        candidates = [os.path.dirname(PONG_DIR), cwd, os.path.dirname(cwd)]
+    for candidate in candidates:
+        if os.path.exists(os.path.join(candidate, "Pong", "Step3_Movement.py")):
+            return os.path.abspath(candidate)
+    return None
+
+
+def load(name, repo):
+    """
+    Returns the namespace with the classes for one version
+    """
+    return VARIANTS[name][0](
+        repo,
+        canvas=NullCanvas(),
+        canvas_width=WIDTH,
+        canvas_height=HEIGHT,
+        y_top_limit=0,
+        y_bottom_limit=HEIGHT,
+    )
+
+
+def build(name, scenario, repo, ns=None):
+    if ns is None:
+        ns = load(name, repo)
+    return VARIANTS[name][1](ns, scenario)
+
+
+def run_ticks(ball, paddles, presses, ticks):
+    update = ball.update
+    for tick in range(ticks):
+        if tick in presses:
+            for side, direction in presses[tick]:
+                paddle = paddles[side]
+                if direction == "up":
+                    paddle.move_up(None)
+                else:
+                    paddle.move_down(None)
+        update()
+
+
+def measure_allocations(ball, paddles, presses, ticks):
+    """
+    Returns (bytes allocated, memory blocks kept) per tick on average, as
+    described at the top of this file
+    """
+    blocks = sys.getallocatedblocks()
+    run_ticks(ball, paddles, presses, ticks)
+    blocks = sys.getallocatedblocks() - blocks
+
+    update = ball.update
+    # Python 3.8 doesn't have reset_peak(), but starting again also resets
+    # the peak
+    reset_peak = getattr(tracemalloc, "reset_peak", None)
+    allocated = 0
+    tracemalloc.start()
+    try:
+        for tick in range(ticks):
+            if tick in presses:
+                for side, direction in presses[tick]:
+                    paddle = paddles[side]
+                    if direction == "up":
+                        paddle.move_up(None)
+                    else:
+                        paddle.move_down(None)
+            if reset_peak is None:
+                tracemalloc.stop()
+                tracemalloc.start()
+            else:
+                reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            update()
+            allocated += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return allocated / ticks, blocks / ticks
+
+
+def bench_variant(name, scenarios, ticks, repo):
+    """
+    Returns the results for one version, summed over the scenarios
+    """
+    elapsed = 0.0
+    allocated = 0.0
+    kept = 0.0
+    peak = 0
+    counted_ticks = min(ticks, 5000)
+
+    for scenario in scenarios:
+        ball, paddles = build(name, scenario, repo)
+        start = time.perf_counter()
+        run_ticks(ball, paddles, scenario.presses, ticks)
+        elapsed += time.perf_counter() - start
+
+        ball, paddles = build(name, scenario, repo)
+        bytes_per_tick, blocks_per_tick = measure_allocations(
+            ball, paddles, scenario.presses, counted_ticks
+        )
+        allocated += bytes_per_tick / len(scenarios)
+        kept += blocks_per_tick / len(scenarios)
+
+        # Only count the memory for the game itself, not loading the classes
+        ns = load(name, repo)
+        tracemalloc.start()
+        ball, paddles = build(name, scenario, repo, ns)
+        run_ticks(ball, paddles, scenario.presses, counted_ticks)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "ticks_per_second": ticks * len(scenarios) / elapsed,
+        "allocated_bytes_per_tick": allocated,
+        "blocks_kept_per_tick": kept,
+        "peak_bytes": peak,
+    }
+
+
+# What `pong headless` imports before it starts playing
+HEADLESS_MODULES = ("pongsim.cli", "pongsim.headless")
+
+_IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+print(time.perf_counter() - start, "tkinter" in sys.modules)
+"""
+
+
+def import_time(modules=HEADLESS_MODULES, repeats=5):
+    """
+    The fastest of `repeats` imports of `modules`, each in a new Python
+    process, and whether tkinter was imported along the way
+    """
+    times = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_SCRIPT, *modules],
+            cwd=PONG_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        times.append(float(output[0]))
+    return min(times), output[1] == "True"
+
+
+def git_commit(repo):
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=repo,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_previous(path, commit):
+    """
+    The last saved run from a different commit, or None
+    """
+    previous = None
+    try:
+        with open(path) as file:
+            for line in file:
+                run = json.loads(line)
+                if run.get("commit") != commit or commit is None:
+                    previous = run
+    except FileNotFoundError:
+        pass
+    return previous
+
+
+def report(results, previous, threshold):
+    """
+    Prints a table of results and returns the names of the versions that
+    got slower by more than `threshold` (a fraction) since `previous`
+    """
+    slower = []
+    print(
+        f"{'version':<20}{'ticks/s':>12}{'bytes/tick':>12}{'kept/tick':>11}"
+        f"{'peak KiB':>10}  change"
+    )
+    for name, result in results.items():
+        change = ""
+        old = previous and previous["results"].get(name)
+        if old:
+            ratio = result["ticks_per_second"] / old["ticks_per_second"] - 1
+            change = f"{ratio:+.1%}"
+            if ratio < -threshold:
+                change += "  SLOWER"
+                slower.append(name)
+        print(
+            f"{name:<20}{result['ticks_per_second']:>12,.0f}"
+            f"{result['allocated_bytes_per_tick']:>12.1f}"
+            f"{result['blocks_kept_per_tick']:>11.3f}"
+            f"{result['peak_bytes'] / 1024:>10.1f}  {change}"
+        )
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--ticks", type=int, default=100_000, help="ticks per scenario")
+    parser.add_argument("--scenarios", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--variant",
+        action="append",
+        choices=sorted(VARIANTS),
+        help="only run this version (can be given more than once)",
+    )
+    parser.add_argument(
+        "--repo", help="the repository with the scripts (found automatically if not given)"
+    )
+    parser.add_argument(
+        "--output", help=f"where to add the results (Pong/{OUTPUT_NAME} by default)"
+    )
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="how much slower (as a fraction) counts as a regression",
+    )
+    parser.add_argument(
+        "--import-repeats",
+        type=int,
+        default=5,
+        help="how many times to time importing pongsim (0 to skip it)",
+    )
+    args = parser.parse_args(argv)
+
+    names = args.variant or list(VARIANTS)
+    repo = find_repo(args.repo)
+    if repo is None:
+        scripts = [
+            VARIANTS[name][0].script
+            for name in names
+            if hasattr(VARIANTS[name][0], "script")
+        ]
+        if scripts or args.repo:
+            parser.error(
+                f"can't find {', '.join(scripts) or 'the scripts'} to benchmark. "
+                "Run this from a copy of the repository, or give its folder with "
+                "--repo (or only benchmark pongsim with --variant)."
+            )
+    if args.output:
+        output = args.output
+    elif repo:
+        output = os.path.join(repo, "Pong", OUTPUT_NAME)
+    else:
+        output = OUTPUT_NAME
+
+    scenarios = [Scenario(args.seed + i, args.ticks) for i in range(args.scenarios)]
+    results = {
+        name: bench_variant(name, scenarios, args.ticks, repo) for name in names
+    }
+
+    commit = git_commit(repo) if repo else None
+    previous = load_previous(output, commit)
+    slower = report(results, previous, args.threshold)
+
+    seconds = None
+    if args.import_repeats:
+        seconds, tkinter = import_time(repeats=args.import_repeats)
+        change = ""
+        old = previous and previous.get("import_seconds")
+        if old:
+            ratio = seconds / old - 1
+            change = f"  {ratio:+.1%}"
+            if ratio > args.threshold:
+                change += "  SLOWER"
+                slower.append("import")
+        print(f"\nImporting pong headless: {seconds * 1000:.1f} ms{change}")
+        if tkinter:
+            print("It imported tkinter, which it shouldn't need")
+            slower.append("import")
+
+    if not args.no_save:
+        run = {
+            "commit": commit,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "ticks": args.ticks,
+            "scenarios": args.scenarios,
+            "seed": args.seed,
+            "results": results,
+            "import_seconds": seconds,
+        }
+        with open(output, "a") as file:
+            file.write(json.dumps(run) + "\n")
+
+    return 1 if slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
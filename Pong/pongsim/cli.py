@@ -0,0 +1,30 @@
+"""
+The `pong` command (installed with `pip install ./Pong`, or run as
+`python -m pongsim`):
+
+    pong play [--ai hard]          play in a window
+    pong headless [--games 100]    let the computer play itself, no window
+    pong bench                     benchmark the versions of the game
+    pong replay game.pongreplay    watch (or check) a recorded game
+
+Each command is a module with a main(), which is only imported when that
+command runs, so only `play` and watching a replay load tkinter. `pong
+<command> --help` lists each command's options.
+"""
+
+import argparse
+import importlib
+
+COMMANDS = ("play", "headless", "bench", "replay")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pong", description="Play, simulate or benchmark pong"
+    )
+    parser.add_argument("command", choices=COMMANDS)
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(f".{args.command}", __package__)
+    return module.main(args.args)
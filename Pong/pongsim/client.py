@@ -0,0 +1,278 @@
+"""
+A window for playing on a game server (see server.py).
+
+The client doesn't run any physics. It sends which way the player's paddle
+is moving whenever that changes, and draws the latest snapshot from the
+server. w/s and the arrow keys both move your own paddle.
+
+    python -m pongsim.client 192.168.1.20 --match friday
+    python -m pongsim.client 192.168.1.20 --udp
+    python -m pongsim.client 192.168.1.20 --match friday --spectate
+
+With --asyncio, the window and an asyncio net.Client share one event loop
+(see aioloop.py) instead of polling a non-blocking socket from tkinter.
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+
+from .input import ACTIONS, HeldKeys
+from .net import (
+    DELTA,
+    JOIN,
+    KEYFRAME,
+    LEFT,
+    SNAPSHOT,
+    SPECTATE,
+    SPECTATOR,
+    WELCOME,
+    Client,
+    ProtocolError,
+    apply_delta,
+    decode,
+    encode_input,
+    encode_join,
+    split_messages,
+)
+from .physics import Game
+
+# Which way each hold action moves the paddle
+DIRECTIONS = {
+    action: direction
+    for actions in ACTIONS.values()
+    for direction, action in actions.items()
+}
+
+
+class PollingClient:
+    """
+    A non-blocking connection to the server that tkinter can check with
+    root.after, without needing another thread
+    """
+
+    def __init__(self, host, port, match, udp=False, spectate=False):
+        if udp:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.socket.connect((host, port))
+        else:
+            self.socket = socket.create_connection((host, port))
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.setblocking(False)
+        self.udp = udp
+        self.join = encode_join(match, SPECTATE if spectate else JOIN)
+        self.buffer = bytearray()
+        self.side = None
+        self.settings = None
+        self.snapshot = None
+        self.keyframe = None
+        self.closed = False
+        self.direction = 0
+        self.sequence = 0
+        self.last_sent = 0.0
+        self.send(self.join)
+
+    def send(self, data):
+        try:
+            self.socket.send(data)
+        except (BlockingIOError, ConnectionError):
+            pass
+        self.last_sent = time.monotonic()
+
+    def send_direction(self, direction):
+        self.direction = direction
+        self.sequence += 1
+        self.send(encode_input(self.sequence, direction))
+
+    def _messages(self):
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except BlockingIOError:
+                return
+            except ConnectionError:
+                self.closed = True
+                return
+            if self.udp:
+                yield data
+                continue
+            if not data:
+                self.closed = True
+                return
+            self.buffer += data
+            yield from split_messages(self.buffer)
+
+    def poll(self):
+        """
+        Reads everything the server has sent. Over UDP, also sends JOIN or
+        the current direction again every so often in case it was lost.
+        """
+        for data in self._messages():
+            try:
+                message = decode(data)
+            except ProtocolError:
+                continue
+            if message[0] == WELCOME:
+                _, self.side, self.tick_rate, self.settings = message
+            elif message[0] == SNAPSHOT:
+                self.snapshot = message
+            elif message[0] == KEYFRAME:
+                self.keyframe = message
+                self.snapshot = (SNAPSHOT, *message[1:])
+            elif message[0] == DELTA:
+                self.snapshot = apply_delta(self.keyframe, message) or self.snapshot
+        if self.udp and time.monotonic() - self.last_sent > 0.1:
+            if self.side is None:
+                self.send(self.join)
+            else:
+                self.send(encode_input(self.sequence, self.direction))
+
+    def close(self):
+        self.socket.close()
+
+
+def play(client, frame_ms=16):
+    """
+    Opens the window once the server has said hello
+    """
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.title("Pong (waiting for the server)")
+
+    def wait_for_welcome():
+        client.poll()
+        if client.settings is None:
+            root.after(frame_ms, wait_for_welcome)
+        else:
+            start(root, client, frame_ms)
+
+    wait_for_welcome()
+    tk.mainloop()
+
+
+async def play_async(host, port, match, udp=False, spectate=False, frame_ms=16):
+    """
+    Like play(), but with the window and the connection on the running
+    asyncio event loop. If it can't join the match, the window is closed
+    and the error is raised.
+    """
+    import tkinter as tk
+
+    from .aioloop import run_in_window
+
+    root = tk.Tk()
+    root.title("Pong (waiting for the server)")
+    failures = []
+
+    async def connect():
+        try:
+            client = await Client.connect(host, port, match, udp, spectate)
+        except (OSError, ProtocolError) as error:
+            # Closing the window ends run_in_window(), and then it's raised
+            failures.append(error)
+            root.destroy()
+            return
+        start(root, client, frame_ms)
+
+    await run_in_window(root, connect())
+    if failures:
+        raise failures[0]
+
+
+def start(root, client, frame_ms):
+    import tkinter as tk
+
+    from .render import TkRenderer
+
+    settings = client.settings
+    watching = client.side == SPECTATOR
+    side = "left" if client.side == LEFT else "right"
+    root.title("Pong (watching)" if watching else f"Pong (you're on the {side})")
+    # The game is only used for the sizes of things; the server moves them
+    game = Game(**settings)
+    canvas = tk.Canvas(root, width=game.width, height=game.height, bd=0, bg="black")
+    canvas.pack()
+    renderer = TkRenderer(canvas, game)
+    status = canvas.create_text(
+        game.width / 2,
+        game.height / 2,
+        text="Waiting for another player",
+        fill="white",
+        font=("Courier", 20),
+    )
+
+    keys = {
+        "w": (side, -1),
+        "s": (side, 1),
+        "Up": (side, -1),
+        "Down": (side, 1),
+    }
+    held_keys = HeldKeys(
+        root, lambda action: client.send_direction(DIRECTIONS[action]), keys=keys
+    )
+    if watching:
+        held_keys.disable()
+        canvas.itemconfigure(status, text="Waiting for the match to start")
+
+    def frame():
+        client.poll()
+        held_keys.sync()
+        snapshot = client.snapshot
+        if snapshot is not None:
+            canvas.itemconfigure(status, text="")
+            _, _, ball_x, ball_y, _, _, left_y, right_y, winner = snapshot
+            renderer.draw((ball_x, ball_y, left_y, right_y))
+            if winner:
+                if watching:
+                    message = ("Left", "Right")[winner - 1] + " player won"
+                elif winner - 1 == client.side:
+                    message = "You won!"
+                else:
+                    message = "You lost"
+                canvas.itemconfigure(status, text=message)
+                held_keys.disable()
+                client.close()
+                return
+        if client.closed:
+            canvas.itemconfigure(status, text="Lost the connection to the server")
+            return
+        root.after(frame_ms, frame)
+
+    frame()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play pong on a game server")
+    parser.add_argument("host")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--udp", action="store_true", help="use UDP instead of TCP")
+    parser.add_argument("--match", default="pong", help="the match to join")
+    parser.add_argument(
+        "--spectate", action="store_true", help="watch the match instead of playing"
+    )
+    parser.add_argument(
+        "--asyncio",
+        action="store_true",
+        help="run the window and the connection on an asyncio event loop",
+    )
+    args = parser.parse_args(argv)
+
+    if args.asyncio:
+        try:
+            asyncio.run(
+                play_async(args.host, args.port, args.match, args.udp, args.spectate)
+            )
+        except (OSError, ProtocolError) as error:
+            parser.exit(1, f"Couldn't join {args.host}:{args.port}: {error}\n")
+        return
+    play(
+        PollingClient(
+            args.host, args.port, args.match, udp=args.udp, spectate=args.spectate
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
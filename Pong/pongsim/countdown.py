@@ -0,0 +1,74 @@
+"""
+A countdown before the game starts that doesn't freeze the window.
+
+Instead of sleeping between numbers, each step of the countdown is a state
+that schedules the next one with root.after, so tkinter keeps redrawing the
+window and handling keys the whole time.
+"""
+
+
+class Countdown:
+    """
+    Shows each of `steps` for `step_ms` milliseconds by calling show(text),
+    then calls hide() and on_done(). If `wait_ms` is given, nothing is shown
+    for that long first.
+    """
+
+    def __init__(
+        self,
+        root,
+        show,
+        hide,
+        on_done,
+        steps=("3", "2", "1", "GO!"),
+        step_ms=1000,
+        wait_ms=0,
+    ):
+        self.root = root
+        self.show = show
+        self.hide = hide
+        self.on_done = on_done
+        self.steps = steps
+        self.step_ms = step_ms
+        self.wait_ms = wait_ms
+
+        # Which step is showing: -1 while waiting, len(steps) once it's done
+        self.state = -1
+        self.after_id = None
+
+    @property
+    def length_ms(self):
+        """
+        How long the whole countdown takes
+        """
+        return self.wait_ms + self.step_ms * len(self.steps)
+
+    @property
+    def done(self):
+        return self.state >= len(self.steps)
+
+    def start(self):
+        self.state = -1
+        if self.wait_ms:
+            self.after_id = self.root.after(self.wait_ms, self._next)
+        else:
+            self._next()
+
+    def skip(self):
+        """
+        Ends the countdown right away
+        """
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+        self.state = len(self.steps) - 1
+        self._next()
+
+    def _next(self):
+        self.after_id = None
+        self.state += 1
+        if self.state < len(self.steps):
+            self.show(self.steps[self.state])
+            self.after_id = self.root.after(self.step_ms, self._next)
+        else:
+            self.hide()
+            self.on_done()
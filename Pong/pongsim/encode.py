@@ -0,0 +1,277 @@
+"""
+Writes Framebuffers from raster.py out as images and videos.
+
+The writers take one frame at a time and write it straight out, so making
+a long animation doesn't need more memory than a short one.
+
+* GifWriter writes an animated GIF in pure Python. After the first frame,
+  only the rectangle that changed since the last frame is stored, which
+  keeps both the file and the time spent compressing small.
+* FfmpegWriter pipes raw frames into ffmpeg, for MP4 and other videos.
+* write_png writes a single frame.
+"""
+
+import shutil
+import struct
+import subprocess
+import zlib
+
+
+def _lzw_compress(pixels, min_code_size):
+    """
+    Compresses palette indices with the variable-width LZW used by GIF
+    """
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+
+    out = bytearray()
+    bits = 0
+    bit_count = 0
+    code_size = min_code_size + 1
+
+    def emit(code):
+        nonlocal bits, bit_count
+        bits |= code << bit_count
+        bit_count += code_size
+        while bit_count >= 8:
+            out.append(bits & 0xFF)
+            bits >>= 8
+            bit_count -= 8
+
+    emit(clear_code)
+    if not pixels:
+        emit(end_code)
+        if bit_count:
+            out.append(bits & 0xFF)
+        return out
+
+    # Maps (code << 8 | next pixel) to the code for that longer string
+    table = {}
+    next_code = end_code + 1
+    prefix = pixels[0]
+    for pixel in pixels[1:]:
+        key = prefix << 8 | pixel
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+
+        emit(prefix)
+        if next_code == 4096:
+            # The table is full, so start again
+            emit(clear_code)
+            table.clear()
+            next_code = end_code + 1
+            code_size = min_code_size + 1
+        else:
+            table[key] = next_code
+            next_code += 1
+            if next_code > 1 << code_size and code_size < 12:
+                code_size += 1
+        prefix = pixel
+
+    emit(prefix)
+    emit(end_code)
+    if bit_count:
+        out.append(bits & 0xFF)
+    return out
+
+
+def _changed_rect(previous, current, width, height):
+    """
+    The smallest (x, y, width, height) that contains every pixel that is
+    different between the two frames, or None if they're the same
+    """
+    top = None
+    bottom = 0
+    left = width
+    right = 0
+    for y in range(height):
+        start = y * width
+        old_row = previous[start : start + width]
+        new_row = current[start : start + width]
+        if old_row == new_row:
+            continue
+        if top is None:
+            top = y
+        bottom = y
+        # XORing the rows as big numbers gives zero bytes where they match
+        diff = int.from_bytes(old_row, "big") ^ int.from_bytes(new_row, "big")
+        left = min(left, width - (diff.bit_length() + 7) // 8)
+        right = max(right, width - ((diff & -diff).bit_length() - 1) // 8)
+    if top is None:
+        return None
+    return left, top, right - left, bottom - top + 1
+
+
+class GifWriter:
+    """
+    Writes an animated GIF one frame at a time
+
+        with GifWriter("pong.gif", width, height, colors, fps=30) as gif:
+            gif.write(framebuffer)
+    """
+
+    def __init__(self, file, width, height, colors, fps=30, loop=0):
+        if isinstance(file, str):
+            file = open(file, "wb")
+            self._owns_file = True
+        else:
+            self._owns_file = False
+        self.file = file
+        self.width = width
+        self.height = height
+        self.frame_time = 100 / fps
+        # Frame delays are in hundredths of a second, so the rounding is
+        # carried over to keep the overall speed right
+        self.time = 0.0
+        self.written_time = 0
+        self.previous = None
+        self._pending = None
+
+        color_bits = max(1, (len(colors) - 1).bit_length())
+        self.min_code_size = max(2, color_bits)
+        table = bytearray()
+        for color in colors:
+            table.extend(color)
+        table.extend(bytes(3 * ((1 << color_bits) - len(colors))))
+
+        file.write(b"GIF89a")
+        file.write(struct.pack("<HHBBB", width, height, 0x80 | color_bits - 1, 0, 0))
+        file.write(table)
+        # Makes the animation repeat `loop` times (0 means forever)
+        file.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\x00")
+
+    def write(self, framebuffer):
+        pixels = bytes(framebuffer.pixels)
+        if self.previous is None:
+            rect = (0, 0, self.width, self.height)
+        else:
+            rect = _changed_rect(self.previous, pixels, self.width, self.height)
+
+        self.time += self.frame_time
+        if rect is None:
+            # Nothing changed, so the last frame just stays up longer
+            return
+        self._flush_pending()
+        self._pending = (pixels, rect)
+        self.previous = pixels
+
+    def _flush_pending(self):
+        """
+        Writes the frame before this one, now that it's known how long it
+        stays on the screen
+        """
+        if self._pending is None:
+            return
+        pixels, (x, y, width, height) = self._pending
+        self._pending = None
+
+        delay = round(self.time - self.frame_time) - self.written_time
+        if delay <= 0:
+            delay = 1
+        self.written_time += delay
+
+        if (x, y, width, height) == (0, 0, self.width, self.height):
+            data = pixels
+        else:
+            data = b"".join(
+                pixels[row * self.width + x : row * self.width + x + width]
+                for row in range(y, y + height)
+            )
+
+        file = self.file
+        # Graphic control extension: the delay, and keep this frame under
+        # the next one (disposal method 1), since the next only has changes
+        file.write(b"\x21\xf9\x04\x04" + struct.pack("<H", delay) + b"\x00\x00")
+        file.write(b"\x2c" + struct.pack("<HHHHB", x, y, width, height, 0))
+        file.write(bytes([self.min_code_size]))
+        compressed = _lzw_compress(data, self.min_code_size)
+        for start in range(0, len(compressed), 255):
+            block = compressed[start : start + 255]
+            file.write(bytes([len(block)]) + block)
+        file.write(b"\x00")
+
+    def close(self):
+        # The last frame gets the rest of the time
+        self.time += self.frame_time
+        self._flush_pending()
+        self.file.write(b"\x3b")
+        if self._owns_file:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FfmpegWriter:
+    """
+    Writes a video by piping raw frames into ffmpeg. The format comes from
+    the file extension (.mp4, .webm, ...).
+    """
+
+    def __init__(self, path, width, height, fps=30, ffmpeg="ffmpeg"):
+        executable = shutil.which(ffmpeg)
+        if executable is None:
+            raise FileNotFoundError(
+                f"{ffmpeg} was not found, and it's needed to write {path}"
+            )
+        self.process = subprocess.Popen(
+            [
+                executable,
+                "-loglevel", "error",
+                "-y",
+                "-f", "rawvideo",
+                "-pix_fmt", "rgb24",
+                "-s", f"{width}x{height}",
+                "-r", str(fps),
+                "-i", "-",
+                "-pix_fmt", "yuv420p",
+                path,
+            ],
+            stdin=subprocess.PIPE,
+        )
+
+    def write(self, framebuffer):
+        self.process.stdin.write(framebuffer.rgb())
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait():
+            raise RuntimeError(f"ffmpeg exited with code {self.process.returncode}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _png_chunk(kind, data):
+    chunk = kind + data
+    return struct.pack(">I", len(data)) + chunk + struct.pack(">I", zlib.crc32(chunk))
+
+
+def write_png(path, framebuffer):
+    """
+    Saves a single frame as a PNG that uses the framebuffer's palette
+    """
+    width = framebuffer.width
+    rows = b"".join(
+        b"\x00" + bytes(framebuffer.pixels[y * width : (y + 1) * width])
+        for y in range(framebuffer.height)
+    )
+    palette = b"".join(bytes(color) for color in framebuffer.colors)
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(
+            _png_chunk(
+                b"IHDR", struct.pack(">IIBBBBB", width, framebuffer.height, 8, 3, 0, 0, 0)
+            )
+        )
+        file.write(_png_chunk(b"PLTE", palette))
+        file.write(_png_chunk(b"IDAT", zlib.compress(rows, 9)))
+        file.write(_png_chunk(b"IEND", b""))
@@ -0,0 +1,270 @@
+"""
+A reset()/step() environment for training programs to play pong.
+
+Each call to step() advances many games at once, like a vectorized Gym
+environment, using BatchGames (so the rules are those of
+Step5_FinishingTouches.py):
+
+    env = VectorEnv(256, seed=0)
+    observations = env.reset()
+    while training:
+        actions = policy(observations)     # shape (256, 2), -1, 0 or 1
+        observations, rewards, dones, info = env.step(actions)
+
+Each row of the observations is OBSERVATION_FIELDS for one game. Actions
+are one row per game with a move for the left and right paddle: -1 for up,
+1 for down and 0 to stay still. Rewards are from the left player's point of
+view: 1 when it wins, -1 when it loses and 0 otherwise. Finished games start
+again on their own during the same step().
+
+ProcessVectorEnv has the same API but splits the games between worker
+processes. The observations, actions, rewards and dones live in shared
+memory, so each step only sends a few bytes through a pipe to every
+worker.
+
+Like batch.py, this needs NumPy.
+"""
+
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .batch import LEFT_PLAYER, NO_WINNER, RIGHT_PLAYER, BatchGames
+
+# What each column of an observation is
+OBSERVATION_FIELDS = ("ball_x", "ball_y", "xspeed", "yspeed", "left_y", "right_y")
+
+
+class VectorEnv:
+    """
+    `count` games stepped together in this process.
+
+    The ball starts each game in the middle going a random speed between
+    `speed_min` and `speed_max` (in pixels per tick) in a random direction.
+    Games that go on for `max_ticks` ticks end without a winner. Other
+    keyword arguments are passed to BatchGames.
+
+    `buffers` can be given as (observations, actions, rewards, dones)
+    arrays to use instead of making new ones; ProcessVectorEnv uses this to
+    put them in shared memory.
+    """
+
+    def __init__(
+        self,
+        count,
+        seed=None,
+        speed_min=150 / 120,
+        speed_max=400 / 120,
+        max_ticks=10_000,
+        buffers=None,
+        **settings,
+    ):
+        self.count = count
+        self.speed_min = speed_min
+        self.speed_max = speed_max
+        self.max_ticks = max_ticks
+        self.rng = np.random.default_rng(seed)
+        self.games = BatchGames(count, 0.0, 0.0, **settings)
+
+        if buffers is None:
+            buffers = (
+                np.zeros((count, len(OBSERVATION_FIELDS))),
+                np.zeros((count, 2), dtype=np.int8),
+                np.zeros(count),
+                np.zeros(count, dtype=bool),
+            )
+        self.observations, self.actions, self.rewards, self.dones = buffers
+
+    def _start(self, which):
+        size = int(np.count_nonzero(which))
+        if not size:
+            return
+        rng = self.rng
+        speeds = rng.uniform(self.speed_min, self.speed_max, (2, size))
+        signs = rng.choice((-1.0, 1.0), (2, size))
+        self.games.reset(which, *(speeds * signs))
+
+    def _observe(self):
+        games = self.games
+        for column, values in enumerate(
+            (games.x, games.y, games.xspeed, games.yspeed, games.left_y, games.right_y)
+        ):
+            self.observations[:, column] = values
+
+    def reset(self):
+        """
+        Starts every game again and returns the observations
+        """
+        self._start(np.ones(self.count, dtype=bool))
+        self._observe()
+        self.rewards[:] = 0
+        self.dones[:] = False
+        return self.observations
+
+    def step(self, actions=None):
+        """
+        Moves the paddles, advances every game by one tick and returns
+        (observations, rewards, dones, info). If `actions` isn't given, the
+        ones already in self.actions are used.
+
+        info has "winner" (batch.LEFT_PLAYER, RIGHT_PLAYER or NO_WINNER) and
+        "ticks" for the games that just finished, before they were started
+        again.
+        """
+        games = self.games
+        if actions is not None:
+            self.actions[:] = actions
+        games.move_paddles(self.actions[:, 0], self.actions[:, 1])
+        games.step()
+
+        winner = games.winner
+        rewards = self.rewards
+        rewards[:] = 0
+        rewards[winner == LEFT_PLAYER] = 1
+        rewards[winner == RIGHT_PLAYER] = -1
+        dones = self.dones
+        np.not_equal(winner, NO_WINNER, out=dones)
+        dones |= games.ticks >= self.max_ticks
+
+        info = {"winner": winner[dones], "ticks": games.ticks[dones]}
+        self._start(dones)
+        self._observe()
+        return self.observations, rewards, dones, info
+
+
+def _shared_array(memory, offset, shape, dtype):
+    return np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+
+
+def _layout(count):
+    """
+    Where each buffer goes in the shared memory, as (offset, shape, dtype),
+    and how big it is altogether
+    """
+    layout = []
+    offset = 0
+    for shape, dtype in (
+        ((count, len(OBSERVATION_FIELDS)), np.float64),
+        ((count, 2), np.int8),
+        ((count,), np.float64),
+        ((count,), np.bool_),
+    ):
+        # Keep every array lined up on 8 bytes
+        offset = (offset + 7) // 8 * 8
+        layout.append((offset, shape, dtype))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout, max(offset, 1)
+
+
+def _worker(connection, memory_name, count, start, stop, seed, settings):
+    memory = shared_memory.SharedMemory(name=memory_name)
+    env = buffers = None
+    try:
+        layout, _ = _layout(count)
+        buffers = [
+            _shared_array(memory, offset, shape, dtype)[start:stop]
+            for offset, shape, dtype in layout
+        ]
+        env = VectorEnv(stop - start, seed=seed, buffers=buffers, **settings)
+        while True:
+            command = connection.recv()
+            if command == "step":
+                _, _, _, info = env.step()
+                connection.send(info)
+            elif command == "reset":
+                env.reset()
+                connection.send(None)
+            else:
+                break
+    finally:
+        # Drop the views before closing, since NumPy still points into it
+        env = buffers = None
+        memory.close()
+        connection.close()
+
+
+class ProcessVectorEnv:
+    """
+    Like VectorEnv, but the games are split between `workers` processes
+    (one per CPU by default). Call close() or use it in a with statement
+    to stop them.
+    """
+
+    def __init__(self, count, workers=None, seed=None, **settings):
+        workers = min(workers or os.cpu_count() or 1, count)
+        self.count = count
+        layout, size = _layout(count)
+        self.memory = shared_memory.SharedMemory(create=True, size=size)
+        (
+            self.observations,
+            self.actions,
+            self.rewards,
+            self.dones,
+        ) = (_shared_array(self.memory, *place) for place in layout)
+
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        bounds = np.linspace(0, count, workers + 1).astype(int)
+        context = multiprocessing.get_context()
+        self.connections = []
+        self.processes = []
+        for i in range(workers):
+            ours, theirs = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(
+                    theirs,
+                    self.memory.name,
+                    count,
+                    bounds[i],
+                    bounds[i + 1],
+                    seeds[i],
+                    settings,
+                ),
+                daemon=True,
+            )
+            process.start()
+            theirs.close()
+            self.connections.append(ours)
+            self.processes.append(process)
+
+    def _send(self, command):
+        for connection in self.connections:
+            connection.send(command)
+        return [connection.recv() for connection in self.connections]
+
+    def reset(self):
+        self._send("reset")
+        return self.observations
+
+    def step(self, actions=None):
+        if actions is not None:
+            self.actions[:] = actions
+        infos = self._send("step")
+        info = {
+            key: np.concatenate([part[key] for part in infos]) for key in infos[0]
+        }
+        return self.observations, self.rewards, self.dones, info
+
+    def close(self):
+        if self.memory is None:
+            return
+        for connection in self.connections:
+            try:
+                connection.send("close")
+            except OSError:
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.observations = self.actions = self.rewards = self.dones = None
+        self.memory.close()
+        self.memory.unlink()
+        self.memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,194 @@
+"""
+Runs a game by jumping straight from one event to the next.
+
+Between bounces the ball moves in a straight line, so instead of moving it
+one tick at a time, EventSimulator works out exactly when it will next hit
+a line (using StraightLine.time_of_impact), when it will reach one of the
+goals, and when a paddle will next move, and skips straight to whichever
+comes first. A whole game then costs one step per bounce or paddle move
+instead of one per tick.
+
+Paddle moves are given up front as (tick, side, direction) tuples, where
+side is "left" or "right". A direction of "up" or "down" moves the paddle
+once, like a single key press. "hold up" and "hold down" start it gliding
+every tick, like holding a key down, until a "release". These are the
+same as the actions in ACTIONS passed to Game.press() between Game.step()
+calls on that tick, so the result matches stepping the game tick by tick.
+While a paddle glides, every tick is an event, so a game where the keys
+are held down a lot doesn't save as much.
+"""
+
+import math
+
+from .physics import (
+    LEFT_DOWN,
+    LEFT_HOLD_DOWN,
+    LEFT_HOLD_UP,
+    LEFT_RELEASE,
+    LEFT_UP,
+    RIGHT_DOWN,
+    RIGHT_HOLD_DOWN,
+    RIGHT_HOLD_UP,
+    RIGHT_RELEASE,
+    RIGHT_UP,
+)
+
+# The Game.press() action for each (side, direction) in the inputs
+ACTIONS = {
+    ("left", "up"): LEFT_UP,
+    ("left", "down"): LEFT_DOWN,
+    ("left", "hold up"): LEFT_HOLD_UP,
+    ("left", "hold down"): LEFT_HOLD_DOWN,
+    ("left", "release"): LEFT_RELEASE,
+    ("right", "up"): RIGHT_UP,
+    ("right", "down"): RIGHT_DOWN,
+    ("right", "hold up"): RIGHT_HOLD_UP,
+    ("right", "hold down"): RIGHT_HOLD_DOWN,
+    ("right", "release"): RIGHT_RELEASE,
+}
+
+
+class EventSimulator:
+    def __init__(self, game, inputs=()):
+        self.game = game
+        self.inputs = sorted(inputs, key=lambda event: event[0])
+        self.next_input = 0
+        # Time in ticks. Unlike game.tick, this can be partway through a tick.
+        self.time = float(game.tick)
+        self.bounces = 0
+        # The paddles that will move the next time they glide, and when
+        # that is. Game.step() glides them at the start of every tick.
+        self.gliding = []
+        self.next_glide = math.inf
+        self._update_gliding()
+
+    def _time_to_goal(self):
+        """
+        How many ticks until the ball touches the left or right wall
+        """
+        game = self.game
+        ball = game.ball
+        if ball.xspeed < 0:
+            return (game.left_wall.start_x - ball.left_x) / ball.xspeed
+        elif ball.xspeed > 0:
+            return (game.right_wall.start_x - ball.right_x) / ball.xspeed
+        return math.inf
+
+    def _first_hit(self, duration):
+        """
+        The first line the ball hits in the next `duration` ticks, as
+        (ticks until the hit, normal x, normal y), or None
+        """
+        ball = self.game.ball
+        dx = ball.xspeed * duration
+        dy = ball.yspeed * duration
+        first_hit = None
+        for line in ball.collide_lines:
+            hit = line.time_of_impact(ball.pos_x, ball.pos_y, dx, dy, ball.radius)
+            if hit is not None and (first_hit is None or hit[0] < first_hit[0]):
+                first_hit = hit
+        if first_hit is None:
+            return None
+        return first_hit[0] * duration, first_hit[1], first_hit[2]
+
+    def _apply_input(self, event):
+        _, side, direction = event
+        self.game.press(ACTIONS[side, direction])
+
+    def _update_gliding(self):
+        """
+        Works out which paddles are gliding after their direction changed
+        """
+        game = self.game
+        self.gliding = [
+            paddle
+            for paddle in (game.left_paddle, game.right_paddle)
+            if paddle.direction
+        ]
+        if not self.gliding:
+            self.next_glide = math.inf
+        elif self.next_glide == math.inf:
+            self.next_glide = float(math.ceil(self.time))
+
+    def _apply_events(self, time, glide=True):
+        """
+        Applies every input up to `time`, then glides the paddles if they
+        glide then, in the same order as between and in Game.step() calls
+        """
+        inputs = self.inputs
+        applied = False
+        while self.next_input < len(inputs) and inputs[self.next_input][0] <= time:
+            self._apply_input(inputs[self.next_input])
+            self.next_input += 1
+            applied = True
+        if applied:
+            self._update_gliding()
+
+        if glide and self.next_glide <= time:
+            still_gliding = []
+            for paddle in self.gliding:
+                pos_y = paddle.pos_y
+                paddle.glide()
+                # One that didn't move is against the top or bottom, and
+                # stays there until its direction changes
+                if paddle.pos_y != pos_y:
+                    still_gliding.append(paddle)
+            self.gliding = still_gliding
+            self.next_glide = time + 1 if still_gliding else math.inf
+
+    def advance(self, max_ticks):
+        """
+        Runs the game for up to `max_ticks` ticks, stopping early if somebody
+        wins, and returns the winner if there is one
+        """
+        game = self.game
+        ball = game.ball
+        inputs = self.inputs
+        end = self.time + max_ticks
+
+        while not game.winner and self.time < end:
+            if self.next_input < len(inputs):
+                input_time = inputs[self.next_input][0]
+            else:
+                input_time = math.inf
+            goal_time = self.time + max(0.0, self._time_to_goal())
+            # Anything gliding at the end glides at the start of the next
+            # advance(), like at the start of the next Game.step()
+            glide_time = self.next_glide if self.next_glide < end else math.inf
+            target = min(input_time, glide_time, goal_time, end)
+            duration = target - self.time
+
+            if duration > 0:
+                hit = self._first_hit(duration)
+                if hit is not None:
+                    hit_time, normal_x, normal_y = hit
+                    ball.place(
+                        ball.pos_x + ball.xspeed * hit_time,
+                        ball.pos_y + ball.yspeed * hit_time,
+                    )
+                    ball.reflect(normal_x, normal_y)
+                    self.time += hit_time
+                    self.bounces += 1
+                    continue
+                ball.place(
+                    ball.pos_x + ball.xspeed * duration,
+                    ball.pos_y + ball.yspeed * duration,
+                )
+            self.time = target
+
+            if target == goal_time:
+                game.winner = "Right player" if ball.xspeed < 0 else "Left player"
+                # Game.step() only notices at the start of the next tick,
+                # after that tick's inputs and glides
+                self._apply_events(math.ceil(self.time))
+            elif target == input_time or target == glide_time:
+                self._apply_events(target, glide=target < end)
+
+        game.tick = math.ceil(self.time) if game.winner else int(self.time)
+        return game.winner
+
+    def run(self, max_ticks=10 ** 9):
+        """
+        Runs the game until somebody wins and returns the winner
+        """
+        return self.advance(max_ticks)
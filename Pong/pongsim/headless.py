@@ -0,0 +1,52 @@
+"""
+Plays games between two computer players as fast as possible, without a
+window, using the same settings as the game in a window.
+
+    pong headless --games 100 --difficulty medium
+"""
+
+import argparse
+import random
+import time
+
+from .ai import DIFFICULTIES, InterceptAI, play
+from .physics import Game
+from .settings import TICKS_PER_SECOND, game_settings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="pong headless", description="Let the computer play itself"
+    )
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--difficulty", choices=DIFFICULTIES, default="easy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-ticks", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    settings = game_settings()
+    wins = {}
+    ticks = 0
+    start = time.perf_counter()
+    for number in range(args.games):
+        rng = random.Random(args.seed + number)
+        game = Game(rng=rng, **settings)
+        players = [
+            InterceptAI(game, paddle, rng=rng, **DIFFICULTIES[args.difficulty])
+            for paddle in (game.left_paddle, game.right_paddle)
+        ]
+        winner = play(game, players, args.max_ticks) or "Nobody"
+        wins[winner] = wins.get(winner, 0) + 1
+        ticks += game.tick
+    elapsed = time.perf_counter() - start
+
+    for winner, count in sorted(wins.items()):
+        print(f"{winner}: {count}")
+    print(
+        f"{ticks} ticks ({ticks / TICKS_PER_SECOND:.0f} s of play) in "
+        f"{elapsed:.2f} s, {ticks / max(elapsed, 1e-9):,.0f} ticks/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
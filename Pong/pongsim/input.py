@@ -0,0 +1,173 @@
+"""
+Keyboard input that moves the paddles smoothly while keys are held down.
+
+Binding a key to "move the paddle a bit" relies on the keyboard's auto
+repeat: the paddle jumps once, waits for the repeat delay (often half a
+second), then jumps at the repeat rate, which is different on every
+computer. Instead, HeldKeys keeps a table of which keys are down, and
+before each tick tells the game which way each paddle is going. The game
+then moves the paddles by the same amount every tick, however the keyboard
+is set up.
+
+LatencyProbe measures how long it takes from pressing a key to the paddle
+moving on the screen.
+"""
+
+import time
+
+from .physics import (
+    LEFT_HOLD_DOWN,
+    LEFT_HOLD_UP,
+    LEFT_RELEASE,
+    RIGHT_HOLD_DOWN,
+    RIGHT_HOLD_UP,
+    RIGHT_RELEASE,
+)
+
+# Which paddle each key moves, and which way
+DEFAULT_KEYS = {
+    "w": ("left", -1),
+    "s": ("left", 1),
+    "Up": ("right", -1),
+    "Down": ("right", 1),
+}
+
+# The action to send for each paddle and direction
+ACTIONS = {
+    "left": {-1: LEFT_HOLD_UP, 1: LEFT_HOLD_DOWN, 0: LEFT_RELEASE},
+    "right": {-1: RIGHT_HOLD_UP, 1: RIGHT_HOLD_DOWN, 0: RIGHT_RELEASE},
+}
+
+
+class HeldKeys:
+    """
+    Keeps track of which of `keys` are held down in `root`. Call sync()
+    before each tick to pass any changes on to `press` (a Game's or a
+    Recorder's press()).
+
+    On X11, auto repeat sends a release straight followed by a press while a
+    key is held down. So that this doesn't look like the key going up, a
+    release only counts if no press for the same key comes in before
+    tkinter next goes idle.
+    """
+
+    def __init__(self, root, press, keys=DEFAULT_KEYS, on_press=None):
+        self.root = root
+        self.press = press
+        self.keys = keys
+        # Called with the paddle's side whenever a key really goes down
+        self.on_press = on_press
+        self.held = set()
+        self.pending_releases = {}
+        self.sent = {side: 0 for side, _ in keys.values()}
+        self.enabled = True
+
+        self.bind_ids = [
+            root.bind("<KeyPress>", self._key_down, add="+"),
+            root.bind("<KeyRelease>", self._key_up, add="+"),
+        ]
+
+    def _key_down(self, evt):
+        keysym = evt.keysym
+        if keysym not in self.keys:
+            return
+        after_id = self.pending_releases.pop(keysym, None)
+        if after_id is not None:
+            # Auto repeat, so the key never really went up
+            self.root.after_cancel(after_id)
+            return
+        if keysym not in self.held:
+            self.held.add(keysym)
+            if self.on_press:
+                self.on_press(self.keys[keysym][0])
+
+    def _key_up(self, evt):
+        keysym = evt.keysym
+        if keysym in self.held and keysym not in self.pending_releases:
+            self.pending_releases[keysym] = self.root.after_idle(
+                self._release, keysym
+            )
+
+    def _release(self, keysym):
+        del self.pending_releases[keysym]
+        self.held.discard(keysym)
+
+    def directions(self):
+        """
+        Which way each paddle should go: -1 for up, 1 for down, and 0 if
+        no keys or both keys are held
+        """
+        directions = dict.fromkeys(self.sent, 0)
+        for keysym in self.held:
+            side, direction = self.keys[keysym]
+            directions[side] += direction
+        # Two keys for the same direction still only move it one way
+        return {side: max(-1, min(1, total)) for side, total in directions.items()}
+
+    def sync(self):
+        """
+        Sends an action for each paddle whose direction has changed
+        """
+        if not self.enabled:
+            return
+        for side, direction in self.directions().items():
+            if direction != self.sent[side]:
+                self.press(ACTIONS[side][direction])
+                self.sent[side] = direction
+
+    def disable(self):
+        """
+        Stops the paddles and ignores the keys from now on
+        """
+        for side in self.sent:
+            if self.sent[side]:
+                self.press(ACTIONS[side][0])
+                self.sent[side] = 0
+        self.enabled = False
+        for after_id in self.pending_releases.values():
+            self.root.after_cancel(after_id)
+        self.pending_releases.clear()
+        self.held.clear()
+
+
+class LatencyProbe:
+    """
+    Wraps a renderer and records, in `timer`'s "input" histogram, how long
+    it took from a key press to the paddle being drawn somewhere else. Pass
+    its press() to HeldKeys as on_press.
+
+    The time stops when the new coordinates are handed to tkinter, so it
+    covers waiting for the next tick and frame but not tkinter's redraw.
+    """
+
+    def __init__(self, renderer, timer, clock=time.perf_counter, timeout=1.0):
+        self.renderer = renderer
+        self.timer = timer
+        self.clock = clock
+        # Presses that don't move the paddle (because it's at the edge) are
+        # forgotten after this many seconds
+        self.timeout = timeout
+        self.pressed_at = {}
+        self.drawn = {}
+
+    def press(self, side):
+        self.pressed_at.setdefault(side, self.clock())
+
+    def draw(self, positions=None):
+        self.renderer.draw(positions)
+        if positions is None:
+            positions = self.renderer.game.positions()
+
+        now = self.clock()
+        for side, pos_y in (("left", positions[2]), ("right", positions[3])):
+            pixel = round(pos_y)
+            moved = self.drawn.get(side, pixel) != pixel
+            self.drawn[side] = pixel
+            pressed_at = self.pressed_at.get(side)
+            if pressed_at is None:
+                continue
+            if moved:
+                self.timer.record("input", now - pressed_at)
+                del self.pressed_at[side]
+            elif now - pressed_at > self.timeout:
+                del self.pressed_at[side]
@@ -0,0 +1,395 @@
+"""
+Levels: obstacles at any angle for the ball to bounce off.
+
+A level file is JSON with a list of line segments and a list of polygons,
+in pixels:
+
+    {
+        "segments": [[x1, y1, x2, y2], ...],
+        "polygons": [[[x, y], [x, y], [x, y], ...], ...]
+    }
+
+Each polygon is turned into the segments around its edge. Every segment
+works out its unit normal once, when the level is loaded, and the ball
+bounces off either side of it with Ball.reflect().
+
+Checking every segment every tick would be far too slow for a level with
+thousands of them, so they're kept in a bounding volume hierarchy: a tree
+of boxes, where each box holds everything in the boxes under it. Only the
+branches whose boxes overlap where the ball is going are looked at, which
+takes about log(n) steps.
+
+    python -m pongsim.level Pong/levels/diamonds.json
+    python -m pongsim.level --random 5000 --headless
+"""
+
+import argparse
+import json
+import math
+import random
+import time
+
+from .physics import Game, circle_time_of_impact
+
+
+class Segment:
+    """
+    A straight line between two points, at any angle. It has the same
+    time_of_impact() as a physics.StraightLine, so a Ball can bounce off it.
+    """
+
+    def __init__(self, start_x, start_y, end_x, end_y, name=""):
+        self.start_x = start_x
+        self.start_y = start_y
+        self.end_x = end_x
+        self.end_y = end_y
+        self.name = name
+
+        self.length = math.hypot(end_x - start_x, end_y - start_y)
+        if self.length == 0:
+            raise ValueError("a segment needs two different points")
+        # Unit vectors along the segment and square to it
+        self.along_x = (end_x - start_x) / self.length
+        self.along_y = (end_y - start_y) / self.length
+        self.normal_x = -self.along_y
+        self.normal_y = self.along_x
+
+        self.min_x = min(start_x, end_x)
+        self.min_y = min(start_y, end_y)
+        self.max_x = max(start_x, end_x)
+        self.max_y = max(start_y, end_y)
+
+    def time_of_impact(self, pos_x, pos_y, dx, dy, radius):
+        """
+        How far along the movement (dx, dy), from 0 to 1, a ball at
+        (pos_x, pos_y) first touches this segment, as (t, normal x,
+        normal y), or None if it doesn't
+        """
+        normal_x = self.normal_x
+        normal_y = self.normal_y
+        across = (pos_x - self.start_x) * normal_x + (pos_y - self.start_y) * normal_y
+        d_across = dx * normal_x + dy * normal_y
+        if across < 0:
+            # Coming at it from the other side
+            across = -across
+            d_across = -d_across
+            normal_x = -normal_x
+            normal_y = -normal_y
+
+        if d_across < 0:
+            t = (across - radius) / -d_across
+            if t <= 1:
+                if t < 0:
+                    # Already touching it
+                    t = 0.0
+                along = (pos_x + dx * t - self.start_x) * self.along_x + (
+                    pos_y + dy * t - self.start_y
+                ) * self.along_y
+                if 0 <= along <= self.length:
+                    return t, normal_x, normal_y
+
+        # It might hit one of the ends instead
+        start_hit = circle_time_of_impact(
+            pos_x, pos_y, dx, dy, radius, self.start_x, self.start_y
+        )
+        end_hit = circle_time_of_impact(
+            pos_x, pos_y, dx, dy, radius, self.end_x, self.end_y
+        )
+        if start_hit is None or end_hit is not None and end_hit[0] < start_hit[0]:
+            return end_hit
+        return start_hit
+
+
+def polygon_segments(points, name=""):
+    """
+    The segments around the edge of a polygon with the given corners
+    """
+    return [
+        Segment(*start, *end, name=name)
+        for start, end in zip(points, points[1:] + points[:1])
+    ]
+
+
+class BVH:
+    """
+    A bounding volume hierarchy over segments that never move.
+
+    The tree is stored in flat lists instead of node objects: node n's box
+    is boxes[n * 4 : n * 4 + 4] (min x, min y, max x, max y). A leaf has the
+    segments segments[first[n] : last[n]], and a branch has last[n] == -1
+    and its children at first[n] and n + 1.
+    """
+
+    def __init__(self, segments, leaf_size=4):
+        self.leaf_size = leaf_size
+        self.segments = []
+        self.boxes = []
+        self.first = []
+        self.last = []
+        if segments:
+            self._build(list(segments))
+
+    def _build(self, segments):
+        node = len(self.first)
+        self.boxes += [
+            min(segment.min_x for segment in segments),
+            min(segment.min_y for segment in segments),
+            max(segment.max_x for segment in segments),
+            max(segment.max_y for segment in segments),
+        ]
+        self.first.append(0)
+        self.last.append(0)
+
+        if len(segments) <= self.leaf_size:
+            self.first[node] = len(self.segments)
+            self.segments += segments
+            self.last[node] = len(self.segments)
+            return node
+
+        # Split the middles of the segments in half along the longer side
+        min_x, min_y, max_x, max_y = self.boxes[node * 4 : node * 4 + 4]
+        if max_x - min_x >= max_y - min_y:
+            segments.sort(key=lambda segment: segment.min_x + segment.max_x)
+        else:
+            segments.sort(key=lambda segment: segment.min_y + segment.max_y)
+        half = len(segments) // 2
+        self._build(segments[:half])
+        self.first[node] = self._build(segments[half:])
+        self.last[node] = -1
+        return node
+
+    def query(self, min_x, min_y, max_x, max_y):
+        """
+        Returns every segment whose box overlaps the given box
+        """
+        found = []
+        if not self.segments:
+            return found
+        boxes = self.boxes
+        first = self.first
+        last = self.last
+        segments = self.segments
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            offset = node * 4
+            if (
+                boxes[offset] > max_x
+                or boxes[offset + 1] > max_y
+                or boxes[offset + 2] < min_x
+                or boxes[offset + 3] < min_y
+            ):
+                continue
+            end = last[node]
+            if end < 0:
+                stack.append(first[node])
+                stack.append(node + 1)
+                continue
+            for segment in segments[first[node] : end]:
+                if (
+                    segment.min_x <= max_x
+                    and segment.min_y <= max_y
+                    and segment.max_x >= min_x
+                    and segment.max_y >= min_y
+                ):
+                    found.append(segment)
+        return found
+
+    def near(self, pos_x, pos_y, dx, dy, radius):
+        """
+        The segments a ball at (pos_x, pos_y) with `radius` might touch
+        while moving by (dx, dy)
+        """
+        return self.query(
+            min(pos_x, pos_x + dx) - radius,
+            min(pos_y, pos_y + dy) - radius,
+            max(pos_x, pos_x + dx) + radius,
+            max(pos_y, pos_y + dy) + radius,
+        )
+
+
+class LevelError(ValueError):
+    """
+    Raised when a level file can't be read
+    """
+
+
+class Level:
+    """
+    The obstacles in a level, and a BVH of them
+    """
+
+    def __init__(self, segments):
+        self.segments = list(segments)
+        self.bvh = BVH(self.segments)
+
+    @classmethod
+    def from_dict(cls, data):
+        try:
+            segments = [
+                Segment(*coords, name=f"segment {number}")
+                for number, coords in enumerate(data.get("segments", []))
+            ]
+            for number, points in enumerate(data.get("polygons", [])):
+                segments += polygon_segments(
+                    [tuple(point) for point in points], name=f"polygon {number}"
+                )
+        except (TypeError, ValueError) as error:
+            raise LevelError(f"bad obstacle: {error}") from None
+        return cls(segments)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            try:
+                data = json.load(file)
+            except json.JSONDecodeError as error:
+                raise LevelError(f"not a level file: {error}") from None
+        return cls.from_dict(data)
+
+    def add_to(self, game):
+        """
+        Makes the ball (or every ball, in a MultiBallGame) bounce off the
+        obstacles. The game has to be swept.
+        """
+        for ball in getattr(game, "balls", [game.ball]):
+            if not ball.swept:
+                raise ValueError("obstacles only work with swept balls")
+            ball.obstacles = self.bvh
+
+    def draw(self, canvas, color="white"):
+        """
+        Draws the obstacles onto a canvas. They never move, so this only
+        needs doing once.
+        """
+        for segment in self.segments:
+            canvas.create_line(
+                segment.start_x,
+                segment.start_y,
+                segment.end_x,
+                segment.end_y,
+                fill=color,
+                width=2,
+            )
+
+
+def random_level(count, width=700, height=650, length=20, rng=random):
+    """
+    A level with `count` short segments at random angles, spread over the
+    middle of the screen, for timing
+    """
+    segments = []
+    for _ in range(count):
+        x = rng.uniform(width * 0.15, width * 0.85)
+        y = rng.uniform(0, height)
+        angle = rng.uniform(0, math.pi)
+        segments.append(
+            Segment(x, y, x + math.cos(angle) * length, y + math.sin(angle) * length)
+        )
+    return Level(segments)
+
+
+def play_in_window(game, level, tick_rate=120):
+    """
+    Plays `game` on `level` in a window, with w/s and the arrow keys moving
+    the paddles
+    """
+    import tkinter as tk
+
+    from .input import HeldKeys
+    from .loop import FixedStepLoop
+    from .render import TkRenderer
+
+    root = tk.Tk()
+    root.title("Pong")
+    canvas = tk.Canvas(root, width=game.width, height=game.height, bd=0, bg="black")
+    canvas.pack()
+    level.draw(canvas)
+    held_keys = HeldKeys(root, game.press)
+
+    def finished(winner):
+        held_keys.disable()
+        canvas.create_text(
+            game.width / 2,
+            game.height / 2,
+            text=f"{winner} has won!",
+            fill="white",
+            font=("Courier", 30),
+        )
+
+    loop = FixedStepLoop(
+        root,
+        game,
+        TkRenderer(canvas, game),
+        tick_rate=tick_rate,
+        on_finish=finished,
+        before_step=held_keys.sync,
+    )
+    loop.start()
+    tk.mainloop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play pong on a level with obstacles")
+    parser.add_argument("path", nargs="?", help="the level file")
+    parser.add_argument(
+        "--random", type=int, metavar="COUNT", help="use COUNT random segments instead"
+    )
+    parser.add_argument("--tick-rate", type=float, default=120)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="time the ball with and without the BVH instead of playing",
+    )
+    parser.add_argument("--ticks", type=int, default=2000, help="ticks to time")
+    args = parser.parse_args(argv)
+    if args.random is None and args.path is None:
+        parser.error("give a level file or --random")
+
+    rng = random.Random(args.seed)
+    level = random_level(args.random, rng=rng) if args.random else Level.load(args.path)
+
+    tick_rate = args.tick_rate
+    seed = rng.getrandbits(64)
+
+    def new_game():
+        return Game(
+            ball_radius=10,
+            # Paddles as tall as the screen when timing, so the ball stays
+            # in play
+            paddle_height=2000 if args.headless else 200,
+            paddle_speed=600 / tick_rate,
+            speed_min=150 / tick_rate,
+            speed_max=400 / tick_rate,
+            rng=random.Random(seed),
+        )
+
+    game = new_game()
+    level.add_to(game)
+    if not args.headless:
+        play_in_window(game, level, tick_rate)
+        return
+
+    start = time.perf_counter()
+    game.run(args.ticks)
+    with_bvh = time.perf_counter() - start
+
+    # The same game again, checking every segment every time
+    linear = new_game()
+    linear.ball.collide_lines = linear.ball.collide_lines + level.segments
+    start = time.perf_counter()
+    linear.run(args.ticks)
+    without = time.perf_counter() - start
+
+    same = "the same" if linear.positions() == game.positions() else "DIFFERENT"
+    print(
+        f"{len(level.segments)} segments, {game.tick} ticks: "
+        f"{with_bvh / game.tick * 1e6:.1f} us a tick with the BVH, "
+        f"{without / linear.tick * 1e6:.1f} us checking every segment "
+        f"(both ended up {same})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Runs a game at a fixed number of ticks per second using root.after.
+
+Instead of stepping the game as fast as the computer can go, the loop wakes
+up about once per frame, works out how much real time has passed, and steps
+the physics by however many fixed ticks fit into that time. Whatever is
+left over is used to draw things partway between the last two ticks, so the
+motion looks smooth even when the frame rate and tick rate don't line up.
+"""
+
+import time
+
+
+def lerp_positions(before, after, alpha):
+    """
+    Returns the positions a fraction `alpha` of the way from `before` to `after`
+    """
+    return tuple(a + (b - a) * alpha for a, b in zip(before, after))
+
+
+class FixedStepLoop:
+    """
+    Steps `game` at `tick_rate` ticks per second and draws it with `renderer`.
+
+    `game` needs step() (returning the winner once there is one) and
+    positions(); `renderer` needs draw(positions).
+
+    If `timer` (a metrics.FrameTimer) is given, every frame records how long
+    the physics, drawing, tkinter's redraw and the whole frame took.
+
+    If `before_step` is given, it's called before every tick, so input can
+    be passed to the game at tick boundaries.
+    """
+
+    def __init__(
+        self,
+        root,
+        game,
+        renderer,
+        tick_rate=240,
+        frame_rate=60,
+        max_steps=8,
+        on_finish=None,
+        clock=time.perf_counter,
+        timer=None,
+        before_step=None,
+    ):
+        self.root = root
+        self.game = game
+        self.renderer = renderer
+        self.tick_length = 1 / tick_rate
+        self.frame_ms = max(1, round(1000 / frame_rate))
+        # The most ticks to run in one frame when catching up. Past this,
+        # the game slows down instead of freezing while it tries to catch up.
+        self.max_steps = max_steps
+        self.on_finish = on_finish
+        self.clock = clock
+        self.timer = timer
+        self.before_step = before_step
+
+        self.accumulator = 0.0
+        self.last_time = None
+        self.previous = game.positions()
+        self.after_id = None
+        # When (by `clock`) the first frame was drawn
+        self.first_frame_time = None
+
+    def start(self):
+        self.last_time = self.clock()
+        self.accumulator = 0.0
+        self.previous = self.game.positions()
+        self.after_id = self.root.after(self.frame_ms, self._frame)
+
+    def stop(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def advance(self, elapsed):
+        """
+        Runs as many ticks as fit into `elapsed` seconds (plus whatever was
+        left over last time) and returns how far into the next tick we are,
+        from 0 to 1
+        """
+        game = self.game
+        tick_length = self.tick_length
+        before_step = self.before_step
+        self.accumulator += elapsed
+
+        steps = 0
+        while self.accumulator >= tick_length and steps < self.max_steps:
+            self.previous = game.positions()
+            if before_step:
+                before_step()
+            game.step()
+            self.accumulator -= tick_length
+            steps += 1
+            if game.winner:
+                self.accumulator = 0.0
+                break
+
+        if self.accumulator >= tick_length:
+            # Too far behind to catch up, so drop the extra time
+            self.accumulator = tick_length * 0.999
+
+        return self.accumulator / tick_length
+
+    def _frame(self):
+        if self.frame():
+            self.after_id = self.root.after(self.frame_ms, self._frame)
+        else:
+            self.after_id = None
+
+    def frame(self):
+        """
+        Steps the game for the time since the last frame and draws it.
+        Returns False once the game is over.
+        """
+        now = self.clock()
+        alpha = self.advance(now - self.last_time)
+        self.last_time = now
+
+        timer = self.timer
+        if timer:
+            physics_done = self.clock()
+
+        self.renderer.draw(
+            lerp_positions(self.previous, self.game.positions(), alpha)
+        )
+
+        if self.first_frame_time is None:
+            self.first_frame_time = self.clock()
+
+        if timer:
+            draw_done = self.clock()
+            # Get tkinter to redraw now, so its time can be measured
+            self.root.update_idletasks()
+            tk_done = self.clock()
+            timer.record("physics", physics_done - now)
+            timer.record("draw", draw_done - physics_done)
+            timer.record("tk", tk_done - draw_done)
+            timer.record("frame", tk_done - now)
+
+        if self.game.winner:
+            if self.on_finish:
+                self.on_finish(self.game.winner)
+            return False
+        return True
@@ -0,0 +1,100 @@
+"""
+Keeps track of how long each part of a frame takes.
+
+Times are put into histograms with a fixed number of buckets, so they use
+the same amount of memory however long the game runs, and recording a time
+only costs a logarithm and an addition. That makes it cheap enough to leave
+on all the time.
+"""
+
+import math
+
+
+class Histogram:
+    """
+    Counts how many values fall into each of a fixed set of buckets.
+    The buckets get wider as the values get bigger, so every bucket is
+    about the same percentage wide.
+    """
+
+    def __init__(self, min_value=1e-6, max_value=10.0, buckets_per_decade=40):
+        self.min_value = min_value
+        self.scale = buckets_per_decade / math.log(10)
+        self.size = math.ceil(math.log(max_value / min_value) * self.scale) + 1
+        self.counts = [0] * self.size
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        if value > self.min_value:
+            index = min(
+                int(math.log(value / self.min_value) * self.scale), self.size - 1
+            )
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def _bucket_top(self, index):
+        return self.min_value * math.exp((index + 1) / self.scale)
+
+    def percentile(self, percent):
+        """
+        Roughly the value that `percent` percent of the values are below.
+        It's never off by more than the width of one bucket.
+        """
+        if not self.count:
+            return 0.0
+        wanted = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                return min(self._bucket_top(index), self.max)
+        return self.max
+
+    def clear(self):
+        self.counts = [0] * self.size
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class FrameTimer:
+    """
+    A histogram of times (in seconds) for each named part of a frame
+    """
+
+    def __init__(self, *names):
+        self.histograms = {name: Histogram() for name in names}
+
+    def record(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.record(seconds)
+
+    def clear(self):
+        for histogram in self.histograms.values():
+            histogram.clear()
+
+    def report(self):
+        """
+        Returns a table of p50/p95/p99/max times in milliseconds
+        """
+        lines = [
+            f"{'':<10}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"
+        ]
+        for name, histogram in self.histograms.items():
+            lines.append(
+                f"{name:<10}{histogram.count:>8}"
+                + "".join(
+                    f"{histogram.percentile(p) * 1000:>9.3f}" for p in (50, 95, 99)
+                )
+                + f"{histogram.max * 1000:>9.3f}"
+            )
+        return "\n".join(lines)
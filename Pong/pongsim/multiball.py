@@ -0,0 +1,344 @@
+"""
+Pong with lots of balls at once, which bounce off each other as well as
+the walls and paddles.
+
+Each ball moves and bounces off the walls and paddles exactly like the
+ball in a Game. Then any two balls that touch bounce off each other
+elastically, as if they were discs of the same material, so a big ball
+knocks a small one further than the other way round. That uses the same
+reflection as a ball bouncing off a wall (Ball.reflect(), which does what
+Ball.bounce() in pong-vectors.py does with Vector.reflect()): seen from
+the pair's center of mass, each ball just reflects off the line between
+their centers.
+
+Checking every pair of balls would take n * (n - 1) / 2 checks every
+tick. Instead, the balls are kept sorted by their left edge ("sweep and
+prune"). Only balls that start before another ball's right edge can touch
+it, so each ball is only checked against the few after it that overlap
+along x. The list is re-sorted with an insertion sort, which is very
+quick because balls hardly change order from one tick to the next.
+
+A ball that reaches the left or right wall scores a point for the other
+side and leaves the game. Once every ball has gone, whoever scored more
+wins. If they scored the same, the winner is "Nobody", like a replay that
+stopped before anybody won.
+
+    python -m pongsim.multiball --balls 300
+    python -m pongsim.multiball --balls 300 --headless --ticks 1200
+"""
+
+import argparse
+import math
+import random
+import time
+
+from .physics import Ball, Game
+from .render import TkRenderer
+
+
+class MultiBallGame(Game):
+    """
+    A Game with `balls` balls. `ball` is the first one, and the rest start
+    at random places in the middle half of the screen with random speeds.
+    `ball_radius` can also be a (smallest, largest) pair, to give each ball
+    a random size.
+
+    positions() is (first ball x, first ball y, left paddle y, right paddle
+    y, then x and y for each other ball), so renderers and loops made for a
+    Game still work. A ball that has scored stays where it left.
+    """
+
+    def __init__(self, balls=2, ball_radius=12, rng=random, swept=True, **settings):
+        if isinstance(ball_radius, tuple):
+            smallest, largest = ball_radius
+        else:
+            smallest = largest = ball_radius
+        super().__init__(ball_radius=largest, rng=rng, swept=swept, **settings)
+        speed_min = settings.get("speed_min", 0.02)
+        speed_max = settings.get("speed_max", 0.09)
+
+        self.balls = [self.ball]
+        self.ball.radius = rng.uniform(smallest, largest)
+        self.ball.place(self.ball.pos_x, self.ball.pos_y)
+        for _ in range(1, balls):
+            self.balls.append(
+                Ball(
+                    pos_x=rng.uniform(self.width / 4, self.width * 3 / 4),
+                    pos_y=rng.uniform(largest, self.height - largest),
+                    xspeed=rng.uniform(speed_min, speed_max) * rng.choice((-1, 1)),
+                    yspeed=rng.uniform(speed_min, speed_max) * rng.choice((-1, 1)),
+                    radius=rng.uniform(smallest, largest),
+                    collide_lines=self.ball.collide_lines,
+                    swept=swept,
+                )
+            )
+        # The balls still in play, sorted by their left edge
+        self.in_play = sorted(self.balls, key=lambda ball: ball.left_x)
+        self.scores = {"Left player": 0, "Right player": 0}
+        # How many pairs were checked exactly, for comparing with every pair
+        self.pair_checks = 0
+        self.ball_bounces = 0
+
+    def step(self):
+        """
+        Advances the game by one tick and returns the winner, if there is one
+        """
+        if self.winner:
+            return self.winner
+
+        for paddle in (self.left_paddle, self.right_paddle):
+            if paddle.direction:
+                paddle.glide()
+
+        left_x = self.left_wall.start_x
+        right_x = self.right_wall.start_x
+        in_play = self.in_play
+        scored = False
+        for ball in in_play:
+            if ball.left_x < left_x:
+                self.scores["Right player"] += 1
+                scored = True
+            elif ball.right_x > right_x:
+                self.scores["Left player"] += 1
+                scored = True
+            else:
+                ball.update()
+        if scored:
+            in_play[:] = [
+                ball
+                for ball in in_play
+                if ball.left_x >= left_x and ball.right_x <= right_x
+            ]
+            if not in_play:
+                left = self.scores["Left player"]
+                right = self.scores["Right player"]
+                if left > right:
+                    self.winner = "Left player"
+                elif right > left:
+                    self.winner = "Right player"
+                else:
+                    self.winner = "Nobody"
+                return self.winner
+
+        self._sort()
+        self._collide_balls()
+        self.tick += 1
+        return self.winner
+
+    def _sort(self):
+        """
+        Insertion sorts the balls in play by their left edge
+        """
+        in_play = self.in_play
+        for index in range(1, len(in_play)):
+            ball = in_play[index]
+            left_x = ball.left_x
+            before = index - 1
+            while before >= 0 and in_play[before].left_x > left_x:
+                in_play[before + 1] = in_play[before]
+                before -= 1
+            in_play[before + 1] = ball
+
+    def _collide_balls(self):
+        in_play = self.in_play
+        count = len(in_play)
+        checks = 0
+        for index in range(count):
+            ball = in_play[index]
+            right_x = ball.right_x
+            top_y = ball.top_y
+            bottom_y = ball.bottom_y
+            other_index = index + 1
+            # Everything after this starts further right, so the first one
+            # that starts past this ball's right edge ends the search
+            while other_index < count and in_play[other_index].left_x <= right_x:
+                other = in_play[other_index]
+                other_index += 1
+                if other.top_y <= bottom_y and top_y <= other.bottom_y:
+                    checks += 1
+                    self._bounce_balls(ball, other)
+        self.pair_checks += checks
+
+    def _bounce_balls(self, first, second):
+        """
+        Bounces two balls off each other if they're touching and moving
+        towards each other
+        """
+        dx = second.pos_x - first.pos_x
+        dy = second.pos_y - first.pos_y
+        touching = first.radius + second.radius
+        distance_squared = dx * dx + dy * dy
+        if distance_squared >= touching * touching or distance_squared == 0:
+            return
+        distance = math.sqrt(distance_squared)
+        normal_x = dx / distance
+        normal_y = dy / distance
+        closing = (
+            (second.xspeed - first.xspeed) * normal_x
+            + (second.yspeed - first.yspeed) * normal_y
+        )
+        if closing >= 0:
+            # Already moving apart
+            return
+
+        # Heavier balls are bigger, like discs cut from the same sheet
+        first_mass = first.radius * first.radius
+        second_mass = second.radius * second.radius
+        total = first_mass + second_mass
+        center_xspeed = (first.xspeed * first_mass + second.xspeed * second_mass) / total
+        center_yspeed = (first.yspeed * first_mass + second.yspeed * second_mass) / total
+        for ball in (first, second):
+            ball.xspeed -= center_xspeed
+            ball.yspeed -= center_yspeed
+            ball.reflect(normal_x, normal_y)
+            ball.xspeed += center_xspeed
+            ball.yspeed += center_yspeed
+        self.ball_bounces += 1
+
+    def positions(self):
+        positions = [
+            self.ball.pos_x,
+            self.ball.pos_y,
+            self.left_paddle.pos_y,
+            self.right_paddle.pos_y,
+        ]
+        for ball in self.balls[1:]:
+            positions.append(ball.pos_x)
+            positions.append(ball.pos_y)
+        return tuple(positions)
+
+
+class MultiBallRenderer(TkRenderer):
+    """
+    Draws every ball in a MultiBallGame, and hides the ones that have
+    scored
+    """
+
+    def __init__(self, canvas, game, ball_color="yellow", **colors):
+        super().__init__(canvas, game, ball_color=ball_color, **colors)
+        self.ball_items = [(self.ball_id, game.ball)]
+        for ball in game.balls[1:]:
+            coords = self._coords(ball, ball.pos_x, ball.pos_y)
+            item = canvas.create_oval(*coords, fill=ball_color)
+            self.drawn[item] = coords
+            self.ball_items.append((item, ball))
+
+    def _coords(self, ball, pos_x, pos_y):
+        x = round(pos_x)
+        y = round(pos_y)
+        radius = round(ball.radius)
+        return (x - radius, y - radius, x + radius, y + radius)
+
+    def draw(self, positions=None):
+        game = self.game
+        if positions is None:
+            positions = game.positions()
+        ball_positions = (positions[0], positions[1]) + tuple(positions[4:])
+
+        in_play = set(map(id, game.in_play))
+        for number, (item, ball) in enumerate(self.ball_items):
+            if id(ball) in in_play:
+                pos_x = ball_positions[number * 2]
+                pos_y = ball_positions[number * 2 + 1]
+                self.set_coords(item, self._coords(ball, pos_x, pos_y))
+            else:
+                self.set_coords(item, (-1, -1, -1, -1))
+        self.set_coords(
+            self.paddle_ids[0], self._paddle_coords(game.left_paddle, positions[2])
+        )
+        self.set_coords(
+            self.paddle_ids[1], self._paddle_coords(game.right_paddle, positions[3])
+        )
+        self.flush()
+
+
+def play_in_window(game, tick_rate=60):
+    """
+    Plays `game` in a window, with w/s and the arrow keys moving the
+    paddles
+    """
+    import tkinter as tk
+
+    from .input import HeldKeys
+    from .loop import FixedStepLoop
+
+    root = tk.Tk()
+    root.title(f"Pong with {len(game.balls)} balls")
+    canvas = tk.Canvas(root, width=game.width, height=game.height, bd=0, bg="black")
+    canvas.pack()
+    held_keys = HeldKeys(root, game.press)
+
+    def finished(winner):
+        held_keys.disable()
+        left = game.scores["Left player"]
+        right = game.scores["Right player"]
+        if left == right:
+            text = f"It's a draw, {left} each!"
+        else:
+            text = f"{winner} has won {max(left, right)} to {min(left, right)}!"
+        canvas.create_text(
+            game.width / 2,
+            game.height / 2,
+            text=text,
+            fill="white",
+            font=("Courier", 24),
+        )
+
+    loop = FixedStepLoop(
+        root,
+        game,
+        MultiBallRenderer(canvas, game),
+        tick_rate=tick_rate,
+        on_finish=finished,
+        before_step=held_keys.sync,
+    )
+    loop.start()
+    tk.mainloop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play pong with lots of balls")
+    parser.add_argument("--balls", type=int, default=100)
+    parser.add_argument("--tick-rate", type=float, default=60)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="time the physics without a window instead of playing",
+    )
+    parser.add_argument("--ticks", type=int, default=600, help="ticks to time")
+    args = parser.parse_args(argv)
+
+    tick_rate = args.tick_rate
+    game = MultiBallGame(
+        balls=args.balls,
+        ball_radius=(6, 16),
+        # Paddles as tall as the screen, so the balls stay in play
+        paddle_height=2000 if args.headless else 200,
+        paddle_speed=600 / tick_rate,
+        speed_min=100 / tick_rate,
+        speed_max=300 / tick_rate,
+        rng=random.Random(args.seed),
+    )
+    if not args.headless:
+        play_in_window(game, tick_rate)
+        return
+
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        game.step()
+    elapsed = time.perf_counter() - start
+    every_pair = args.balls * (args.balls - 1) // 2
+    print(
+        f"{args.balls} balls: {args.ticks / elapsed:,.0f} ticks/s "
+        f"({elapsed / args.ticks * 1000:.2f} ms a tick, "
+        f"budget {1000 / tick_rate:.2f} ms)"
+    )
+    print(
+        f"{game.pair_checks / args.ticks:,.1f} pairs checked a tick instead of "
+        f"{every_pair:,}, {game.ball_bounces} bounces between balls"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+The messages sent between the game server and its clients.
+
+Every message starts with a byte saying what kind it is, and each kind has
+a fixed size, so they can be sent as UDP datagrams or one after another
+over a TCP stream:
+
+    JOIN      client -> server  the name of the match to play in
+    INPUT     client -> server  a number that goes up by one every input,
+                                and which way the paddle is moving
+    WELCOME   server -> client  which side the player is on, the tick rate
+                                and the game's settings
+    SNAPSHOT  server -> client  the tick, where the ball and paddles are,
+                                the ball's speed and the winner (if any)
+    SPECTATE  client -> server  the name of the match to watch
+    KEYFRAME  server -> watcher the same as a snapshot
+    DELTA     server -> watcher how far each number in a snapshot is from
+                                the last keyframe, in fixed point, which
+                                is less than half the size
+
+Snapshots are the same for everyone in a match, so the server only makes
+the bytes once per tick, and the same goes for keyframes and deltas for
+everyone watching.
+
+Client is an asyncio client for either transport, used by bots and for
+trying out the server over loopback.
+"""
+
+import asyncio
+import struct
+
+from .replay import SETTINGS
+
+JOIN = 1
+INPUT = 2
+WELCOME = 3
+SNAPSHOT = 4
+SPECTATE = 5
+KEYFRAME = 6
+DELTA = 7
+
+MESSAGES = {
+    JOIN: struct.Struct("<B16s"),
+    INPUT: struct.Struct("<BIb"),
+    WELCOME: struct.Struct("<BBd" + "d" * len(SETTINGS)),
+    SNAPSHOT: struct.Struct("<BQ6db"),
+    SPECTATE: struct.Struct("<B16s"),
+    KEYFRAME: struct.Struct("<BQ6db"),
+    # The tick, how many ticks after the keyframe it is, the six numbers
+    # and the winner
+    DELTA: struct.Struct("<BQH6hb"),
+}
+
+# Sides in WELCOME, and winners in SNAPSHOT (where 0 means nobody yet)
+LEFT = 0
+RIGHT = 1
+SPECTATOR = 2
+WINNERS = {None: 0, "Left player": 1, "Right player": 2}
+
+# How many steps per pixel (or per pixel per tick, for the speeds) each
+# number in a DELTA is stored to
+DELTA_SCALES = (16, 16, 256, 256, 16, 16)
+
+
+class ProtocolError(ValueError):
+    """
+    Raised when a message can't be read
+    """
+
+
+def encode_join(match, kind=JOIN):
+    name = match.encode()
+    if len(name) > 16:
+        raise ValueError("match names can be at most 16 bytes")
+    return MESSAGES[kind].pack(kind, name)
+
+
+def encode_input(sequence, direction):
+    return MESSAGES[INPUT].pack(INPUT, sequence & 0xFFFFFFFF, direction)
+
+
+def encode_welcome(side, tick_rate, settings):
+    return MESSAGES[WELCOME].pack(
+        WELCOME, side, tick_rate, *(float(settings[name]) for name in SETTINGS)
+    )
+
+
+def _values(game):
+    ball = game.ball
+    return (
+        ball.pos_x,
+        ball.pos_y,
+        ball.xspeed,
+        ball.yspeed,
+        game.left_paddle.pos_y,
+        game.right_paddle.pos_y,
+    )
+
+
+def encode_snapshot(game, kind=SNAPSHOT):
+    return MESSAGES[kind].pack(
+        kind, game.tick, *_values(game), WINNERS[game.winner]
+    )
+
+
+def encode_delta(game, keyframe):
+    """
+    Encodes the game as a DELTA from `keyframe` (a decoded KEYFRAME), or
+    returns None if something has moved too far from it to fit
+    """
+    offsets = []
+    for value, base, scale in zip(_values(game), keyframe[2:8], DELTA_SCALES):
+        offset = round((value - base) * scale)
+        if not -32768 <= offset <= 32767:
+            return None
+        offsets.append(offset)
+    ticks_since = game.tick - keyframe[1]
+    if ticks_since > 0xFFFF:
+        return None
+    return MESSAGES[DELTA].pack(
+        DELTA, game.tick, ticks_since, *offsets, WINNERS[game.winner]
+    )
+
+
+def apply_delta(keyframe, delta):
+    """
+    Turns a decoded DELTA back into a snapshot, or returns None if it
+    wasn't made from `keyframe`
+    """
+    _, tick, ticks_since, *offsets, winner = delta
+    if keyframe is None or tick - ticks_since != keyframe[1]:
+        return None
+    values = [
+        base + offset / scale
+        for base, offset, scale in zip(keyframe[2:8], offsets, DELTA_SCALES)
+    ]
+    return (SNAPSHOT, tick, *values, winner)
+
+
+def decode(data):
+    """
+    Returns a message's fields, starting with its kind. Names and settings
+    are turned back into a str and a dict.
+    """
+    if not data or data[0] not in MESSAGES:
+        raise ProtocolError("unknown message")
+    kind = data[0]
+    layout = MESSAGES[kind]
+    if len(data) != layout.size:
+        raise ProtocolError(f"message {kind} should be {layout.size} bytes")
+    fields = layout.unpack(data)
+    if kind == JOIN or kind == SPECTATE:
+        return kind, fields[1].rstrip(b"\0").decode()
+    if kind == WELCOME:
+        return WELCOME, fields[1], fields[2], dict(zip(SETTINGS, fields[3:]))
+    return fields
+
+
+def split_messages(buffer):
+    """
+    Takes every whole message off the front of `buffer` (a bytearray of
+    data read from a stream) and returns them, leaving any partial message
+    behind
+    """
+    messages = []
+    offset = 0
+    while offset < len(buffer):
+        layout = MESSAGES.get(buffer[offset])
+        if layout is None:
+            raise ProtocolError("unknown message")
+        end = offset + layout.size
+        if end > len(buffer):
+            break
+        messages.append(bytes(buffer[offset:end]))
+        offset = end
+    del buffer[:offset]
+    return messages
+
+
+class Client:
+    """
+    Joins (or with `spectate`, watches) a match on a GameServer and keeps
+    the latest snapshot.
+
+        client = await Client.connect("127.0.0.1", 5000, "lobby", udp=True)
+        client.send_direction(-1)
+        snapshot = await client.next_snapshot()
+
+    Snapshots are (SNAPSHOT, tick, ball x, ball y, ball xspeed, ball yspeed,
+    left paddle y, right paddle y, winner).
+    """
+
+    # Over UDP, how often to send JOIN again until the server answers, and
+    # the current direction again in case an input was lost
+    RESEND_SECONDS = 0.1
+    # How long connect() waits for the server to let it join
+    JOIN_TIMEOUT = 5.0
+
+    def __init__(self):
+        self.side = None
+        self.tick_rate = None
+        self.settings = None
+        self.snapshot = None
+        self.keyframe = None
+        self._returned = None
+        self.direction = 0
+        self.sequence = 0
+        self.welcomed = asyncio.Event()
+        self.updated = asyncio.Event()
+        self.closed = False
+        # Why the connection was lost, if it was an error
+        self.error = None
+        self._send = None
+        self._close = None
+        self._resend_task = None
+        self._reader_task = None
+
+    @classmethod
+    async def connect(cls, host, port, match, udp=False, spectate=False):
+        client = cls()
+        loop = asyncio.get_running_loop()
+        join = encode_join(match, SPECTATE if spectate else JOIN)
+        if udp:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _ClientDatagrams(client), remote_addr=(host, port)
+            )
+            client._send = transport.sendto
+            client._close = transport.close
+            client._resend_task = asyncio.create_task(client._resend(join))
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+            client._send = writer.write
+            client._close = writer.close
+            client._reader_task = asyncio.create_task(client._read_stream(reader))
+            writer.write(join)
+
+        try:
+            await asyncio.wait_for(client.welcomed.wait(), cls.JOIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            client.close()
+            raise ConnectionError(f"no answer from {host}:{port}") from None
+        if client.tick_rate is None:
+            # The connection was lost before the server let it join
+            client.close()
+            if client.error is not None:
+                raise client.error
+            raise ConnectionError(f"{host}:{port} closed the connection")
+        return client
+
+    def receive(self, data):
+        message = decode(data)
+        if message[0] == WELCOME:
+            _, self.side, self.tick_rate, self.settings = message
+            self.welcomed.set()
+            return
+        if message[0] == KEYFRAME:
+            self.keyframe = message
+            message = (SNAPSHOT, *message[1:])
+        elif message[0] == DELTA:
+            message = apply_delta(self.keyframe, message)
+            if message is None:
+                return
+        if message[0] == SNAPSHOT:
+            # The tick doesn't go up on the tick somebody wins
+            latest = self.snapshot
+            if latest is None or message[1] > latest[1] or message[-1] != latest[-1]:
+                self.snapshot = message
+                self.updated.set()
+
+    async def _read_stream(self, reader):
+        buffer = bytearray()
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                buffer += data
+                for message in split_messages(buffer):
+                    self.receive(message)
+        except (ConnectionError, ProtocolError) as error:
+            self.error = error
+        finally:
+            self.lost()
+
+    def lost(self):
+        """
+        Called when the connection to the server has gone
+        """
+        self.closed = True
+        self.updated.set()
+        # Wakes up connect() if it's still waiting to join
+        self.welcomed.set()
+
+    async def _resend(self, join):
+        while not self.closed:
+            if self.welcomed.is_set():
+                self._send(encode_input(self.sequence, self.direction))
+            else:
+                self._send(join)
+            await asyncio.sleep(self.RESEND_SECONDS)
+
+    def send_direction(self, direction):
+        """
+        Starts the paddle moving up (-1) or down (1), or stops it (0)
+        """
+        self.direction = direction
+        self.sequence += 1
+        self._send(encode_input(self.sequence, direction))
+
+    async def next_snapshot(self):
+        """
+        Waits for a snapshot newer than the last one this returned and
+        returns it, or None once the connection is closed
+        """
+        while not self.closed and self.snapshot is self._returned:
+            self.updated.clear()
+            await self.updated.wait()
+        if self.closed and self.snapshot is self._returned:
+            return None
+        self._returned = self.snapshot
+        return self.snapshot
+
+    def poll(self):
+        """
+        Does nothing, because messages are read as soon as they arrive. It's
+        here so a Client can be drawn by client.start() like a PollingClient.
+        """
+
+    def close(self):
+        self.lost()
+        if self._resend_task:
+            self._resend_task.cancel()
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._close:
+            self._close()
+
+
+class _ClientDatagrams(asyncio.DatagramProtocol):
+    def __init__(self, client):
+        self.client = client
+
+    def datagram_received(self, data, addr):
+        try:
+            self.client.receive(data)
+        except ProtocolError:
+            pass
+
+    def error_received(self, error):
+        # Usually the server isn't running (ICMP port unreachable)
+        self.client.error = error
+        self.client.lost()
+
+    def connection_lost(self, error):
+        if error is not None:
+            self.client.error = error
+        self.client.lost()
@@ -0,0 +1,534 @@
+"""
+The game state for pong, with no dependency on tkinter.
+
+Everything here only deals with numbers, so a game can be advanced
+tick by tick without a window. Drawing is done separately (see render.py).
+"""
+
+import math
+import random
+
+# The things a player can do, for Game.press(). These move a paddle once,
+# like a single key press:
+LEFT_UP = 0
+LEFT_DOWN = 1
+RIGHT_UP = 2
+RIGHT_DOWN = 3
+# and these set which way a paddle keeps moving every tick while a key is
+# held down:
+LEFT_HOLD_UP = 4
+LEFT_HOLD_DOWN = 5
+LEFT_RELEASE = 6
+RIGHT_HOLD_UP = 7
+RIGHT_HOLD_DOWN = 8
+RIGHT_RELEASE = 9
+
+
+def circle_time_of_impact(pos_x, pos_y, dx, dy, radius, point_x, point_y):
+    """
+    How far along the movement (dx, dy), from 0 to 1, a circle at
+    (pos_x, pos_y) first touches the given point, or None if it doesn't.
+    Also returns the unit normal at the point where they touch.
+    """
+    fx = pos_x - point_x
+    fy = pos_y - point_y
+    # Half of 'b' in the quadratic formula
+    b = fx * dx + fy * dy
+    if b >= 0:
+        # Not moving towards the point
+        return None
+    c = fx * fx + fy * fy - radius * radius
+    if c <= 0:
+        # Already touching it, and maybe overlapping, so the normal has to
+        # be scaled by how far away it actually is
+        distance = math.sqrt(fx * fx + fy * fy)
+        return 0.0, fx / distance, fy / distance
+    a = dx * dx + dy * dy
+    discriminant = b * b - a * c
+    if discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / a
+    if t > 1:
+        return None
+    return t, (fx + dx * t) / radius, (fy + dy * t) / radius
+
+
+class StraightLine:
+    """
+    A horizontal or vertical line that isn't seen
+    """
+
+    def __init__(
+        self, start_x, start_y, end_x, end_y, position, name="", is_wall=False
+    ):
+        self.start_x = start_x
+        self.start_y = start_y
+        self.end_x = end_x
+        self.end_y = end_y
+        self.name = name
+        self.position = position
+        self.is_wall = is_wall
+        self.is_horiz = self.position == "top" or self.position == "bottom"
+
+    def move(self, movement):
+        """
+        Moves the line up or down
+        """
+        self.start_y += movement
+        self.end_y += movement
+
+    def time_of_impact(self, pos_x, pos_y, dx, dy, radius):
+        """
+        How far along the movement (dx, dy), from 0 to 1, a ball at
+        (pos_x, pos_y) first touches this line, along with the direction to
+        bounce in, as (t, normal x, normal y). Returns None if it doesn't
+        touch the line.
+
+        Unlike is_beyond, this finds the exact moment the ball touches the
+        line, even if the ball would have gone right through it in one tick.
+        The ends of the line are counted too, so the ball can bounce off the
+        corner of a paddle.
+        """
+        if self.is_horiz:
+            # Flip x and y so the same code works for both directions
+            hit = self._face_time_of_impact(
+                pos_y, pos_x, dy, dx, radius,
+                self.start_y, self.start_x, self.end_x,
+            )
+            if hit is not None:
+                return hit[0], hit[2], hit[1]
+        else:
+            hit = self._face_time_of_impact(
+                pos_x, pos_y, dx, dy, radius,
+                self.start_x, self.start_y, self.end_y,
+            )
+            if hit is not None:
+                return hit
+
+        if self.is_wall:
+            return None
+
+        # It might hit one of the ends instead
+        start_hit = circle_time_of_impact(
+            pos_x, pos_y, dx, dy, radius, self.start_x, self.start_y
+        )
+        end_hit = circle_time_of_impact(
+            pos_x, pos_y, dx, dy, radius, self.end_x, self.end_y
+        )
+        if start_hit is None or end_hit is not None and end_hit[0] < start_hit[0]:
+            return end_hit
+        return start_hit
+
+    def _face_time_of_impact(self, across, along, d_across, d_along, radius,
+                             line_across, low, high):
+        """
+        time_of_impact for a vertical line, but only the flat part. 'across'
+        is the coordinate perpendicular to the line, 'along' is parallel to it.
+        """
+        if across < line_across:
+            if d_across <= 0:
+                return None
+            gap = line_across - radius - across
+            normal = -1.0
+        else:
+            if d_across >= 0:
+                return None
+            gap = line_across + radius - across
+            normal = 1.0
+
+        t = gap / d_across
+        if t > 1:
+            return None
+        if t < 0:
+            # Already touching it
+            t = 0.0
+
+        if not self.is_wall:
+            hit_along = along + d_along * t
+            if hit_along < low or hit_along > high:
+                return None
+        return t, normal, 0.0
+
+    def within_bounds(self, ball):
+        if self.is_wall:
+            return True
+
+        if self.is_horiz:
+            return (
+                self.start_x <= ball.left_x <= self.end_x
+                or self.start_x <= ball.right_x <= self.end_x
+            )
+        else:
+            return (
+                self.start_y <= ball.top_y <= self.end_y
+                or self.start_y <= ball.bottom_y <= self.end_y
+            )
+
+    def distance_to_ball(self, ball):
+        """
+        Returns the distance to the given ball
+        """
+        if self.is_horiz:
+            return abs(self.start_y - ball.pos_y)
+        else:
+            return abs(self.start_x - ball.pos_x)
+
+
+class Ball:
+    # The most times the ball can bounce in a single tick
+    max_bounces = 4
+
+    def __init__(
+        self, pos_x, pos_y, xspeed, yspeed, radius, collide_lines, swept=True
+    ):
+        self.collide_lines = collide_lines
+        self.xspeed = xspeed
+        self.yspeed = yspeed
+        self.radius = radius
+        # Whether to find exactly when the ball hits something (see sweep())
+        # or just check where it is after every tick (see update_sampled())
+        self.swept = swept
+        # Anything else to bounce off that has a near() method, like a
+        # level.BVH of obstacles. Only swept balls use it.
+        self.obstacles = None
+        self.is_bouncing = False
+        self.place(pos_x, pos_y)
+
+    def place(self, pos_x, pos_y):
+        """
+        Puts the center of the ball at the given position
+        """
+        self.pos_x = pos_x
+        self.pos_y = pos_y
+        self.top_y = pos_y - self.radius
+        self.bottom_y = pos_y + self.radius
+        self.left_x = pos_x - self.radius
+        self.right_x = pos_x + self.radius
+
+    def update(self):
+        if self.swept:
+            self.sweep(1.0)
+        else:
+            self.update_sampled()
+
+    def sweep(self, amount):
+        """
+        Moves the ball by `amount` ticks' worth of its speed. If it hits a
+        line on the way, it bounces off at the exact point where it touched
+        the line and keeps going for the rest of the movement.
+        """
+        radius = self.radius
+        bounced = False
+        for _ in range(self.max_bounces):
+            dx = self.xspeed * amount
+            dy = self.yspeed * amount
+
+            lines = self.collide_lines
+            if self.obstacles is not None:
+                lines = lines + self.obstacles.near(
+                    self.pos_x, self.pos_y, dx, dy, radius
+                )
+
+            first_hit = None
+            for line in lines:
+                hit = line.time_of_impact(self.pos_x, self.pos_y, dx, dy, radius)
+                if hit is not None and (first_hit is None or hit[0] < first_hit[0]):
+                    first_hit = hit
+
+            if first_hit is None:
+                self.place(self.pos_x + dx, self.pos_y + dy)
+                break
+
+            t, normal_x, normal_y = first_hit
+            self.place(self.pos_x + dx * t, self.pos_y + dy * t)
+            self.reflect(normal_x, normal_y)
+            bounced = True
+            amount *= 1 - t
+        self.is_bouncing = bounced
+
+    def reflect(self, normal_x, normal_y):
+        """
+        Bounces the ball off a surface with the given unit normal
+        """
+        dot = self.xspeed * normal_x + self.yspeed * normal_y
+        self.xspeed -= 2 * dot * normal_x
+        self.yspeed -= 2 * dot * normal_y
+
+    def update_sampled(self):
+        """
+        Moves the ball by one tick and then checks whether it's gone past
+        anything. This is how the tutorial does it, but a fast ball can go
+        straight through a paddle between two ticks.
+        """
+        self.pos_x += self.xspeed
+        self.pos_y += self.yspeed
+        self.top_y += self.yspeed
+        self.bottom_y += self.yspeed
+        self.left_x += self.xspeed
+        self.right_x += self.xspeed
+
+        # Check if there's going to be a collision
+        tried_bouncing = False
+        for line in self.collide_lines:
+            if self.is_beyond(line):
+                tried_bouncing = True
+                # Only bounce if it's not already started bouncing
+                if not self.is_bouncing:
+                    self.bounce(line)
+                    break
+        if not tried_bouncing:
+            self.is_bouncing = False
+
+    def bounce(self, line):
+        if line.is_horiz:
+            self.yspeed *= -1
+        else:
+            self.xspeed *= -1
+        self.is_bouncing = True
+
+    def is_beyond(self, line):
+        """
+        Whether it's touching or gone beyond a wall or paddle
+        """
+        return line.distance_to_ball(self) < self.radius and line.within_bounds(self)
+
+
+class Paddle:
+    def __init__(
+        self,
+        height,
+        width,
+        pos_x,
+        pos_y,
+        is_on_left,
+        change,
+        max_y,
+        name="A paddle",
+        speed=None,
+    ):
+        self.height = height
+        self.width = width
+        self.pos_x = pos_x
+        self.pos_y = pos_y
+        self.name = name
+        self.change = change
+        self.is_on_left = is_on_left
+        # How far down the paddle is allowed to go
+        self.max_y = max_y
+        # How far it moves each tick while a key is held down, and which way
+        # it's going (-1 for up, 1 for down and 0 when it's not moving)
+        self.speed = change if speed is None else speed
+        self.direction = 0
+
+        left_x = pos_x - width / 2
+        top_y = pos_y - height / 2
+        right_x = left_x + width
+        bottom_y = top_y + height
+
+        if is_on_left:
+            main_edge = StraightLine(
+                right_x, top_y, right_x, bottom_y, "right", name=f"r{name}"
+            )
+        else:
+            main_edge = StraightLine(
+                left_x, top_y, left_x, bottom_y, "left", name=f"l{name}"
+            )
+
+        self.main_edge = main_edge
+        self.edges = [
+            main_edge,
+            StraightLine(left_x, top_y, right_x, top_y, "bottom"),
+            StraightLine(left_x, bottom_y, right_x, bottom_y, "top"),
+        ]
+
+    def move(self, movement):
+        # Update the position
+        self.pos_y += movement
+
+        # Update the positions of the lines
+        for edge in self.edges:
+            edge.move(movement)
+
+    def move_up(self, evt=None):
+        if self.pos_y - self.height / 2 >= 0:
+            self.move(-self.change)
+
+    def move_down(self, evt=None):
+        if self.pos_y + self.height / 2 <= self.max_y:
+            self.move(self.change)
+
+    def glide(self):
+        """
+        Moves the paddle by its speed in the direction it's going, stopping
+        at the top and bottom of the screen
+        """
+        half_height = self.height / 2
+        pos_y = self.pos_y + self.direction * self.speed
+        pos_y = min(max(pos_y, half_height), self.max_y - half_height)
+        if pos_y != self.pos_y:
+            self.move(pos_y - self.pos_y)
+
+
+class Game:
+    """
+    One game of pong: the walls, both paddles and the ball.
+
+    Call step() to advance the game by one tick. Once somebody has won,
+    `winner` is set to "Left player" or "Right player" and the game stops
+    changing.
+    """
+
+    def __init__(
+        self,
+        width=700,
+        height=650,
+        ball_radius=50,
+        paddle_height=200,
+        paddle_width=30,
+        paddle_movement=15,
+        paddle_speed=None,
+        speed_min=0.02,
+        speed_max=0.09,
+        xspeed=None,
+        yspeed=None,
+        rng=random,
+        swept=True,
+    ):
+        self.width = width
+        self.height = height
+        self.tick = 0
+        self.winner = None
+
+        x_center = width / 2
+        y_center = height / 2
+
+        self.top_wall = StraightLine(
+            0, 0, width, 0, position="top", name="Top wall", is_wall=True
+        )
+        self.bottom_wall = StraightLine(
+            0, height, width, height, position="bottom", name="Bottom wall",
+            is_wall=True,
+        )
+        self.left_wall = StraightLine(
+            0, 0, 0, height, position="left", name="Left wall", is_wall=True
+        )
+        self.right_wall = StraightLine(
+            width, 0, width, height, position="right", name="Right wall",
+            is_wall=True,
+        )
+
+        self.left_paddle = Paddle(
+            height=paddle_height,
+            width=paddle_width,
+            pos_x=paddle_width / 2,
+            pos_y=y_center,
+            is_on_left=True,
+            change=paddle_movement,
+            max_y=height,
+            name="Left paddle",
+            speed=paddle_speed,
+        )
+        self.right_paddle = Paddle(
+            height=paddle_height,
+            width=paddle_width,
+            pos_x=width - paddle_width / 2,
+            pos_y=y_center,
+            is_on_left=False,
+            change=paddle_movement,
+            max_y=height,
+            name="Right paddle",
+            speed=paddle_speed,
+        )
+
+        # Randomly choose a speed for the ball if one wasn't given
+        if xspeed is None:
+            xspeed = rng.uniform(speed_min, speed_max)
+        if yspeed is None:
+            yspeed = rng.uniform(speed_min, speed_max)
+
+        self.ball = Ball(
+            pos_x=x_center,
+            pos_y=y_center,
+            xspeed=xspeed,
+            yspeed=yspeed,
+            radius=ball_radius,
+            # The left and right walls aren't here because touching them ends
+            # the game instead of bouncing the ball
+            collide_lines=[self.top_wall, self.bottom_wall]
+            + self.left_paddle.edges
+            + self.right_paddle.edges,
+            swept=swept,
+        )
+
+    def step(self):
+        """
+        Advances the game by one tick and returns the winner, if there is one
+        """
+        if self.winner:
+            return self.winner
+
+        for paddle in (self.left_paddle, self.right_paddle):
+            if paddle.direction:
+                paddle.glide()
+
+        ball = self.ball
+        # Checking which side of the wall the ball is on (instead of using
+        # is_beyond) means a fast ball can't skip right over the wall
+        if ball.left_x < self.left_wall.start_x:
+            self.winner = "Right player"
+        elif ball.right_x > self.right_wall.start_x:
+            self.winner = "Left player"
+        else:
+            ball.update()
+            self.tick += 1
+
+        return self.winner
+
+    def ball_is_out(self):
+        """
+        Whether the ball has gone past the left or right wall, so the next
+        step() will end the game
+        """
+        ball = self.ball
+        return (
+            ball.left_x < self.left_wall.start_x
+            or ball.right_x > self.right_wall.start_x
+        )
+
+    def press(self, action):
+        """
+        Does one of the actions at the top of this file
+        """
+        if action >= LEFT_HOLD_UP:
+            # The hold actions go up, down, release for each paddle
+            paddle = self.left_paddle if action < RIGHT_HOLD_UP else self.right_paddle
+            paddle.direction = (-1, 1, 0)[(action - LEFT_HOLD_UP) % 3]
+            return
+
+        paddle = self.left_paddle if action < RIGHT_UP else self.right_paddle
+        if action == LEFT_UP or action == RIGHT_UP:
+            paddle.move_up()
+        else:
+            paddle.move_down()
+
+    def positions(self):
+        """
+        Returns where the ball and paddles are, as
+        (ball x, ball y, left paddle y, right paddle y)
+        """
+        return (
+            self.ball.pos_x,
+            self.ball.pos_y,
+            self.left_paddle.pos_y,
+            self.right_paddle.pos_y,
+        )
+
+    def run(self, max_ticks):
+        """
+        Steps the game until somebody wins or `max_ticks` ticks have passed
+        """
+        step = self.step
+        for _ in range(max_ticks):
+            if step():
+                break
+        return self.winner
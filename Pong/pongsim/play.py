@@ -0,0 +1,268 @@
+"""
+The game of pong in a window, for two players or against the computer.
+
+    pong play
+    pong play --ai hard --fast-start
+
+(or `python pong.py` from the Pong folder). Every game is recorded, and the
+replay is saved in `replay_dir` when the window is closed.
+
+With --asyncio, tkinter and the game run as coroutines on an asyncio event
+loop (see aioloop.py) instead of in tk.mainloop(). With --threaded, the
+physics runs on a thread of its own (see threaded.py).
+
+tkinter is only imported once the window is about to open. The game's
+settings are in settings.py, so they can be used without importing this.
+"""
+
+import argparse
+import atexit
+import os
+import time
+
+from .ai import DIFFICULTIES, InterceptAI
+from .countdown import Countdown
+from .input import DEFAULT_KEYS, HeldKeys, LatencyProbe
+from .loop import FixedStepLoop
+from .metrics import FrameTimer
+from .render import TkRenderer
+from .replay import Recorder
+from .settings import SETTINGS, TICKS_PER_SECOND, game_settings
+from .threaded import ThreadedLoop
+
+# How long it should take to get to the first frame, not counting the
+# countdown, in seconds
+STARTUP_TARGET = 0.5
+
+
+def play(
+    ai=None,
+    fast_start=False,
+    wait=0,
+    replay_dir="replays",
+    start_time=None,
+    use_asyncio=False,
+    threaded=False,
+):
+    """
+    Opens the window and plays until it's closed. With `ai` (one of
+    DIFFICULTIES), the computer plays the right paddle.
+    """
+    # Measure how long it takes to get to the first frame of the game
+    if start_time is None:
+        start_time = time.perf_counter()
+
+    import tkinter as tk
+
+    width = SETTINGS["width"]
+    height = SETTINGS["height"]
+    x_center = width / 2
+    y_center = height / 2
+
+    # root will be the window to put everything in
+    root = tk.Tk()
+    # Set the title
+    root.title("Pong")
+    # The canvas is where everything will be drawn
+    canvas = tk.Canvas(root, width=width, height=height, bd=0, bg="black")
+    # Adds the canvas to the window
+    canvas.pack()
+
+    # The text for the countdown
+    label_text = tk.StringVar()
+    label = tk.Label(
+        root,
+        anchor=tk.CENTER,
+        textvariable=label_text,
+        bg="black",
+        fg="white",
+        font=("Courier", 30),
+    )
+
+    def show_label(text):
+        label_text.set(text)
+        # Adds the label to the window
+        label.place(x=x_center, y=y_center, anchor="center")
+
+    # The recorder makes the game and writes down every key press, so the
+    # game can be replayed later with `pong replay`
+    recorder = Recorder(tick_rate=TICKS_PER_SECOND, **game_settings())
+    # The game itself doesn't know anything about tkinter
+    game = recorder.game
+    timer = FrameTimer("physics", "draw", "tk", "frame", "input")
+    # The renderer puts the game's state onto the canvas, and the probe times
+    # how long it takes for a key press to show up there
+    renderer = LatencyProbe(TkRenderer(canvas, game), timer)
+
+    # The keys 'w' and 's' move the left paddle up and down, and the up and
+    # down arrow keys move the right paddle, for as long as they're held down
+    if ai:
+        keys = {key: value for key, value in DEFAULT_KEYS.items() if value[0] == "left"}
+    else:
+        keys = DEFAULT_KEYS
+    if threaded:
+        # The keys are read on tkinter's thread, so the presses are handed
+        # to the physics thread, which passes them on to the recorder
+        def press(action):
+            loop.press(action)
+
+    else:
+        press = recorder.press
+    held_keys = HeldKeys(root, press, keys=keys, on_press=renderer.press)
+
+    # The computer plays the right paddle by working out where the ball will go
+    if ai:
+        computer = InterceptAI(
+            game, game.right_paddle, press=recorder.press, **DIFFICULTIES[ai]
+        )
+
+    def before_step():
+        held_keys.sync()
+        if ai:
+            computer.decide()
+
+    def game_over(winner):
+        show_label(f"{winner} has won!")
+
+        # stop them from moving afterwards
+        held_keys.disable()
+
+    # Instead of running the game as fast as possible, this runs it at the
+    # same speed on every computer and lets tkinter sleep in between frames
+    if threaded:
+        loop = ThreadedLoop(
+            root,
+            game,
+            renderer,
+            tick_rate=TICKS_PER_SECOND,
+            on_finish=game_over,
+            timer=timer,
+            # The computer moves on the physics thread, and the keys are
+            # checked on tkinter's thread every frame
+            before_step=computer.decide if ai else None,
+            before_frame=held_keys.sync,
+            game_press=recorder.press,
+        )
+    else:
+        if use_asyncio:
+            # Only imported when it's used, because asyncio is slow to import
+            import asyncio
+
+            from .aioloop import AsyncFixedStepLoop as loop_class, run_in_window
+        else:
+            loop_class = FixedStepLoop
+        loop = loop_class(
+            root,
+            game,
+            renderer,
+            tick_rate=TICKS_PER_SECOND,
+            on_finish=game_over,
+            timer=timer,
+            # Check the keys (and let the computer move) just before every tick
+            before_step=before_step,
+        )
+
+    # Counts down from 3 to 1, then says "GO!" and starts the game. The window
+    # keeps working while it counts down.
+    countdown = Countdown(
+        root,
+        show=show_label,
+        hide=label.place_forget,
+        on_done=loop.start,
+        wait_ms=round(wait * 1000),
+    )
+    if fast_start:
+        # Once tkinter is running, which with --asyncio is also when the
+        # event loop is
+        root.after_idle(loop.start)
+    else:
+        countdown.start()
+
+    def check_startup():
+        if loop.first_frame_time is None:
+            root.after(50, check_startup)
+            return
+        startup = loop.first_frame_time - start_time
+        if not fast_start:
+            startup -= countdown.length_ms / 1000
+        status = "OK" if startup <= STARTUP_TARGET else "too slow"
+        print(
+            f"First frame after {startup * 1000:.0f} ms, not counting the countdown "
+            f"(target {STARTUP_TARGET * 1000:.0f} ms, {status})"
+        )
+
+    root.after_idle(check_startup)
+
+    # Print how long frames took when the game is closed, or when F2 is pressed
+    atexit.register(lambda: print(loop.timer.report()))
+    root.bind("<F2>", lambda evt: print(loop.timer.report()))
+
+    def close():
+        # Stop the loop first, so with --threaded the physics thread isn't
+        # still stepping the game and recording presses while the replay
+        # is saved
+        loop.stop()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", close)
+
+    # Save the replay when the game is closed
+    os.makedirs(replay_dir, exist_ok=True)
+    atexit.register(
+        recorder.save,
+        os.path.join(replay_dir, time.strftime("%Y%m%d-%H%M%S") + ".pongreplay"),
+    )
+
+    if use_asyncio:
+        asyncio.run(run_in_window(root))
+    else:
+        tk.mainloop()
+
+
+def main(argv=None, replay_dir="replays", start_time=None):
+    parser = argparse.ArgumentParser(description="Play pong")
+    parser.add_argument(
+        "--fast-start",
+        action="store_true",
+        help="skip the countdown and start right away",
+    )
+    parser.add_argument(
+        "--wait",
+        type=float,
+        default=0,
+        help="seconds to wait before the countdown (to get ready to record the screen)",
+    )
+    parser.add_argument(
+        "--ai",
+        choices=DIFFICULTIES,
+        help="let the computer play the right paddle at this difficulty",
+    )
+    parser.add_argument(
+        "--replay-dir", default=replay_dir, help="where to save the replay"
+    )
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument(
+        "--asyncio",
+        action="store_true",
+        help="run the window and the game on an asyncio event loop",
+    )
+    modes.add_argument(
+        "--threaded",
+        action="store_true",
+        help="run the physics on its own thread, so drawing can't slow it down",
+    )
+    args = parser.parse_args(argv)
+
+    play(
+        args.ai,
+        args.fast_start,
+        args.wait,
+        args.replay_dir,
+        start_time,
+        args.asyncio,
+        args.threaded,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Draws the game into an in-memory image instead of a tkinter canvas.
+
+The image is a bytearray with one byte per pixel, which is an index into
+a small palette. Shapes are filled one row at a time with slice assignment,
+so drawing a whole frame is quick even in pure Python.
+"""
+
+# The colors used by the game, as (red, green, blue)
+PALETTE = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "yellow": (255, 255, 0),
+    "blue": (0, 0, 255),
+    "red": (255, 0, 0),
+}
+
+
+class Framebuffer:
+    def __init__(self, width, height, palette=PALETTE):
+        self.width = width
+        self.height = height
+        self.colors = list(palette.values())
+        self.color_index = {name: i for i, name in enumerate(palette)}
+        self.pixels = bytearray(width * height)
+
+    def clear(self, color):
+        index = self.color_index[color]
+        self.pixels[:] = bytes([index]) * len(self.pixels)
+
+    def _row(self, y, x0, x1, index):
+        """
+        Fills row y from x0 up to (not including) x1, clipped to the image
+        """
+        if not 0 <= y < self.height:
+            return
+        x0 = max(x0, 0)
+        x1 = min(x1, self.width)
+        if x1 > x0:
+            start = y * self.width
+            self.pixels[start + x0 : start + x1] = bytes([index]) * (x1 - x0)
+
+    def fill_rect(self, x0, y0, x1, y1, color):
+        """
+        Fills a rectangle with the same corners as canvas.create_rectangle
+        """
+        index = self.color_index[color]
+        x0, y0, x1, y1 = round(x0), round(y0), round(x1), round(y1)
+        for y in range(max(y0, 0), min(y1, self.height)):
+            self._row(y, x0, x1, index)
+
+    def fill_oval(self, x0, y0, x1, y1, color):
+        """
+        Fills an ellipse with the same bounding box as canvas.create_oval
+        """
+        index = self.color_index[color]
+        center_x = (x0 + x1) / 2
+        center_y = (y0 + y1) / 2
+        radius_x = (x1 - x0) / 2
+        radius_y = (y1 - y0) / 2
+        if radius_x <= 0 or radius_y <= 0:
+            return
+        for y in range(max(round(y0), 0), min(round(y1), self.height)):
+            # How far across the ellipse is at the middle of this row
+            dy = (y + 0.5 - center_y) / radius_y
+            if dy * dy >= 1:
+                continue
+            half_width = radius_x * (1 - dy * dy) ** 0.5
+            self._row(
+                y, round(center_x - half_width), round(center_x + half_width), index
+            )
+
+    def rgb(self):
+        """
+        Returns the image as bytes with red, green and blue for each pixel
+        """
+        out = bytearray(len(self.pixels) * 3)
+        for channel in range(3):
+            table = bytes(
+                [color[channel] for color in self.colors]
+                + [0] * (256 - len(self.colors))
+            )
+            out[channel::3] = self.pixels.translate(table)
+        return bytes(out)
+
+
+class SceneRasterizer:
+    """
+    Draws the same scene as TkRenderer, but into a Framebuffer
+    """
+
+    def __init__(
+        self,
+        game,
+        background="black",
+        ball_color="yellow",
+        left_color="blue",
+        right_color="red",
+    ):
+        self.game = game
+        self.framebuffer = Framebuffer(round(game.width), round(game.height))
+        self.background = background
+        self.ball_color = ball_color
+        self.paddle_colors = (left_color, right_color)
+
+    def draw(self, positions=None):
+        """
+        Draws a frame at the given positions (in the same order as
+        Game.positions()), or where things are right now, and returns the
+        Framebuffer
+        """
+        if positions is None:
+            positions = self.game.positions()
+        ball_x, ball_y, left_y, right_y = positions
+        game = self.game
+        framebuffer = self.framebuffer
+
+        framebuffer.clear(self.background)
+        paddles = (game.left_paddle, game.right_paddle)
+        paddle_ys = (left_y, right_y)
+        for paddle, pos_y, color in zip(paddles, paddle_ys, self.paddle_colors):
+            left_x = paddle.pos_x - paddle.width / 2
+            top_y = pos_y - paddle.height / 2
+            framebuffer.fill_rect(
+                left_x, top_y, left_x + paddle.width, top_y + paddle.height, color
+            )
+
+        radius = game.ball.radius
+        framebuffer.fill_oval(
+            ball_x - radius,
+            ball_y - radius,
+            ball_x + radius,
+            ball_y + radius,
+            self.ball_color,
+        )
+        return framebuffer
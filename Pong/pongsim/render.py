@@ -0,0 +1,113 @@
+"""
+Draws a Game from physics.py onto a tkinter canvas.
+
+This module doesn't import tkinter itself; it only calls methods on the
+canvas it is given.
+"""
+
+
+class TkRenderer:
+    """
+    Keeps the items on a canvas in sync with the state of a game.
+
+    Items are put at absolute pixel positions with canvas.coords instead of
+    being moved relative to where they were, so rounding errors can't build
+    up between the physics and what's on the screen. An item is only
+    redrawn when the pixel it lands on changes, and all the changes for a
+    frame are sent to Tk together in flush().
+    """
+
+    def __init__(
+        self, canvas, game, ball_color="yellow", left_color="blue", right_color="red"
+    ):
+        self.canvas = canvas
+        self.game = game
+
+        # Where each item was last drawn, and where it needs to go next
+        self.drawn = {}
+        self.pending = {}
+
+        ball = game.ball
+        # Rounded once so the ball is always the same size on screen
+        self.ball_radius = round(ball.radius)
+        coords = self._ball_coords(ball.pos_x, ball.pos_y)
+        self.ball_id = canvas.create_oval(*coords, fill=ball_color)
+        self.drawn[self.ball_id] = coords
+        self.paddle_ids = [
+            self._create_paddle(game.left_paddle, left_color),
+            self._create_paddle(game.right_paddle, right_color),
+        ]
+
+    def _ball_coords(self, pos_x, pos_y):
+        x = round(pos_x)
+        y = round(pos_y)
+        radius = self.ball_radius
+        return (x - radius, y - radius, x + radius, y + radius)
+
+    def _paddle_coords(self, paddle, pos_y):
+        left_x = round(paddle.pos_x - paddle.width / 2)
+        top_y = round(pos_y - paddle.height / 2)
+        return (
+            left_x, top_y, left_x + round(paddle.width), top_y + round(paddle.height)
+        )
+
+    def _create_paddle(self, paddle, color):
+        coords = self._paddle_coords(paddle, paddle.pos_y)
+        item = self.canvas.create_rectangle(*coords, fill=color)
+        self.drawn[item] = coords
+        return item
+
+    def set_coords(self, item, coords):
+        """
+        Queues moving an item to the given (whole number) coordinates
+        """
+        if self.drawn.get(item) != coords:
+            self.pending[item] = coords
+        else:
+            # It moved away and back again before being drawn
+            self.pending.pop(item, None)
+
+    def flush(self):
+        """
+        Sends every queued change to Tk at once. With a real tkinter canvas,
+        this is a single Tcl script, so there's only one call into Tk.
+        """
+        pending = self.pending
+        if not pending:
+            return
+
+        canvas = self.canvas
+        tcl = getattr(canvas, "tk", None)
+        if tcl is not None:
+            path = str(canvas)
+            tcl.eval(
+                "\n".join(
+                    f"{path} coords {item} {' '.join(map(str, coords))}"
+                    for item, coords in pending.items()
+                )
+            )
+        else:
+            for item, coords in pending.items():
+                canvas.coords(item, *coords)
+
+        self.drawn.update(pending)
+        pending.clear()
+
+    def draw(self, positions=None):
+        """
+        Draws the ball and paddles at the given positions (in the same order
+        as Game.positions()), or at where they are in the game right now
+        """
+        if positions is None:
+            positions = self.game.positions()
+        ball_x, ball_y, left_y, right_y = positions
+
+        self.set_coords(self.ball_id, self._ball_coords(ball_x, ball_y))
+        game = self.game
+        self.set_coords(
+            self.paddle_ids[0], self._paddle_coords(game.left_paddle, left_y)
+        )
+        self.set_coords(
+            self.paddle_ids[1], self._paddle_coords(game.right_paddle, right_y)
+        )
+        self.flush()
@@ -0,0 +1,341 @@
+"""
+Records games so they can be played back exactly.
+
+A game only depends on its settings, the seed for its random numbers and
+which keys were pressed on which tick, so that's all a replay stores. The
+file is a fixed-size header followed by one small number per key press:
+
+    header   magic b"PNGR", version, seed, tick rate, last tick,
+             the Game settings in SETTINGS order, and whether it's swept
+    presses  (ticks since the last press << 4 | action) as a varint
+
+Version 1 files (before paddles could be held down) had no paddle_speed
+and used 3 bits for the action; they can still be read.
+
+Recording a whole game usually takes a few hundred bytes.
+
+Replays can be played without a window as fast as possible, or in a window
+at any speed:
+
+    python -m pongsim.replay game.pongreplay --headless
+    python -m pongsim.replay game.pongreplay --speed 4
+
+With --headless, --save-state also saves how the game ended (see state.py),
+so two computers or two versions of pongsim can check they played the
+replay exactly the same way with cmp.
+"""
+
+import argparse
+import math
+import random
+import struct
+import time
+
+from . import state
+from .physics import Game
+
+MAGIC = b"PNGR"
+VERSION = 2
+
+# The Game arguments that are saved, in the order they are saved in
+SETTINGS = (
+    "width",
+    "height",
+    "ball_radius",
+    "paddle_height",
+    "paddle_width",
+    "paddle_movement",
+    "speed_min",
+    "speed_max",
+    "paddle_speed",
+)
+
+# For each version: the settings it has, and how many of the low bits of
+# each press are the action
+FORMATS = {
+    1: (SETTINGS[:8], 3),
+    2: (SETTINGS, 4),
+}
+
+
+def _header(settings):
+    return struct.Struct("<4sBQdQ" + "d" * len(settings) + "?")
+
+
+HEADER = _header(SETTINGS)
+ACTION_BITS = FORMATS[VERSION][1]
+
+
+class ReplayError(ValueError):
+    """
+    Raised when a replay file can't be read
+    """
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError("replay ends in the middle of a press")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def complete_settings(settings):
+    """
+    Returns `settings` with every one of SETTINGS filled in, using the
+    Game's defaults for any that are missing
+    """
+    # inspect takes longer to import than the rest of pongsim
+    import inspect
+
+    settings = dict(settings)
+    parameters = inspect.signature(Game).parameters
+    for name in SETTINGS:
+        settings.setdefault(name, parameters[name].default)
+    if settings["paddle_speed"] is None:
+        settings["paddle_speed"] = settings["paddle_movement"]
+    return settings
+
+
+class Replay:
+    """
+    Everything needed to play a game again: its settings, the seed and
+    the list of (tick, action) key presses
+    """
+
+    def __init__(
+        self, seed, tick_rate, settings, swept=True, presses=None, end_tick=0
+    ):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.settings = dict(settings)
+        self.swept = swept
+        self.presses = presses if presses is not None else []
+        # The tick the game had reached when recording stopped
+        self.end_tick = end_tick
+
+    def new_game(self):
+        """
+        Makes a game in the same starting state as the recorded one
+        """
+        return Game(
+            rng=random.Random(self.seed), swept=self.swept, **self.settings
+        )
+
+    def to_bytes(self):
+        out = bytearray(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                self.seed,
+                self.tick_rate,
+                self.end_tick,
+                *(float(self.settings[name]) for name in SETTINGS),
+                self.swept,
+            )
+        )
+        last_tick = 0
+        for tick, action in self.presses:
+            _write_varint(out, (tick - last_tick) << ACTION_BITS | action)
+            last_tick = tick
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < 5 or data[:4] != MAGIC:
+            raise ReplayError("not a replay file")
+        version = data[4]
+        if version not in FORMATS:
+            raise ReplayError(f"can't read version {version} replays")
+        names, action_bits = FORMATS[version]
+        header = _header(names)
+        if len(data) < header.size:
+            raise ReplayError("too short to be a replay")
+        _, _, seed, tick_rate, end_tick, *settings, swept = header.unpack_from(data)
+
+        presses = []
+        tick = 0
+        offset = header.size
+        while offset < len(data):
+            value, offset = _read_varint(data, offset)
+            tick += value >> action_bits
+            presses.append((tick, value & (1 << action_bits) - 1))
+
+        return cls(seed, tick_rate, zip(names, settings), swept, presses, end_tick)
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+
+class Recorder:
+    """
+    Makes a new game and records every key press made through press()
+    """
+
+    def __init__(self, tick_rate, seed=None, swept=True, **settings):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        # Save every setting, even the ones left as the default
+        self.replay = Replay(seed, tick_rate, complete_settings(settings), swept)
+        self.game = self.replay.new_game()
+
+    def press(self, action):
+        """
+        Presses a key in the game and writes it down
+        """
+        game = self.game
+        if game.winner:
+            return
+        self.replay.presses.append((game.tick, action))
+        game.press(action)
+
+    def save(self, path):
+        self.replay.end_tick = self.game.tick
+        self.replay.save(path)
+
+
+class ReplayPlayer:
+    """
+    Plays a replay's key presses back into a new game. It has the same
+    step() and positions() as a Game, so it can be run by a FixedStepLoop.
+    """
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.game = replay.new_game()
+        self.next_press = 0
+
+    @property
+    def winner(self):
+        if self.game.winner:
+            return self.game.winner
+        if self.game.tick >= self.replay.end_tick and not self.game.ball_is_out():
+            # The recording stopped before anybody won. (If the ball is out,
+            # the next step() finds the winner without moving on a tick.)
+            return "Nobody"
+        return None
+
+    @property
+    def finished(self):
+        """
+        Whether the game is over or has reached the end of the recording
+        """
+        return self.winner is not None
+
+    def positions(self):
+        return self.game.positions()
+
+    def step(self):
+        game = self.game
+        presses = self.replay.presses
+        while (
+            self.next_press < len(presses)
+            and presses[self.next_press][0] <= game.tick
+        ):
+            game.press(presses[self.next_press][1])
+            self.next_press += 1
+        return game.step()
+
+    def run(self):
+        """
+        Plays the whole replay as fast as possible and returns the game
+        """
+        while not self.finished:
+            self.step()
+        return self.game
+
+
+def play_in_window(replay, speed=1.0):
+    """
+    Shows a replay in a window, `speed` times as fast as it was played
+    """
+    import tkinter as tk
+
+    from .loop import FixedStepLoop
+    from .render import TkRenderer
+
+    player = ReplayPlayer(replay)
+    game = player.game
+
+    root = tk.Tk()
+    root.title("Pong replay")
+    canvas = tk.Canvas(
+        root, width=game.width, height=game.height, bd=0, bg="black"
+    )
+    canvas.pack()
+    renderer = TkRenderer(canvas, game)
+
+    def finished(winner):
+        canvas.create_text(
+            game.width / 2,
+            game.height / 2,
+            text=f"{winner} has won!",
+            fill="white",
+            font=("Courier", 30),
+        )
+
+    loop = FixedStepLoop(
+        root,
+        player,
+        renderer,
+        tick_rate=replay.tick_rate * speed,
+        # Sped up, more ticks than usual have to run every frame to keep up
+        max_steps=max(8, math.ceil(8 * speed)),
+        on_finish=finished,
+    )
+    loop.start()
+    tk.mainloop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back a recorded game of pong")
+    parser.add_argument("path")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="play it as fast as possible without a window",
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="how many times faster to play it"
+    )
+    parser.add_argument(
+        "--save-state", metavar="PATH", help="with --headless, save the final state"
+    )
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.path)
+    if args.headless:
+        start = time.perf_counter()
+        game = ReplayPlayer(replay).run()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{game.winner or 'Nobody'} won after {game.tick} ticks "
+            f"({game.tick / max(elapsed, 1e-9):,.0f} ticks/s)"
+        )
+        if args.save_state:
+            state.save(game, args.save_state)
+    else:
+        play_in_window(replay, args.speed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Rollback netcode, so network play feels as quick as playing locally.
+
+Each player runs the whole game on their own computer. Their own inputs
+are used straight away, and the other player's inputs are guessed: they're
+assumed to keep doing whatever they were last known to be doing. When the
+other player's real input for a tick arrives and it isn't what was
+guessed, the game is rolled back to that tick and played forward again
+with the right input, all before the next frame is drawn.
+
+That needs the game's state to be saved every tick and restored quickly.
+Each tick's state is packed (see state.py) into a fixed-size slot of a
+bytearray with a single struct.pack_into(), and unpacked from there when
+rolling back.
+
+    python -m pongsim.rollback --latency 100
+
+plays two bots against each other through a fake connection with the
+given delay, checks that both ended up with exactly the same game, and
+reports how long saving, restoring and rolling back took.
+"""
+
+import argparse
+import random
+import time
+
+from .input import ACTIONS
+from .metrics import Histogram
+from .physics import Game
+from .state import SIZE, pack_into, unpack_into
+
+SIDES = ("left", "right")
+
+
+class RollbackSession:
+    """
+    One player's copy of a networked game.
+
+    Every tick, call add_local_input() with which way your paddle is going
+    (and send that to the other player along with the tick), pass anything
+    the other player sent to add_remote_input(), then call advance().
+
+    The game can't get more than `max_rollback` ticks ahead of the other
+    player's last known input. If it would, advance() waits instead, which
+    keeps each rollback short enough to fit into one frame.
+    """
+
+    def __init__(self, game, side, max_rollback=10):
+        self.game = game
+        self.side = side
+        self.other = 1 - side
+        self.max_rollback = max_rollback
+        # The state at the start of each of the last few ticks
+        self.slots = max_rollback + 2
+        self.states = bytearray(SIZE * self.slots)
+        # The direction each player's paddle was going on each tick. The
+        # other player's only has the ticks that are known for certain.
+        self.inputs = ({}, {})
+        # What was guessed for the other player on ticks that have been
+        # played but aren't known yet
+        self.guesses = {}
+        # The other player's inputs are known up to and including this tick
+        self.confirmed_tick = -1
+        self.last_confirmed = 0
+        # The earliest tick that needs to be played again, if any
+        self.rollback_tick = None
+
+        self.rollbacks = 0
+        self.replayed_ticks = 0
+        self.stalls = 0
+        self.rollback_times = Histogram()
+
+    def add_local_input(self, direction):
+        """
+        Sets which way your paddle goes on the next tick, and returns that
+        tick so it can be sent with the direction
+        """
+        tick = self.game.tick
+        self.inputs[self.side][tick] = direction
+        return tick
+
+    def add_remote_input(self, tick, direction):
+        """
+        The other player's direction on `tick`. Inputs have to arrive in
+        order of their ticks, like over TCP.
+        """
+        if tick <= self.confirmed_tick:
+            return
+        self.inputs[self.other][tick] = direction
+        self.confirmed_tick = tick
+        self.last_confirmed = direction
+        guess = self.guesses.pop(tick, None)
+        if guess is not None and guess != direction:
+            if self.rollback_tick is None or tick < self.rollback_tick:
+                self.rollback_tick = tick
+
+    def _remote_direction(self, tick):
+        direction = self.inputs[self.other].get(tick)
+        if direction is None:
+            direction = self.last_confirmed
+            self.guesses[tick] = direction
+        return direction
+
+    def _step(self):
+        game = self.game
+        tick = game.tick
+        pack_into(game, self.states, tick % self.slots * SIZE)
+        directions = [None, None]
+        directions[self.side] = self.inputs[self.side].get(tick, 0)
+        directions[self.other] = self._remote_direction(tick)
+        for side, direction in zip(SIDES, directions):
+            game.press(ACTIONS[side][direction])
+        game.step()
+        if game.tick == tick:
+            # Somebody won, so the tick didn't go up. Keep the state as it
+            # was after the winning step instead of playing this tick again.
+            game.tick += 1
+
+    def _roll_back(self):
+        start = time.perf_counter()
+        game = self.game
+        target = game.tick
+        tick = self.rollback_tick
+        self.rollback_tick = None
+        unpack_into(game, self.states, tick % self.slots * SIZE)
+        # Everything after this tick gets guessed again
+        for later in range(tick, target):
+            self.guesses.pop(later, None)
+        while game.tick < target:
+            self._step()
+        self.rollbacks += 1
+        self.replayed_ticks += target - tick
+        self.rollback_times.record(time.perf_counter() - start)
+
+    def advance(self):
+        """
+        Plays the next tick, rolling back first if a guess was wrong.
+        Returns False (without playing it) if the other player is too far
+        behind.
+        """
+        if self.rollback_tick is not None:
+            self._roll_back()
+        if self.game.tick - self.confirmed_tick > self.max_rollback:
+            self.stalls += 1
+            return False
+        self._step()
+        # Inputs from before the oldest saved state won't be needed again
+        old = self.game.tick - self.slots
+        self.inputs[self.side].pop(old, None)
+        self.inputs[self.other].pop(old, None)
+        return True
+
+
+class DelayedLink:
+    """
+    A fake one-way connection that delivers each message `delay` ticks
+    after it was sent
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.queue = []
+
+    def send(self, now, message):
+        self.queue.append((now + self.delay, message))
+
+    def receive(self, now):
+        ready = 0
+        while ready < len(self.queue) and self.queue[ready][0] <= now:
+            ready += 1
+        messages = [message for _, message in self.queue[:ready]]
+        del self.queue[:ready]
+        return messages
+
+
+def run_harness(latency_ms, ticks=3000, tick_rate=120, seed=0, max_rollback=10):
+    """
+    Plays two bots against each other for up to `ticks` ticks through
+    DelayedLinks with `latency_ms` of delay each way, then delivers
+    whatever is still on its way. Returns both sessions.
+
+    Each bot follows the ball in its own copy of the game, but sometimes
+    stops or turns around for a moment, so the other side's guesses are
+    often wrong.
+    """
+    delay = round(latency_ms / 1000 * tick_rate)
+    settings = {
+        "paddle_speed": 600 / tick_rate,
+        "speed_min": 150 / tick_rate,
+        "speed_max": 400 / tick_rate,
+    }
+    sessions = [
+        RollbackSession(
+            Game(rng=random.Random(seed), **settings), side, max_rollback
+        )
+        for side in (0, 1)
+    ]
+    links = [DelayedLink(delay), DelayedLink(delay)]
+    bots = [random.Random(seed * 2 + side) for side in (0, 1)]
+
+    for now in range(ticks):
+        for side, session in enumerate(sessions):
+            for tick, direction in links[1 - side].receive(now):
+                session.add_remote_input(tick, direction)
+            game = session.game
+            if game.tick - session.confirmed_tick > max_rollback:
+                # Waiting for the other player, so there's no new input
+                session.advance()
+                continue
+            paddle = (game.left_paddle, game.right_paddle)[side]
+            distance = game.ball.pos_y - paddle.pos_y
+            direction = 0 if abs(distance) < paddle.height / 4 else (
+                1 if distance > 0 else -1
+            )
+            if bots[side].random() < 0.1:
+                direction = bots[side].choice((-1, 0, 1))
+            tick = session.add_local_input(direction)
+            links[side].send(now, (tick, direction))
+            session.advance()
+        if all(session.game.winner for session in sessions):
+            break
+
+    for side, session in enumerate(sessions):
+        for tick, direction in links[1 - side].receive(float("inf")):
+            session.add_remote_input(tick, direction)
+        if session.rollback_tick is not None:
+            session._roll_back()
+    return sessions
+
+
+def common_state(left, right):
+    """
+    Returns the latest tick that both sessions know every input before,
+    and each session's saved state at the start of it
+    """
+    tick = min(left.game.tick, right.game.tick)
+    states = []
+    for session in (left, right):
+        offset = tick % session.slots * SIZE
+        if session.game.tick == tick:
+            pack_into(session.game, session.states, offset)
+        states.append(bytes(session.states[offset : offset + SIZE]))
+    return tick, states
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Test rollback netcode over a fake connection with a delay"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=80, help="one-way delay in milliseconds"
+    )
+    parser.add_argument("--ticks", type=int, default=3000)
+    parser.add_argument("--tick-rate", type=float, default=120)
+    parser.add_argument("--max-rollback", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    left, right = run_harness(
+        args.latency, args.ticks, args.tick_rate, max_rollback=args.max_rollback
+    )
+
+    tick, states = common_state(left, right)
+    same = "the same" if states[0] == states[1] else "DIFFERENT"
+    print(f"Both players' games at tick {tick} are {same}")
+
+    for name, session in (("left", left), ("right", right)):
+        times = session.rollback_times
+        print(
+            f"{name}: {session.rollbacks} rollbacks, "
+            f"{session.replayed_ticks} ticks replayed, {session.stalls} stalls, "
+            f"rollback p50 {times.percentile(50) * 1e6:.0f} us, "
+            f"max {times.max * 1e6:.0f} us"
+        )
+
+    game = left.game
+    buffer = bytearray(SIZE)
+    repeats = 100_000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        pack_into(game, buffer)
+    saved = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeats):
+        unpack_into(game, buffer)
+    restored = time.perf_counter() - start
+    print(
+        f"State is {SIZE} bytes, saved in {saved / repeats * 1e6:.2f} us "
+        f"and restored in {restored / repeats * 1e6:.2f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,558 @@
+"""
+A game server so two players can play each other from different computers.
+
+The server runs the physics for every match itself and the players only
+send which way their paddle is moving, so nobody can cheat by changing
+where the ball is. Players can connect over TCP or UDP (see net.py for the
+messages). The first two players to join a match name play each other.
+
+Everything runs on one asyncio event loop: a single task steps every match
+at a fixed tick rate and sends out the snapshots, so a server can run a lot
+of matches at once without a thread for each one.
+
+Anyone can also watch a match. Watchers are sent a keyframe (a whole
+snapshot) every so often, and in between, small deltas from the last
+keyframe. Each is encoded once per match and the same bytes are sent to
+every watcher. A watcher that can't keep up only gets keyframes until it
+catches up, and one that's far behind gets nothing, so slow watchers never
+hold up the match.
+
+    python -m pongsim.server --tcp-port 5000 --udp-port 5000
+    python -m pongsim.server --loopback 50 --spectators 2000
+
+--loopback starts a server on this computer and plays the given number of
+matches on it at once with bots, half of them over UDP, then says how long
+the server's ticks took.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from .input import ACTIONS
+from .metrics import Histogram
+from .net import (
+    INPUT,
+    JOIN,
+    KEYFRAME,
+    LEFT,
+    MESSAGES,
+    RIGHT,
+    SPECTATE,
+    SPECTATOR,
+    Client,
+    ProtocolError,
+    decode,
+    encode_delta,
+    encode_join,
+    encode_snapshot,
+    encode_welcome,
+    split_messages,
+)
+from .physics import Game
+from .replay import complete_settings
+
+SIDE_NAMES = ("left", "right")
+WINNER_NAMES = ("Left player", "Right player")
+
+
+class Player:
+    """
+    A connection to one player. `send` sends a message and `backlog`
+    returns how many bytes are still waiting to be sent. Players that
+    `can_time_out` (over UDP) are dropped if they go quiet.
+    """
+
+    def __init__(self, send, close, backlog=lambda: 0, can_time_out=False):
+        self.send = send
+        self.close = close
+        self.backlog = backlog
+        self.can_time_out = can_time_out
+        self.match = None
+        self.side = None
+        self.last_sequence = 0
+        self.last_heard = time.monotonic()
+
+
+class Match:
+    def __init__(self, name, settings, seed):
+        self.name = name
+        self.game = Game(rng=random.Random(seed), **settings)
+        self.players = []
+        self.spectators = []
+        # The last keyframe sent to the spectators, decoded
+        self.keyframe = None
+
+    @property
+    def started(self):
+        return len(self.players) == 2
+
+    def add(self, player):
+        player.match = self
+        player.side = LEFT if not self.players else RIGHT
+        self.players.append(player)
+
+    def watch(self, spectator):
+        spectator.match = self
+        spectator.side = SPECTATOR
+        # Deltas are no use until it has the keyframe they're from
+        spectator.needs_keyframe = True
+        self.spectators.append(spectator)
+
+    def set_direction(self, player, sequence, direction):
+        # Inputs over UDP can arrive twice or in the wrong order
+        if sequence <= player.last_sequence or direction not in (-1, 0, 1):
+            return
+        player.last_sequence = sequence
+        self.game.press(ACTIONS[SIDE_NAMES[player.side]][direction])
+
+
+class GameServer:
+    """
+    Runs matches of pong at `tick_rate` ticks per second. `settings` are
+    passed to every Game.
+
+    Snapshots aren't sent to a TCP player with more than `max_backlog` bytes
+    still waiting to go out, so a slow connection can't use up memory. A
+    UDP player that hasn't sent anything for `timeout` seconds has left.
+
+    Spectators are sent something every `spectator_every` ticks, with a
+    keyframe at least every `keyframe_every` ticks. Ones with more than
+    `keyframes_only_backlog` bytes waiting only get keyframes.
+    """
+
+    def __init__(
+        self,
+        tick_rate=120,
+        seed=None,
+        max_backlog=16384,
+        timeout=5.0,
+        spectator_every=2,
+        keyframe_every=30,
+        keyframes_only_backlog=1024,
+        **settings,
+    ):
+        self.tick_rate = tick_rate
+        self.spectator_every = spectator_every
+        self.keyframe_every = keyframe_every
+        self.keyframes_only_backlog = keyframes_only_backlog
+        self.settings = complete_settings(settings)
+        self.rng = random.Random(seed)
+        self.max_backlog = max_backlog
+        self.timeout = timeout
+        # Matches waiting for a second player by name, and the ones being
+        # played
+        self.waiting = {}
+        self.matches = []
+        self.udp_players = {}
+        self.servers = []
+        # How long each tick takes for all the matches, in seconds
+        self.tick_times = Histogram()
+
+    async def start(self, host="127.0.0.1", tcp_port=None, udp_port=None):
+        """
+        Starts listening and returns the (tcp port, udp port) being used,
+        which helps when they're given as 0 to pick any free port
+        """
+        loop = asyncio.get_running_loop()
+        ports = [None, None]
+        if tcp_port is not None:
+            server = await asyncio.start_server(self._serve_stream, host, tcp_port)
+            self.servers.append(server)
+            ports[0] = server.sockets[0].getsockname()[1]
+        if udp_port is not None:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _ServerDatagrams(self), local_addr=(host, udp_port)
+            )
+            self.servers.append(transport)
+            ports[1] = transport.get_extra_info("sockname")[1]
+        return tuple(ports)
+
+    def close(self):
+        for server in self.servers:
+            server.close()
+
+    async def run(self):
+        """
+        Steps every match forever, catching up if the loop fell behind
+        """
+        loop = asyncio.get_running_loop()
+        tick_length = 1 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            now = loop.time()
+            if now - next_tick > 0.25:
+                # Too far behind, so drop the time instead of racing to catch up
+                next_tick = now
+            while next_tick <= now:
+                self.tick()
+                next_tick += tick_length
+            await asyncio.sleep(next_tick - loop.time())
+
+    def tick(self):
+        start = time.perf_counter()
+        now = time.monotonic()
+        max_backlog = self.max_backlog
+        # Somebody waiting for a match over UDP can go quiet too, and then
+        # shouldn't be paired with the next player to join
+        for match in list(self.waiting.values()):
+            for player in match.players + match.spectators:
+                if (
+                    player.match is match
+                    and player.can_time_out
+                    and now - player.last_heard > self.timeout
+                ):
+                    self.disconnect(player)
+        for match in list(self.matches):
+            for player in match.players:
+                if player.can_time_out and now - player.last_heard > self.timeout:
+                    self.disconnect(player)
+            if match.game.winner:
+                continue
+
+            game = match.game
+            game.step()
+            snapshot = encode_snapshot(game)
+            for player in match.players:
+                if player.backlog() <= max_backlog:
+                    player.send(snapshot)
+            if match.spectators and (
+                game.tick % self.spectator_every == 0 or game.winner
+            ):
+                self._broadcast(match, now)
+            if game.winner:
+                self._finish(match)
+        self.tick_times.record(time.perf_counter() - start)
+
+    def _broadcast(self, match, now):
+        """
+        Sends the match to everyone watching it
+        """
+        game = match.game
+        frame = None
+        keyframe = match.keyframe
+        if (
+            keyframe is not None
+            and game.tick - keyframe[1] < self.keyframe_every
+            and not game.winner
+        ):
+            frame = encode_delta(game, keyframe)
+        is_keyframe = frame is None
+        if is_keyframe:
+            frame = encode_snapshot(game, KEYFRAME)
+            match.keyframe = MESSAGES[KEYFRAME].unpack(frame)
+            for spectator in list(match.spectators):
+                if spectator.can_time_out and now - spectator.last_heard > self.timeout:
+                    self.disconnect(spectator)
+
+        # Every spectator is sent a view of the same bytes
+        frame = memoryview(frame)
+        max_backlog = self.max_backlog
+        keyframes_only = self.keyframes_only_backlog
+        for spectator in match.spectators:
+            backlog = spectator.backlog()
+            if backlog > max_backlog:
+                # It might miss a keyframe here
+                spectator.needs_keyframe = True
+            elif is_keyframe:
+                spectator.send(frame)
+                spectator.needs_keyframe = False
+            elif not spectator.needs_keyframe and backlog <= keyframes_only:
+                spectator.send(frame)
+
+    def _finish(self, match):
+        if match.started:
+            self.matches.remove(match)
+        else:
+            del self.waiting[match.name]
+        for player in match.players + match.spectators:
+            player.match = None
+            player.close()
+
+    def disconnect(self, player):
+        """
+        Removes a player. If their match had started, the other player wins.
+        """
+        match = player.match
+        if match is None:
+            return
+        if player.side == SPECTATOR:
+            match.spectators.remove(player)
+            player.match = None
+            player.close()
+            if not match.players and not match.spectators:
+                del self.waiting[match.name]
+            return
+        if match.started:
+            match.game.winner = match.game.winner or WINNER_NAMES[1 - player.side]
+            snapshot = encode_snapshot(match.game)
+            for other in match.players:
+                if other is not player:
+                    other.send(snapshot)
+        self._finish(match)
+
+    def receive(self, player, data):
+        player.last_heard = time.monotonic()
+        message = decode(data)
+        if message[0] == JOIN:
+            self._join(player, message[1])
+        elif message[0] == SPECTATE:
+            self._spectate(player, message[1])
+        elif (
+            message[0] == INPUT
+            and player.match is not None
+            and player.side in (LEFT, RIGHT)
+        ):
+            # Inputs still on their way when the match finished are dropped
+            player.match.set_direction(player, message[1], message[2])
+
+    def _join(self, player, name):
+        if player.match is None:
+            match = self.waiting.get(name)
+            if match is None:
+                match = self.waiting[name] = Match(
+                    name, self.settings, self.rng.getrandbits(64)
+                )
+            match.add(player)
+            if match.started:
+                del self.waiting[name]
+                self.matches.append(match)
+        # Also sent again if a UDP player asks again, in case it was lost
+        player.send(encode_welcome(player.side, self.tick_rate, self.settings))
+
+    def _spectate(self, player, name):
+        if player.match is None:
+            match = None
+            for playing in self.matches:
+                if playing.name == name:
+                    match = playing
+            if match is None:
+                match = self.waiting.get(name)
+            if match is None:
+                # Nobody's playing yet, so wait for the players too
+                match = self.waiting[name] = Match(
+                    name, self.settings, self.rng.getrandbits(64)
+                )
+            match.watch(player)
+        player.send(encode_welcome(player.side, self.tick_rate, self.settings))
+
+    async def _serve_stream(self, reader, writer):
+        transport = writer.transport
+        player = Player(
+            writer.write, writer.close, backlog=transport.get_write_buffer_size
+        )
+        buffer = bytearray()
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                buffer += data
+                for message in split_messages(buffer):
+                    self.receive(player, message)
+        except (ConnectionError, ProtocolError):
+            pass
+        finally:
+            self.disconnect(player)
+            writer.close()
+
+
+class _ServerDatagrams(asyncio.DatagramProtocol):
+    def __init__(self, server):
+        self.server = server
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        server = self.server
+        player = server.udp_players.get(addr)
+        if player is None:
+            if data[:1] not in (bytes([JOIN]), bytes([SPECTATE])):
+                # Probably from a player whose match has finished
+                return
+            transport = self.transport
+            player = Player(
+                lambda message: transport.sendto(message, addr),
+                lambda: server.udp_players.pop(addr, None),
+                can_time_out=True,
+            )
+            server.udp_players[addr] = player
+        try:
+            server.receive(player, data)
+        except ProtocolError:
+            pass
+
+
+async def play_bot(client, seconds):
+    """
+    Moves the client's paddle towards the ball until the match ends or
+    `seconds` have passed, and returns the last snapshot
+    """
+    side = client.side
+    height = client.settings["paddle_height"]
+    snapshot = client.snapshot
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            latest = await asyncio.wait_for(client.next_snapshot(), 5)
+        except asyncio.TimeoutError:
+            # The last snapshot of a UDP match can get lost
+            latest = None
+        if latest is None:
+            return snapshot
+        snapshot = latest
+        _, _, _, ball_y, _, _, left_y, right_y, winner = snapshot
+        if winner:
+            return snapshot
+        paddle_y = left_y if side == LEFT else right_y
+        distance = ball_y - paddle_y
+        direction = 0 if abs(distance) < height / 4 else (1 if distance > 0 else -1)
+        if direction != client.direction:
+            client.send_direction(direction)
+    return snapshot
+
+
+async def watch(client):
+    """
+    Counts the snapshots a spectating client gets until the match ends or
+    the client is closed
+    """
+    count = 0
+    while True:
+        snapshot = await client.next_snapshot()
+        if snapshot is None or snapshot[-1]:
+            return count
+        count += 1
+
+
+async def run_loopback(
+    matches, seconds=10, spectators=0, slow_spectators=0, tick_rate=120, **settings
+):
+    """
+    Starts a server on this computer and plays `matches` bot matches on
+    it at once for up to `seconds`, every other one over UDP.
+
+    `spectators` are spread over the matches, and so are `slow_spectators`,
+    which never read anything. Returns the server, the last snapshot from
+    each match and how many snapshots each spectator got.
+    """
+    server = GameServer(tick_rate=tick_rate, seed=0, **settings)
+    tcp_port, udp_port = await server.start("127.0.0.1", tcp_port=0, udp_port=0)
+    ticker = asyncio.create_task(server.run())
+    try:
+        watchers = []
+        for number in range(spectators):
+            udp = number % 2 == 1
+            port = udp_port if udp else tcp_port
+            watcher = await Client.connect(
+                "127.0.0.1", port, f"match{number % matches}", udp, spectate=True
+            )
+            watchers.append((watcher, asyncio.create_task(watch(watcher))))
+        slow = []
+        for number in range(slow_spectators):
+            _, writer = await asyncio.open_connection("127.0.0.1", tcp_port)
+            writer.write(encode_join(f"match{number % matches}", SPECTATE))
+            slow.append(writer)
+
+        clients = []
+        for number in range(matches):
+            udp = number % 2 == 1
+            port = udp_port if udp else tcp_port
+            for _ in range(2):
+                clients.append(
+                    await Client.connect("127.0.0.1", port, f"match{number}", udp=udp)
+                )
+        results = await asyncio.gather(
+            *(play_bot(client, seconds) for client in clients)
+        )
+        for client in clients:
+            client.close()
+        for watcher, _ in watchers:
+            watcher.close()
+        watched = [await task for _, task in watchers]
+        for writer in slow:
+            writer.close()
+        # Give the server a moment to see the connections close
+        await asyncio.sleep(0.1)
+        return server, results[::2], watched
+    finally:
+        ticker.cancel()
+        server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a pong game server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--tcp-port", type=int, default=5000)
+    parser.add_argument("--udp-port", type=int, default=5000)
+    parser.add_argument("--tick-rate", type=float, default=120)
+    parser.add_argument(
+        "--loopback",
+        type=int,
+        metavar="MATCHES",
+        help="play this many bot matches on this computer and exit",
+    )
+    parser.add_argument(
+        "--seconds", type=float, default=10, help="longest to play --loopback for"
+    )
+    parser.add_argument(
+        "--spectators", type=int, default=0, help="how many watch the --loopback matches"
+    )
+    parser.add_argument(
+        "--slow-spectators",
+        type=int,
+        default=0,
+        help="how many more watch without ever reading anything",
+    )
+    args = parser.parse_args(argv)
+
+    # The same settings as pong.py, with speeds in pixels per tick
+    settings = {
+        "paddle_speed": 600 / args.tick_rate,
+        "speed_min": 150 / args.tick_rate,
+        "speed_max": 400 / args.tick_rate,
+    }
+
+    if args.loopback:
+        server, results, watched = asyncio.run(
+            run_loopback(
+                args.loopback,
+                args.seconds,
+                args.spectators,
+                args.slow_spectators,
+                tick_rate=args.tick_rate,
+                **settings,
+            )
+        )
+        ticks = sum(snapshot[1] for snapshot in results if snapshot)
+        finished = sum(1 for snapshot in results if snapshot and snapshot[-1])
+        times = server.tick_times
+        print(
+            f"{finished}/{args.loopback} matches won, {ticks} match ticks. "
+            f"Server ticks took {times.percentile(50) * 1000:.3f} ms "
+            f"(p99 {times.percentile(99) * 1000:.3f} ms, "
+            f"budget {1000 / args.tick_rate:.3f} ms)"
+        )
+        if watched:
+            print(
+                f"{len(watched)} spectators got {sum(watched)} snapshots "
+                f"(fewest {min(watched)}, most {max(watched)})"
+            )
+        return
+
+    async def serve():
+        server = GameServer(tick_rate=args.tick_rate, **settings)
+        await server.start(args.host, args.tcp_port, args.udp_port)
+        print(f"Listening on TCP {args.tcp_port} and UDP {args.udp_port}")
+        await server.run()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+The settings for the game in a window, which `pong headless` and the
+sweep use too. This doesn't import anything, so they can be used without
+loading the window's modules.
+"""
+
+# How many times a second the ball and paddles are updated
+TICKS_PER_SECOND = 120
+
+# The speeds are in pixels per second
+SETTINGS = {
+    "width": 700,
+    "height": 650,
+    "ball_radius": 50,
+    "paddle_height": 200,
+    "paddle_width": 30,
+    # How much the paddles move when the keys are pressed
+    "paddle_movement": 15,
+    # How fast the paddles move while the keys are held down
+    "paddle_speed": 600,
+    # To randomly choose a speed for the ball
+    "speed_min": 150,
+    "speed_max": 400,
+}
+
+# The settings that are speeds, which the game wants in pixels per tick
+SPEEDS = ("paddle_speed", "speed_min", "speed_max")
+
+
+def game_settings(tick_rate=TICKS_PER_SECOND):
+    """
+    SETTINGS as Game arguments: the game moves the ball and paddles a
+    little bit every tick
+    """
+    return {
+        name: value / tick_rate if name in SPEEDS else value
+        for name, value in SETTINGS.items()
+    }
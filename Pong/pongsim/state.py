@@ -0,0 +1,179 @@
+"""
+A fixed-size binary copy of everything about a game that changes while
+it's played.
+
+Every state is SIZE bytes laid out as in FIELDS, little-endian, with the
+numbers lined up on multiples of their own size:
+
+    magic b"PNGS", version, winner (0 for nobody, 1 left, 2 right)
+    each paddle's direction
+    tick
+    whether the ball is bouncing
+    the ball's position, speed, radius and sides
+    for each paddle: its position and the ends of its three edges
+
+Games only end with one goal, so the winner is the whole score.
+
+Because every state is the same size, lots of them can sit one after
+another in a bytearray, a file or shared memory, and pack_into() and
+unpack_into() read and write them in place without copying anything else.
+Rollback keeps its saved ticks like this, and with NumPy, dtype() reads a
+buffer of states as an array (see BatchGames.states()).
+
+The sizes of the game (its width, the paddles' height and so on) aren't
+part of the state, so a state has to be put into a game made with the same
+settings.
+"""
+
+import struct
+
+MAGIC = b"PNGS"
+VERSION = 1
+
+WINNERS = (None, "Left player", "Right player")
+WINNER_CODES = {winner: code for code, winner in enumerate(WINNERS)}
+
+_BALL = ("pos_x", "pos_y", "xspeed", "yspeed", "radius")
+_BOUNDS = ("top_y", "bottom_y", "left_x", "right_x")
+_EDGES = ("main", "bottom", "top")
+_ENDS = ("start_x", "start_y", "end_x", "end_y")
+
+# (name, struct format) in the order they're stored in
+FIELDS = (
+    [
+        ("magic", "4s"),
+        ("version", "B"),
+        ("winner", "b"),
+        ("left_direction", "b"),
+        ("right_direction", "b"),
+        ("tick", "Q"),
+        ("is_bouncing", "?"),
+        ("padding", "7x"),
+    ]
+    + [(f"ball_{name}", "d") for name in _BALL + _BOUNDS]
+    + [
+        (f"{side}_{name}", "d")
+        for side in ("left", "right")
+        for name in ["pos_y"]
+        + [f"{edge}_{end}" for edge in _EDGES for end in _ENDS]
+    ]
+)
+
+LAYOUT = struct.Struct("<" + "".join(fmt for _, fmt in FIELDS))
+SIZE = LAYOUT.size
+
+
+class StateError(ValueError):
+    """
+    Raised when a buffer doesn't hold a state this version can read
+    """
+
+
+def pack_into(game, buffer, offset=0):
+    """
+    Writes the game's state into `buffer` at `offset`
+    """
+    ball = game.ball
+    left = game.left_paddle
+    right = game.right_paddle
+    l_main, l_bottom, l_top = left.edges
+    r_main, r_bottom, r_top = right.edges
+    LAYOUT.pack_into(
+        buffer, offset,
+        MAGIC, VERSION, WINNER_CODES[game.winner], left.direction, right.direction,
+        game.tick, ball.is_bouncing,
+        ball.pos_x, ball.pos_y, ball.xspeed, ball.yspeed, ball.radius,
+        ball.top_y, ball.bottom_y, ball.left_x, ball.right_x,
+        left.pos_y,
+        l_main.start_x, l_main.start_y, l_main.end_x, l_main.end_y,
+        l_bottom.start_x, l_bottom.start_y, l_bottom.end_x, l_bottom.end_y,
+        l_top.start_x, l_top.start_y, l_top.end_x, l_top.end_y,
+        right.pos_y,
+        r_main.start_x, r_main.start_y, r_main.end_x, r_main.end_y,
+        r_bottom.start_x, r_bottom.start_y, r_bottom.end_x, r_bottom.end_y,
+        r_top.start_x, r_top.start_y, r_top.end_x, r_top.end_y,
+    )
+
+
+def pack(game):
+    """
+    Returns the game's state as bytes
+    """
+    buffer = bytearray(SIZE)
+    pack_into(game, buffer)
+    return bytes(buffer)
+
+
+def unpack_into(game, buffer, offset=0):
+    """
+    Puts the state in `buffer` at `offset` into `game`
+    """
+    if len(buffer) - offset < SIZE:
+        raise StateError(f"a state needs {SIZE} bytes")
+    (
+        magic, version, winner, left_direction, right_direction, game.tick,
+        bouncing, *numbers,
+    ) = LAYOUT.unpack_from(buffer, offset)
+    if magic != MAGIC:
+        raise StateError("not a game state")
+    if version != VERSION:
+        raise StateError(f"can't read version {version} states")
+    game.winner = WINNERS[winner]
+
+    ball = game.ball
+    (
+        ball.pos_x, ball.pos_y, ball.xspeed, ball.yspeed, ball.radius,
+        ball.top_y, ball.bottom_y, ball.left_x, ball.right_x,
+    ) = numbers[:9]
+    ball.is_bouncing = bouncing
+
+    start = 9
+    for paddle, direction in (
+        (game.left_paddle, left_direction),
+        (game.right_paddle, right_direction),
+    ):
+        paddle.direction = direction
+        paddle.pos_y = numbers[start]
+        ends = start + 1
+        for edge in paddle.edges:
+            edge.start_x, edge.start_y, edge.end_x, edge.end_y = numbers[ends : ends + 4]
+            ends += 4
+        start = ends
+
+
+def save(game, path):
+    with open(path, "wb") as file:
+        file.write(pack(game))
+
+
+def load(path, game):
+    """
+    Puts the state saved in `path` into `game`
+    """
+    with open(path, "rb") as file:
+        unpack_into(game, file.read())
+
+
+def dtype():
+    """
+    The NumPy dtype of one state, for reading a buffer full of them with
+    np.frombuffer() without copying it. This needs NumPy.
+    """
+    import numpy as np
+
+    fields = []
+    offset = 0
+    for name, fmt in FIELDS:
+        size = struct.calcsize("<" + fmt)
+        if name != "padding":
+            kind = "S4" if fmt == "4s" else "<" + {"?": "b1"}.get(fmt, fmt)
+            fields.append((name, kind, offset))
+        offset += size
+    return np.dtype(
+        {
+            "names": [name for name, _, _ in fields],
+            "formats": [kind for _, kind, _ in fields],
+            "offsets": [offset for _, _, offset in fields],
+            "itemsize": SIZE,
+        }
+    )
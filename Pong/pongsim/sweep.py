@@ -0,0 +1,275 @@
+"""
+Plays lots of games with different settings to help balance the game.
+
+Every combination of the given settings is played `--games` times without
+a window, with both paddles controlled by the computer, spread over all the
+CPUs. Each game's result is written as soon as it finishes:
+
+* the settings it was played with and its seed
+* winner: 0 if nobody won before --max-ticks, 1 for the left player and 2
+  for the right player
+* ticks: how long the game lasted
+* paddle_hits: how many times the ball was hit back (the rally length)
+* bounces: how many ticks the ball bounced off anything
+
+Results go in a directory with one file per column, so a single setting or
+result can be read without reading the rest:
+
+    python -m pongsim.sweep results --speed-max 300 400 500 --paddle-height 100 200
+    python -m pongsim.sweep results --players scripted --games 10
+
+A sweep replaces any results already in the directory, unless it's given
+--append. read_columns() loads them back, and each column can also be read
+with numpy.fromfile() using the types in columns.json.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from array import array
+
+from .ai import DIFFICULTIES, InterceptAI
+from .assets import ScriptedGame
+from .physics import Game
+from .settings import SETTINGS, SPEEDS
+
+# The settings that can be swept and their defaults, the same as the real
+# game. The ball and paddle speeds are in pixels per second.
+DEFAULTS = {
+    name: SETTINGS[name]
+    for name in (
+        "speed_min",
+        "speed_max",
+        "ball_radius",
+        "paddle_height",
+        "paddle_width",
+        "paddle_movement",
+        "paddle_speed",
+    )
+}
+
+# Each column and its array typecode
+COLUMNS = [(name, "d") for name in DEFAULTS] + [
+    ("seed", "q"),
+    ("winner", "b"),
+    ("ticks", "q"),
+    ("paddle_hits", "q"),
+    ("bounces", "q"),
+]
+
+# The NumPy names for the typecodes, always little-endian
+_NUMPY_TYPES = {"d": "<f8", "q": "<i8", "b": "i1"}
+_TYPECODES = {value: key for key, value in _NUMPY_TYPES.items()}
+
+WINNERS = {None: 0, "Left player": 1, "Right player": 2}
+
+
+class ColumnWriter:
+    """
+    Writes rows to a directory of column files, saving every `flush_rows`
+    rows so results aren't lost if the sweep is stopped.
+
+    Any results already in the directory are replaced, unless `append` is
+    true. Then the rows are added after them, as long as they have the
+    same columns, and ValueError is raised if they don't.
+    """
+
+    def __init__(self, path, columns=COLUMNS, flush_rows=1000, append=False):
+        os.makedirs(path, exist_ok=True)
+        self.columns = columns
+        self.flush_rows = flush_rows
+        types = {name: _NUMPY_TYPES[typecode] for name, typecode in columns}
+        types_path = os.path.join(path, "columns.json")
+        if append and os.path.exists(types_path):
+            with open(types_path) as file:
+                if json.load(file) != types:
+                    raise ValueError(
+                        f"{path} has results with different columns to add to"
+                    )
+        self.buffers = {name: array(typecode) for name, typecode in columns}
+        mode = "ab" if append else "wb"
+        self.files = {
+            name: open(os.path.join(path, name + ".bin"), mode) for name, _ in columns
+        }
+        self.rows = 0
+        with open(types_path, "w") as file:
+            json.dump(types, file, indent=2)
+
+    def append(self, row):
+        for name, buffer in self.buffers.items():
+            buffer.append(row[name])
+        self.rows += 1
+        if self.rows % self.flush_rows == 0:
+            self.flush()
+
+    def flush(self):
+        for name, buffer in self.buffers.items():
+            file = self.files[name]
+            if sys.byteorder != "little":
+                buffer.byteswap()
+            buffer.tofile(file)
+            file.flush()
+            del buffer[:]
+
+    def close(self):
+        self.flush()
+        for file in self.files.values():
+            file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_columns(path):
+    """
+    Loads the results in `path` as a dict of arrays, one for each column
+    """
+    with open(os.path.join(path, "columns.json")) as file:
+        types = json.load(file)
+    columns = {}
+    for name, numpy_type in types.items():
+        values = array(_TYPECODES[numpy_type])
+        with open(os.path.join(path, name + ".bin"), "rb") as file:
+            values.frombytes(file.read())
+        if sys.byteorder != "little":
+            values.byteswap()
+        columns[name] = values
+    return columns
+
+
+def play_one(
+    settings, seed, players="ai", difficulty="medium", max_ticks=10_000, tick_rate=120
+):
+    """
+    Plays one game with `settings` (the names in DEFAULTS) and returns its
+    row of results. The computer players hold keys down, so their paddles
+    glide at paddle_speed. Scripted players tap them instead, moving them
+    paddle_movement pixels a tick.
+    """
+    rng = random.Random(seed)
+    game = Game(
+        rng=rng,
+        **{
+            name: value / tick_rate if name in SPEEDS else value
+            for name, value in settings.items()
+        },
+    )
+    if players == "scripted":
+        step = ScriptedGame(game).step
+        deciders = ()
+    else:
+        step = game.step
+        deciders = [
+            InterceptAI(game, paddle, rng=rng, **DIFFICULTIES[difficulty])
+            for paddle in (game.left_paddle, game.right_paddle)
+        ]
+
+    ball = game.ball
+    paddle_hits = 0
+    bounces = 0
+    for _ in range(max_ticks):
+        for decider in deciders:
+            decider.decide()
+        going_right = ball.xspeed > 0
+        if step():
+            break
+        if ball.is_bouncing:
+            bounces += 1
+            if (ball.xspeed > 0) != going_right:
+                paddle_hits += 1
+
+    row = dict(settings)
+    row.update(
+        seed=seed,
+        winner=WINNERS[game.winner],
+        ticks=game.tick,
+        paddle_hits=paddle_hits,
+        bounces=bounces,
+    )
+    return row
+
+
+def _play(task):
+    settings, seed, options = task
+    return play_one(settings, seed, **options)
+
+
+def grid(values):
+    """
+    Every combination of `values`, which maps each setting to a list
+    """
+    names = list(values)
+    for combination in itertools.product(*(values[name] for name in names)):
+        yield dict(zip(names, combination))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("output", help="directory to write the results into")
+    for name, default in DEFAULTS.items():
+        parser.add_argument(
+            "--" + name.replace("_", "-"),
+            type=float,
+            nargs="+",
+            default=[default],
+            metavar="VALUE",
+        )
+    parser.add_argument("--games", type=int, default=1, help="games per combination")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--players", choices=("ai", "scripted"), default="ai")
+    parser.add_argument("--difficulty", choices=DIFFICULTIES, default="medium")
+    parser.add_argument("--max-ticks", type=int, default=10_000)
+    parser.add_argument("--tick-rate", type=float, default=120)
+    parser.add_argument(
+        "--workers", type=int, help="how many processes to use (default: all CPUs)"
+    )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="add to the results already in the directory instead of replacing them",
+    )
+    args = parser.parse_args(argv)
+
+    values = {name: getattr(args, name) for name in DEFAULTS}
+    options = {
+        "players": args.players,
+        "difficulty": args.difficulty,
+        "max_ticks": args.max_ticks,
+        "tick_rate": args.tick_rate,
+    }
+    total = args.games
+    for settings_values in values.values():
+        total *= len(settings_values)
+    # Every combination gets the same seeds, so they're compared on the
+    # same starting ball speeds
+    tasks = (
+        (settings, args.seed + game, options)
+        for settings in grid(values)
+        for game in range(args.games)
+    )
+
+    start = time.perf_counter()
+    done = 0
+    try:
+        writer = ColumnWriter(args.output, append=args.append)
+    except ValueError as error:
+        parser.error(str(error))
+    with multiprocessing.Pool(args.workers) as pool, writer:
+        for row in pool.imap_unordered(_play, tasks, chunksize=16):
+            writer.append(row)
+            done += 1
+            if done % 1000 == 0 or done == total:
+                elapsed = time.perf_counter() - start
+                print(f"{done}/{total} games ({done / elapsed:,.0f} games/s)")
+
+
+if __name__ == "__main__":
+    main()
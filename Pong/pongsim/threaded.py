@@ -0,0 +1,205 @@
+"""
+Runs the physics on a thread of its own, so drawing can't slow it down.
+
+FixedStepLoop steps the game and draws it on tkinter's thread, so while
+tkinter is busy (redrawing a big window, or stuck while the window is
+dragged on some systems) the game stops, then has to catch up or slow
+down. ThreadedLoop steps the game on a worker thread at its own fixed
+rate instead. After every tick the worker publishes where everything is
+into one of two buffers, and tkinter's thread draws from the other.
+
+Nothing is locked. The worker only ever writes into the buffer that
+isn't the newest, and counts how many states it has started and finished
+writing. The reader copies the newest buffer and checks the counts
+afterwards. If the worker has started overwriting that buffer in the
+meantime, the reader copies it again. Drawing then uses the copy, so the
+worker never waits for it.
+
+Key presses go the other way through a deque, which is safe to append to
+from one thread and pop from another, and are passed to the game just
+before the next tick.
+"""
+
+import collections
+import struct
+import threading
+import time
+
+from .loop import lerp_positions
+from .state import WINNER_CODES, WINNERS
+
+# The tick, when it finished, the positions before and after it, and the
+# winner
+RENDER_STATE = struct.Struct("<Qd4d4db")
+
+class ThreadedLoop:
+    """
+    Steps `game` at `tick_rate` ticks per second on a worker thread, and
+    draws it with `renderer` about `frame_rate` times a second on tkinter's
+    thread.
+
+    Send key presses with press() from any thread; each is passed to
+    `game_press` (the game's press() by default) on the worker thread. If
+    `before_step` is given, it's called on the worker thread before every
+    tick (for a computer player), and `before_frame` is called on tkinter's
+    thread before every frame (for HeldKeys.sync()).
+
+    If `timer` (a metrics.FrameTimer) is given, every frame records how
+    long drawing, tkinter's redraw and the whole frame took, and the
+    worker records how long each tick took as "physics". Each histogram is
+    only written to by one thread.
+    """
+
+    def __init__(
+        self,
+        root,
+        game,
+        renderer,
+        tick_rate=240,
+        frame_rate=60,
+        max_steps=8,
+        on_finish=None,
+        clock=time.perf_counter,
+        timer=None,
+        before_step=None,
+        before_frame=None,
+        game_press=None,
+    ):
+        self.root = root
+        self.game = game
+        self.renderer = renderer
+        self.tick_length = 1 / tick_rate
+        self.frame_ms = max(1, round(1000 / frame_rate))
+        # The most ticks to run at once when the worker has fallen behind
+        self.max_steps = max_steps
+        self.on_finish = on_finish
+        self.clock = clock
+        self.timer = timer
+        self.before_step = before_step
+        self.before_frame = before_frame
+        self.game_press = game_press or game.press
+
+        self.presses = collections.deque()
+        self.buffers = [bytearray(RENDER_STATE.size) for _ in range(2)]
+        # How many states the worker has started and finished writing. The
+        # newest finished one is in buffers[published % 2].
+        self.started = 0
+        self.published = 0
+        self._publish(game.positions(), game.positions())
+        # How many times the reader had to copy a buffer again
+        self.retries = 0
+        self.stopping = threading.Event()
+        self.thread = None
+        self.after_id = None
+        # When (by `clock`) the first frame was drawn
+        self.first_frame_time = None
+
+    def press(self, action):
+        """
+        Passes `action` to the game before its next tick. This can be
+        called from any thread.
+        """
+        self.presses.append(action)
+
+    def start(self):
+        self.stopping.clear()
+        self.thread = threading.Thread(
+            target=self._run, name="pong physics", daemon=True
+        )
+        self.thread.start()
+        self.after_id = self.root.after(self.frame_ms, self._frame)
+
+    def stop(self):
+        self.stopping.set()
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _publish(self, previous, positions):
+        game = self.game
+        self.started += 1
+        RENDER_STATE.pack_into(
+            self.buffers[self.started % 2],
+            0,
+            game.tick,
+            self.clock(),
+            *previous,
+            *positions,
+            WINNER_CODES[game.winner],
+        )
+        self.published = self.started
+
+    def _run(self):
+        game = self.game
+        clock = self.clock
+        presses = self.presses
+        timer = self.timer
+        tick_length = self.tick_length
+        next_tick = clock()
+        while not self.stopping.is_set():
+            now = clock()
+            if now - next_tick > tick_length * self.max_steps:
+                # Too far behind to catch up, so drop the extra time
+                next_tick = now
+            while next_tick <= now:
+                start = clock()
+                while presses:
+                    self.game_press(presses.popleft())
+                if self.before_step:
+                    self.before_step()
+                previous = game.positions()
+                game.step()
+                self._publish(previous, game.positions())
+                if timer:
+                    timer.record("physics", clock() - start)
+                if game.winner:
+                    return
+                next_tick += tick_length
+            self.stopping.wait(max(0.0, next_tick - clock()))
+
+    def snapshot(self):
+        """
+        Returns a copy of the newest published state: (tick, when it was
+        published, the positions before and after it, winner code)
+        """
+        while True:
+            published = self.published
+            values = RENDER_STATE.unpack_from(self.buffers[published % 2])
+            # The state after the next one goes into the same buffer
+            if self.started < published + 2:
+                return values
+            self.retries += 1
+
+    def _frame(self):
+        start = self.clock()
+        if self.before_frame:
+            self.before_frame()
+        _, published_at, *positions, winner = self.snapshot()
+        # Draw partway between the last two ticks, depending on how long
+        # ago the last one finished
+        alpha = min(1.0, (start - published_at) / self.tick_length)
+        self.renderer.draw(lerp_positions(positions[:4], positions[4:8], alpha))
+
+        if self.first_frame_time is None:
+            self.first_frame_time = self.clock()
+
+        timer = self.timer
+        if timer:
+            draw_done = self.clock()
+            # Get tkinter to redraw now, so its time can be measured
+            self.root.update_idletasks()
+            tk_done = self.clock()
+            timer.record("draw", draw_done - start)
+            timer.record("tk", tk_done - draw_done)
+            timer.record("frame", tk_done - start)
+
+        if winner:
+            self.after_id = None
+            self.thread.join()
+            if self.on_finish:
+                self.on_finish(WINNERS[winner])
+        else:
+            self.after_id = self.root.after(self.frame_ms, self._frame)
@@ -0,0 +1,126 @@
+import os
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pongsim.batch import LEFT_PLAYER, NO_WINNER, RIGHT_PLAYER, BatchGames
+
+STEP5 = os.path.join(os.path.dirname(__file__), "..", "Step5_FinishingTouches.py")
+
+
+class Canvas:
+    """
+    Just enough of a tkinter canvas for Step5's classes, which draw as they
+    go
+    """
+
+    def create_rectangle(self, *args, **kwargs):
+        return 0
+
+    def create_oval(self, *args, **kwargs):
+        return 0
+
+    def move(self, *args):
+        pass
+
+
+def step5_classes():
+    """
+    Step5's Paddle, Ball and StraightLine, without running the game at the
+    bottom of the file
+    """
+    with open(STEP5) as file:
+        source = file.read()
+    source = source[: source.index("def find_winner")]
+    namespace = {"canvas": Canvas(), "canvas_height": 650}
+    exec(compile(source, STEP5, "exec"), namespace)
+    return namespace
+
+
+class Step5Game:
+    def __init__(self, classes, xspeed, yspeed):
+        StraightLine = classes["StraightLine"]
+        Paddle = classes["Paddle"]
+        self.top_wall = StraightLine(0, 0, 700, 0, position="top", is_wall=True)
+        self.bottom_wall = StraightLine(
+            0, 650, 700, 650, position="bottom", is_wall=True
+        )
+        self.left_wall = StraightLine(0, 0, 0, 650, position="left", is_wall=True)
+        self.right_wall = StraightLine(
+            700, 0, 700, 650, position="right", is_wall=True
+        )
+        self.left_paddle = Paddle(200, 30, 15, 325, "blue", 15, is_on_left=True)
+        self.right_paddle = Paddle(200, 30, 685, 325, "red", 15, is_on_left=False)
+        self.ball = classes["Ball"](
+            350,
+            325,
+            50,
+            xspeed,
+            yspeed,
+            [
+                self.top_wall,
+                self.bottom_wall,
+                self.left_paddle.main_edge,
+                self.right_paddle.main_edge,
+            ],
+        )
+        self.winner = NO_WINNER
+
+    def step(self):
+        """
+        One time round Step5's main loop
+        """
+        if self.winner:
+            return
+        if self.ball.should_bounce(self.left_wall):
+            self.winner = RIGHT_PLAYER
+        elif self.ball.should_bounce(self.right_wall):
+            self.winner = LEFT_PLAYER
+        self.ball.update()
+
+
+def test_matches_step5_exactly():
+    rng = random.Random(5)
+    count = 300
+    xspeeds = [rng.uniform(0.5, 6) * rng.choice((-1, 1)) for _ in range(count)]
+    yspeeds = [rng.uniform(0.5, 6) * rng.choice((-1, 1)) for _ in range(count)]
+    classes = step5_classes()
+    games = [Step5Game(classes, x, y) for x, y in zip(xspeeds, yspeeds)]
+    batch = BatchGames(count, np.array(xspeeds), np.array(yspeeds))
+
+    for _ in range(3000):
+        left = [rng.choice((-1, 0, 0, 0, 1)) for _ in range(count)]
+        right = [rng.choice((-1, 0, 0, 0, 1)) for _ in range(count)]
+        batch.move_paddles(np.array(left), np.array(right))
+        for game, left_move, right_move in zip(games, left, right):
+            for paddle, move in (
+                (game.left_paddle, left_move),
+                (game.right_paddle, right_move),
+            ):
+                if move < 0:
+                    paddle.move_up(None)
+                elif move > 0:
+                    paddle.move_down(None)
+            game.step()
+        batch.step()
+
+    assert batch.x.tolist() == [game.ball.pos_x for game in games]
+    assert batch.y.tolist() == [game.ball.pos_y for game in games]
+    assert batch.xspeed.tolist() == [game.ball.xspeed for game in games]
+    assert batch.left_y.tolist() == [game.left_paddle.pos_y for game in games]
+    assert batch.right_y.tolist() == [game.right_paddle.pos_y for game in games]
+    assert batch.winner.tolist() == [game.winner for game in games]
+    assert (batch.winner != NO_WINNER).any()
+
+
+def test_states_round_trip():
+    rng = np.random.default_rng(1)
+    batch = BatchGames(50, rng.uniform(-5, 5, 50), rng.uniform(-5, 5, 50))
+    batch.run(200)
+    copy = BatchGames(50, 0.0, 0.0)
+    copy.load_states(batch.states())
+
+    for name in ("x", "y", "xspeed", "yspeed", "left_top", "right_bottom", "winner"):
+        assert getattr(copy, name).tolist() == getattr(batch, name).tolist()
@@ -0,0 +1,36 @@
+import tracemalloc
+
+import pytest
+
+from pongsim import bench
+
+
+def measure(name, ticks=2000):
+    scenario = bench.Scenario(0, ticks)
+    ball, paddles = bench.build(name, scenario, repo=None)
+    return bench.measure_allocations(ball, paddles, scenario.presses, ticks)
+
+
+@pytest.mark.parametrize("name", ("pongsim-sampled", "pongsim-swept"))
+def test_measures_allocations_without_reset_peak(name, monkeypatch):
+    expected, _ = measure(name)
+    # Like on Python 3.8
+    monkeypatch.delattr(tracemalloc, "reset_peak")
+
+    allocated, _ = measure(name)
+    assert allocated == expected
+    assert not tracemalloc.is_tracing()
+
+
+def test_counts_what_a_tick_allocates():
+    class Ball:
+        def __init__(self):
+            self.kept = []
+
+        def update(self):
+            self.kept.append(bytearray(1000))
+
+    allocated, kept = bench.measure_allocations(Ball(), {}, {}, 100)
+
+    assert allocated >= 1000
+    assert kept >= 1
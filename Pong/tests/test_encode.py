@@ -0,0 +1,150 @@
+import io
+import random
+import struct
+import zlib
+
+from pongsim.encode import GifWriter, write_png
+from pongsim.physics import Game
+from pongsim.raster import Framebuffer, SceneRasterizer
+
+
+def lzw_decompress(data, min_code_size):
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+    out = bytearray()
+    bits = int.from_bytes(data, "little")
+    position = 0
+    code_size = min_code_size + 1
+    table = None
+    previous = None
+    while True:
+        code = bits >> position & ((1 << code_size) - 1)
+        position += code_size
+        if code == clear_code:
+            table = [bytes([i]) for i in range(clear_code)] + [b"", b""]
+            code_size = min_code_size + 1
+            previous = None
+            continue
+        if code == end_code:
+            return bytes(out)
+        if previous is None:
+            entry = table[code]
+        else:
+            if code < len(table):
+                entry = table[code]
+            else:
+                entry = previous + previous[:1]
+            if len(table) < 4096:
+                table.append(previous + entry[:1])
+        out += entry
+        previous = entry
+        if len(table) == 1 << code_size and code_size < 12:
+            code_size += 1
+
+
+def read_gif(data):
+    """
+    Every frame in a GIF written by GifWriter, as (delay, pixels) with the
+    changed rectangles drawn over the frame before
+    """
+    width, height, flags = struct.unpack_from("<HHB", data, 6)
+    offset = 13 + 3 * (2 << (flags & 7))
+    canvas = None
+    delay = None
+    frames = []
+    while data[offset] != 0x3B:
+        kind = data[offset]
+        if kind == 0x21:
+            if data[offset + 1] == 0xF9:
+                (delay,) = struct.unpack_from("<H", data, offset + 4)
+            offset += 2
+            while data[offset]:
+                offset += data[offset] + 1
+            offset += 1
+            continue
+        assert kind == 0x2C
+        x, y, rect_width, rect_height, _ = struct.unpack_from("<HHHHB", data, offset + 1)
+        min_code_size = data[offset + 10]
+        offset += 11
+        compressed = bytearray()
+        while data[offset]:
+            compressed += data[offset + 1 : offset + 1 + data[offset]]
+            offset += data[offset] + 1
+        offset += 1
+        pixels = lzw_decompress(compressed, min_code_size)
+        assert len(pixels) == rect_width * rect_height
+        if canvas is None:
+            canvas = bytearray(width * height)
+        for row in range(rect_height):
+            start = (y + row) * width + x
+            canvas[start : start + rect_width] = pixels[
+                row * rect_width : (row + 1) * rect_width
+            ]
+        frames.append((delay, bytes(canvas)))
+    return frames
+
+
+def test_game_gif_round_trip():
+    game = Game(speed_min=3, speed_max=6, rng=random.Random(1))
+    rasterizer = SceneRasterizer(game)
+    out = io.BytesIO()
+    expected = []
+    writer = GifWriter(out, 700, 650, rasterizer.framebuffer.colors, fps=30)
+    for frame in range(60):
+        # Every few frames nothing moves, so that frame isn't written
+        if frame % 5:
+            game.step()
+        pixels = bytes(rasterizer.draw().pixels)
+        if not expected or expected[-1] != pixels:
+            expected.append(pixels)
+        writer.write(rasterizer.framebuffer)
+    writer.close()
+
+    frames = read_gif(out.getvalue())
+
+    assert [pixels for _, pixels in frames] == expected
+    # 60 frames at 30 fps is 2 seconds, in hundredths of a second
+    assert sum(delay for delay, _ in frames) == 200
+
+
+def test_noise_gif_round_trip():
+    # Random pixels fill up the LZW table, so it has to be cleared and
+    # started again
+    rng = random.Random(2)
+    framebuffer = Framebuffer(200, 150)
+    out = io.BytesIO()
+    expected = []
+    writer = GifWriter(out, 200, 150, framebuffer.colors)
+    for _ in range(3):
+        framebuffer.pixels[:] = bytes(rng.randrange(5) for _ in range(200 * 150))
+        expected.append(bytes(framebuffer.pixels))
+        writer.write(framebuffer)
+    writer.close()
+
+    assert [pixels for _, pixels in read_gif(out.getvalue())] == expected
+
+
+def test_png_round_trip(tmp_path):
+    rasterizer = SceneRasterizer(Game(rng=random.Random(3)))
+    framebuffer = rasterizer.draw()
+    path = tmp_path / "frame.png"
+    write_png(str(path), framebuffer)
+
+    data = path.read_bytes()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    chunks = {}
+    offset = 8
+    while offset < len(data):
+        (length,) = struct.unpack_from(">I", data, offset)
+        kind = data[offset + 4 : offset + 8]
+        chunks[kind] = data[offset + 8 : offset + 8 + length]
+        offset += length + 12
+    rows = zlib.decompress(chunks[b"IDAT"])
+    width = framebuffer.width
+    pixels = b"".join(
+        rows[y * (width + 1) + 1 : (y + 1) * (width + 1)]
+        for y in range(framebuffer.height)
+    )
+
+    assert pixels == bytes(framebuffer.pixels)
+    assert chunks[b"PLTE"] == b"".join(bytes(color) for color in framebuffer.colors)
@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from pongsim.events import ACTIONS, EventSimulator
+from pongsim.physics import Game
+
+DIRECTIONS = ("up", "down", "hold up", "hold down", "release")
+
+
+def new_game(seed):
+    return Game(
+        ball_radius=20,
+        paddle_speed=5,
+        speed_min=2,
+        speed_max=6,
+        rng=random.Random(seed),
+    )
+
+
+def random_inputs(rng, max_ticks, count):
+    return [
+        (rng.randrange(max_ticks), rng.choice(("left", "right")), rng.choice(DIRECTIONS))
+        for _ in range(count)
+    ]
+
+
+def run_ticks(game, inputs, max_ticks):
+    """
+    Steps the game tick by tick, pressing each input just before the tick
+    it's for
+    """
+    inputs = sorted(inputs, key=lambda event: event[0])
+    next_input = 0
+    for _ in range(max_ticks):
+        while next_input < len(inputs) and inputs[next_input][0] <= game.tick:
+            _, side, direction = inputs[next_input]
+            game.press(ACTIONS[side, direction])
+            next_input += 1
+        if game.step():
+            break
+    return game.winner
+
+
+def assert_same(simulated, stepped):
+    assert simulated.winner == stepped.winner
+    assert simulated.tick == stepped.tick
+    got = simulated.positions()
+    expected = stepped.positions()
+    if not stepped.winner:
+        # Once somebody has won, the simulator stops the ball where it
+        # touched the wall instead of partway through the last tick
+        assert got[:2] == pytest.approx(expected[:2], abs=1e-6)
+    assert got[2:] == pytest.approx(expected[2:], abs=1e-6)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_stepping_with_taps_and_held_keys(seed):
+    rng = random.Random(seed)
+    max_ticks = 3000
+    inputs = random_inputs(rng, max_ticks, 60)
+
+    stepped = new_game(seed)
+    run_ticks(stepped, inputs, max_ticks)
+    simulated = new_game(seed)
+    EventSimulator(simulated, inputs).advance(max_ticks)
+
+    assert_same(simulated, stepped)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_stepping_partway_through(seed):
+    rng = random.Random(seed)
+    finished = new_game(seed)
+    run_ticks(finished, random_inputs(random.Random(seed), 3000, 60), 3000)
+    # Stop before anybody wins, so the ball can be compared too
+    max_ticks = rng.randrange(1, finished.tick)
+    inputs = [
+        event
+        for event in random_inputs(random.Random(seed), 3000, 60)
+        if event[0] < max_ticks
+    ]
+
+    stepped = new_game(seed)
+    run_ticks(stepped, inputs, max_ticks)
+    simulated = new_game(seed)
+    EventSimulator(simulated, inputs).advance(max_ticks)
+
+    assert stepped.winner is None
+    assert_same(simulated, stepped)
+
+
+def test_held_key_glides_every_tick():
+    inputs = [(0, "left", "hold up"), (10, "left", "release")]
+    stepped = new_game(1)
+    run_ticks(stepped, inputs, 30)
+    simulated = new_game(1)
+    EventSimulator(simulated, inputs).advance(30)
+
+    assert simulated.left_paddle.pos_y == stepped.left_paddle.pos_y
+    assert simulated.left_paddle.pos_y == 650 / 2 - 10 * 5
+
+
+def test_advance_in_pieces_matches_one_go():
+    rng = random.Random(7)
+    inputs = random_inputs(rng, 1000, 30)
+
+    whole = new_game(7)
+    EventSimulator(whole, inputs).advance(1000)
+    pieces = new_game(7)
+    simulator = EventSimulator(pieces, inputs)
+    for _ in range(10):
+        simulator.advance(100)
+
+    assert_same(pieces, whole)
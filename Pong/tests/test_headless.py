@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from pongsim import headless
+
+
+def test_does_not_import_the_window():
+    # In a new interpreter, since other tests may have imported them
+    code = (
+        "import sys, pongsim.cli, pongsim.headless; "
+        "print(sorted({'tkinter', 'pongsim.play', 'pongsim.render'} & set(sys.modules)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.join(os.path.dirname(__file__), ".."),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_plays_games(capsys):
+    headless.main(["--games", "3", "--max-ticks", "2000"])
+
+    lines = capsys.readouterr().out.splitlines()
+    wins = sum(int(line.split(": ")[1]) for line in lines[:-1])
+    assert wins == 3
+    assert "ticks/s" in lines[-1]
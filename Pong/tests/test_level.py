@@ -0,0 +1,165 @@
+import math
+import os
+import random
+
+import pytest
+
+from pongsim.level import BVH, Level, LevelError, Segment, random_level
+from pongsim.physics import Ball, Game
+
+LEVELS = os.path.join(os.path.dirname(__file__), "..", "levels")
+
+
+def test_query_finds_exactly_the_overlapping_boxes():
+    rng = random.Random(1)
+    level = random_level(1000, rng=rng)
+    for _ in range(200):
+        min_x = rng.uniform(-50, 700)
+        min_y = rng.uniform(-50, 650)
+        max_x = min_x + rng.uniform(0, 100)
+        max_y = min_y + rng.uniform(0, 100)
+
+        found = level.bvh.query(min_x, min_y, max_x, max_y)
+
+        expected = [
+            segment
+            for segment in level.segments
+            if segment.min_x <= max_x
+            and segment.min_y <= max_y
+            and segment.max_x >= min_x
+            and segment.max_y >= min_y
+        ]
+        assert len(found) == len(set(found))
+        assert set(found) == set(expected)
+
+
+@pytest.mark.parametrize("leaf_size", (1, 4, 16))
+def test_near_has_every_segment_the_ball_hits(leaf_size):
+    rng = random.Random(leaf_size)
+    level = random_level(1000, rng=rng)
+    bvh = BVH(level.segments, leaf_size=leaf_size)
+    hits = 0
+    for _ in range(150):
+        pos_x = rng.uniform(0, 700)
+        pos_y = rng.uniform(0, 650)
+        dx = rng.uniform(-30, 30)
+        dy = rng.uniform(-30, 30)
+        radius = rng.uniform(2, 20)
+
+        near = set(bvh.near(pos_x, pos_y, dx, dy, radius))
+
+        for segment in level.segments:
+            if segment.time_of_impact(pos_x, pos_y, dx, dy, radius) is not None:
+                hits += 1
+                assert segment in near
+    assert hits > 0
+
+
+def test_empty_bvh():
+    assert BVH([]).near(0, 0, 10, 10, 5) == []
+
+
+def test_angled_segment_normal_and_bounce():
+    # A line from the top left to the bottom right, with the ball above it
+    segment = Segment(100, 100, 300, 300)
+    hit = segment.time_of_impact(250, 150, 0, 100, 10)
+
+    assert hit is not None
+    t, normal_x, normal_y = hit
+    assert 0 <= t <= 1
+    # Pointing back towards the ball's side
+    assert (normal_x, normal_y) == pytest.approx((math.sqrt(0.5), -math.sqrt(0.5)))
+    # Touching it there
+    distance = (250 - 100) * normal_x + (150 + 100 * t - 100) * normal_y
+    assert distance == pytest.approx(10)
+
+    ball = Ball(250, 150, 0, 4, 10, collide_lines=[])
+    ball.reflect(normal_x, normal_y)
+    # Falling straight down onto a 45 degree slope sends it sideways
+    assert (ball.xspeed, ball.yspeed) == pytest.approx((4, 0))
+
+
+def test_segment_from_the_other_side():
+    segment = Segment(100, 100, 300, 300)
+    t, normal_x, normal_y = segment.time_of_impact(150, 250, 0, -100, 10)
+
+    assert (normal_x, normal_y) == pytest.approx((-math.sqrt(0.5), math.sqrt(0.5)))
+
+
+def test_segment_end():
+    segment = Segment(100, 100, 200, 100)
+    t, normal_x, normal_y = segment.time_of_impact(250, 100, -100, 0, 10)
+
+    assert t == pytest.approx(0.4)
+    assert (normal_x, normal_y) == pytest.approx((1, 0))
+
+
+def test_missing_the_segment():
+    segment = Segment(100, 100, 200, 100)
+    assert segment.time_of_impact(150, 50, 40, 0, 10) is None
+    assert segment.time_of_impact(150, 50, 0, -40, 10) is None
+
+
+def new_game(seed):
+    return Game(
+        ball_radius=10,
+        paddle_height=2000,
+        speed_min=2,
+        speed_max=4,
+        rng=random.Random(seed),
+    )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bvh_game_matches_checking_every_segment(seed):
+    level = random_level(200, rng=random.Random(seed))
+    game = new_game(seed)
+    level.add_to(game)
+    linear = new_game(seed)
+    linear.ball.collide_lines = linear.ball.collide_lines + level.segments
+
+    game.run(1500)
+    linear.run(1500)
+
+    assert game.tick == linear.tick == 1500
+    assert game.positions() == linear.positions()
+
+
+def test_loads_level_file():
+    level = Level.load(os.path.join(LEVELS, "diamonds.json"))
+
+    # Four segments, a diamond and two triangles
+    assert len(level.segments) == 4 + 4 + 3 + 3
+    game = new_game(0)
+    level.add_to(game)
+    game.run(500)
+
+
+def test_sampled_game_cant_have_obstacles():
+    level = Level([Segment(0, 0, 10, 10)])
+    with pytest.raises(ValueError):
+        level.add_to(Game(swept=False))
+
+
+@pytest.mark.parametrize(
+    "data",
+    (
+        {"segments": [[10, 10, 10, 10]]},
+        {"segments": [[10, 10, 20]]},
+        {"segments": [["a", 10, 20, 20]]},
+        {"polygons": [[[0, 0], [0, 0], [0, 0]]]},
+        {"polygons": [[[0, 0], [10, 0, 5], [0, 10]]]},
+        {"polygons": [5]},
+    ),
+)
+def test_bad_obstacles(data):
+    with pytest.raises(LevelError):
+        Level.from_dict(data)
+
+
+def test_bad_json(tmp_path):
+    path = tmp_path / "level.json"
+    path.write_text('{"segments": [[0, 0, 10, 10]')
+
+    with pytest.raises(LevelError):
+        Level.load(path)
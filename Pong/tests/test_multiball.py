@@ -0,0 +1,215 @@
+import itertools
+import math
+import random
+
+import pytest
+
+from pongsim.multiball import MultiBallGame
+from pongsim.physics import Ball
+
+
+class CheckedGame(MultiBallGame):
+    """
+    Checks every tick that sweep and prune finds exactly the pairs that
+    checking every pair would
+    """
+
+    def _collide_balls(self):
+        in_play = self.in_play
+        assert all(
+            before.left_x <= after.left_x for before, after in zip(in_play, in_play[1:])
+        )
+        expected = set()
+        self.touching = set()
+        for first, second in itertools.combinations(in_play, 2):
+            if (
+                first.left_x <= second.right_x
+                and second.left_x <= first.right_x
+                and first.top_y <= second.bottom_y
+                and second.top_y <= first.bottom_y
+            ):
+                expected.add(frozenset((id(first), id(second))))
+            distance = (
+                (first.pos_x - second.pos_x) ** 2 + (first.pos_y - second.pos_y) ** 2
+            ) ** 0.5
+            if distance < first.radius + second.radius:
+                self.touching.add(frozenset((id(first), id(second))))
+        self.checked = set()
+        super()._collide_balls()
+        assert self.checked == expected
+        assert self.touching <= self.checked
+        self.ever_touched = getattr(self, "ever_touched", 0) + len(self.touching)
+
+    def _bounce_balls(self, first, second):
+        self.checked.add(frozenset((id(first), id(second))))
+        super()._bounce_balls(first, second)
+
+
+def new_game(game_class=MultiBallGame, seed=0, balls=100):
+    return game_class(
+        balls=balls,
+        ball_radius=(6, 16),
+        paddle_height=650,
+        speed_min=1,
+        speed_max=4,
+        rng=random.Random(seed),
+    )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_sweep_and_prune_checks_the_same_pairs_as_every_pair(seed):
+    game = new_game(CheckedGame, seed)
+    for _ in range(200):
+        if game.step():
+            break
+
+    assert game.ever_touched > 0
+    assert game.ball_bounces > 0
+
+
+def new_ball(pos_x, pos_y, xspeed, yspeed, radius):
+    return Ball(pos_x, pos_y, xspeed, yspeed, radius, collide_lines=[])
+
+
+def touching_pair(rng):
+    """
+    Two balls of random sizes that overlap a little and are moving towards
+    each other
+    """
+    first = new_ball(
+        300, 300, rng.uniform(-4, 4), rng.uniform(-4, 4), rng.uniform(5, 30)
+    )
+    radius = rng.uniform(5, 30)
+    distance = (first.radius + radius) * 0.9
+    normal_x = math.cos(rng.uniform(0, 2 * math.pi))
+    normal_y = math.sqrt(1 - normal_x * normal_x) * rng.choice((-1, 1))
+    # Towards the first ball along the normal, and anything across it
+    along = -rng.uniform(0.5, 3)
+    across = rng.uniform(-3, 3)
+    second = new_ball(
+        first.pos_x + distance * normal_x,
+        first.pos_y + distance * normal_y,
+        first.xspeed + along * normal_x - across * normal_y,
+        first.yspeed + along * normal_y + across * normal_x,
+        radius,
+    )
+    return first, second
+
+
+def normal_between(first, second):
+    distance = math.hypot(second.pos_x - first.pos_x, second.pos_y - first.pos_y)
+    return (
+        (second.pos_x - first.pos_x) / distance,
+        (second.pos_y - first.pos_y) / distance,
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bounce_keeps_momentum_and_reverses_along_the_normal(seed):
+    first, second = touching_pair(random.Random(seed))
+    normal_x, normal_y = normal_between(first, second)
+    masses = (first.radius**2, second.radius**2)
+
+    def along(ball):
+        return ball.xspeed * normal_x + ball.yspeed * normal_y
+
+    def across(ball):
+        return ball.yspeed * normal_x - ball.xspeed * normal_y
+
+    def momentum():
+        return [
+            sum(mass * speed(ball) for mass, ball in zip(masses, (first, second)))
+            for speed in (along, across)
+        ]
+
+    closing = along(second) - along(first)
+    assert closing < 0
+    before = momentum()
+    across_before = across(first), across(second)
+
+    new_game(balls=1)._bounce_balls(first, second)
+
+    assert momentum() == pytest.approx(before)
+    # An elastic bounce: they move apart along the normal as fast as they
+    # came together, and nothing changes across it
+    assert along(second) - along(first) == pytest.approx(-closing)
+    assert (across(first), across(second)) == pytest.approx(across_before)
+
+
+def test_balls_moving_apart_dont_bounce():
+    first = new_ball(300, 300, -1, 0, 10)
+    second = new_ball(315, 300, 1, 0, 10)
+    game = new_game(balls=1)
+
+    game._bounce_balls(first, second)
+
+    assert (first.xspeed, second.xspeed) == (-1, 1)
+    assert game.ball_bounces == 0
+
+
+def test_heavier_ball_moves_less():
+    small = new_ball(300, 300, 2, 0, 5)
+    big = new_ball(320, 300, -2, 0, 20)
+    new_game(balls=1)._bounce_balls(small, big)
+
+    assert small.xspeed < -2
+    assert abs(big.xspeed) < 2
+
+
+def two_ball_game(left_out, right_out):
+    """
+    A game with two balls, and the given number of them already past the
+    left and right walls
+    """
+    game = new_game(balls=2)
+    places = ["left"] * left_out + ["right"] * right_out + ["middle"] * 2
+    for ball, place in zip(game.balls, places):
+        x = {"left": -50, "right": game.width + 50, "middle": game.width / 2}[place]
+        ball.place(x, ball.pos_y)
+        ball.xspeed = 0
+    return game
+
+
+@pytest.mark.parametrize(
+    "left_out, right_out, winner",
+    (
+        (1, 1, "Nobody"),
+        (2, 0, "Right player"),
+        (0, 2, "Left player"),
+    ),
+)
+def test_winner_once_every_ball_has_gone(left_out, right_out, winner):
+    game = two_ball_game(left_out, right_out)
+
+    assert game.step() == winner
+    assert game.winner == winner
+
+
+def test_game_goes_on_while_a_ball_is_in_play():
+    game = two_ball_game(1, 0)
+
+    assert game.step() is None
+    assert game.scores == {"Left player": 0, "Right player": 1}
+    assert len(game.in_play) == 1
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_winner_matches_the_scores(seed):
+    game = MultiBallGame(
+        balls=4,
+        ball_radius=(6, 16),
+        paddle_height=50,
+        speed_min=2,
+        speed_max=5,
+        rng=random.Random(seed),
+    )
+    while not game.step():
+        pass
+
+    left = game.scores["Left player"]
+    right = game.scores["Right player"]
+    assert left + right == 4
+    if left == right:
+        assert game.winner == "Nobody"
+    else:
+        assert game.winner == ("Left player" if left > right else "Right player")
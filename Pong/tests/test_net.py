@@ -0,0 +1,145 @@
+import random
+
+import pytest
+
+from pongsim.net import (
+    DELTA,
+    DELTA_SCALES,
+    INPUT,
+    JOIN,
+    KEYFRAME,
+    MESSAGES,
+    RIGHT,
+    SNAPSHOT,
+    SPECTATE,
+    WELCOME,
+    WINNERS,
+    Client,
+    ProtocolError,
+    apply_delta,
+    decode,
+    encode_delta,
+    encode_input,
+    encode_join,
+    encode_snapshot,
+    encode_welcome,
+    split_messages,
+)
+from pongsim.physics import LEFT_HOLD_DOWN, Game
+from pongsim.replay import complete_settings
+
+
+def played_game(ticks):
+    game = Game(
+        ball_radius=20,
+        paddle_speed=5,
+        speed_min=2,
+        speed_max=6,
+        rng=random.Random(0),
+    )
+    game.press(LEFT_HOLD_DOWN)
+    game.run(ticks)
+    return game
+
+
+def test_messages_round_trip():
+    settings = complete_settings({"paddle_speed": 5.0})
+
+    assert decode(encode_join("lobby")) == (JOIN, "lobby")
+    assert decode(encode_join("lobby", SPECTATE)) == (SPECTATE, "lobby")
+    assert decode(encode_input(7, -1)) == (INPUT, 7, -1)
+    assert decode(encode_welcome(RIGHT, 120.0, settings)) == (
+        WELCOME,
+        RIGHT,
+        120.0,
+        {name: float(value) for name, value in settings.items()},
+    )
+
+    game = played_game(100)
+    ball = game.ball
+    assert decode(encode_snapshot(game)) == (
+        SNAPSHOT,
+        game.tick,
+        ball.pos_x,
+        ball.pos_y,
+        ball.xspeed,
+        ball.yspeed,
+        game.left_paddle.pos_y,
+        game.right_paddle.pos_y,
+        WINNERS[game.winner],
+    )
+
+
+def test_rejects_bad_messages():
+    with pytest.raises(ProtocolError):
+        decode(b"\xff" + bytes(10))
+    with pytest.raises(ProtocolError):
+        decode(encode_input(1, 0)[:-1])
+    with pytest.raises(ValueError):
+        encode_join("a match name that's too long")
+
+
+def test_split_messages_keeps_partial_ones():
+    data = encode_input(1, 1) + encode_join("lobby") + encode_input(2, 0)
+    buffer = bytearray(data[:-3])
+
+    assert split_messages(buffer) == [encode_input(1, 1), encode_join("lobby")]
+    buffer += data[-3:]
+    assert split_messages(buffer) == [encode_input(2, 0)]
+    assert buffer == b""
+
+
+def test_keyframe_and_delta_give_the_snapshot():
+    game = played_game(20)
+    keyframe = decode(encode_snapshot(game, KEYFRAME))
+    game.run(20)
+    assert not game.winner
+    delta = encode_delta(game, keyframe)
+    snapshot = decode(encode_snapshot(game))
+
+    assert len(delta) < len(encode_snapshot(game)) / 2
+    got = apply_delta(keyframe, decode(delta))
+
+    assert got[:2] == snapshot[:2]
+    assert got[-1] == snapshot[-1]
+    for value, expected, scale in zip(got[2:8], snapshot[2:8], DELTA_SCALES):
+        assert value == pytest.approx(expected, abs=0.5 / scale)
+
+
+def test_delta_from_another_keyframe_is_ignored():
+    game = played_game(20)
+    keyframe = decode(encode_snapshot(game, KEYFRAME))
+    game.run(10)
+    later_keyframe = decode(encode_snapshot(game, KEYFRAME))
+    game.run(10)
+    delta = decode(encode_delta(game, keyframe))
+
+    assert apply_delta(later_keyframe, delta) is None
+    assert apply_delta(None, delta) is None
+
+
+def test_no_delta_when_too_far_from_keyframe():
+    game = played_game(10)
+    keyframe = decode(encode_snapshot(game, KEYFRAME))
+    # Further than a 16-bit offset can reach at 16 steps a pixel
+    game.ball.pos_x += 3000
+
+    assert encode_delta(game, keyframe) is None
+
+
+def test_client_needs_a_keyframe_before_deltas():
+    game = played_game(20)
+    keyframe = encode_snapshot(game, KEYFRAME)
+    game.run(5)
+    delta = encode_delta(game, decode(keyframe))
+    assert delta[0] == DELTA
+    client = Client()
+
+    client.receive(delta)
+    assert client.snapshot is None
+
+    client.receive(keyframe)
+    assert client.snapshot[:2] == (SNAPSHOT, 20)
+    client.receive(delta)
+    assert client.snapshot[:2] == (SNAPSHOT, 25)
+    assert len(client.snapshot) == len(MESSAGES[SNAPSHOT].unpack(keyframe))
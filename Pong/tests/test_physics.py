@@ -0,0 +1,86 @@
+import math
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from pongsim.physics import (
+    LEFT_DOWN,
+    LEFT_HOLD_UP,
+    LEFT_RELEASE,
+    Game,
+    circle_time_of_impact,
+)
+
+
+def test_no_tkinter():
+    # In a new interpreter, since other tests may have imported it
+    code = "import sys, pongsim.physics; print('tkinter' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.join(os.path.dirname(__file__), ".."),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
+
+
+@pytest.mark.parametrize("swept", (True, False))
+def test_bounces_off_bottom_wall(swept):
+    game = Game(ball_radius=20, xspeed=0.5, yspeed=4, swept=swept)
+    game.run(100)
+    assert game.ball.yspeed == -4
+    assert game.ball.bottom_y <= game.height + 4
+
+
+@pytest.mark.parametrize("swept", (True, False))
+def test_bounces_off_paddle(swept):
+    game = Game(ball_radius=20, xspeed=5, yspeed=0, swept=swept)
+    game.run(100)
+    assert game.winner is None
+    assert game.ball.xspeed == -5
+
+
+@pytest.mark.parametrize("swept", (True, False))
+def test_missing_the_paddle_loses(swept):
+    game = Game(ball_radius=20, xspeed=-5, yspeed=0, swept=swept)
+    game.press(LEFT_DOWN)
+    for _ in range(20):
+        game.press(LEFT_DOWN)
+    assert game.run(1000) == "Right player"
+
+
+def test_same_seed_same_game():
+    first = Game(rng=random.Random(4))
+    second = Game(rng=random.Random(4))
+    first.run(5000)
+    second.run(5000)
+    assert first.positions() == second.positions()
+    assert first.tick == second.tick
+
+
+def test_held_paddle_stops_at_the_top():
+    game = Game(paddle_speed=5, xspeed=0.01, yspeed=0.01)
+    game.press(LEFT_HOLD_UP)
+    game.run(100)
+    assert game.left_paddle.pos_y == game.left_paddle.height / 2
+    game.press(LEFT_RELEASE)
+    game.run(1)
+    assert game.left_paddle.direction == 0
+
+
+def test_fast_ball_does_not_go_through_a_paddle():
+    game = Game(ball_radius=5, xspeed=200, yspeed=0)
+    game.run(10)
+    assert game.winner is None
+    assert game.ball.xspeed == -200
+
+
+def test_overlapping_point_gives_unit_normal():
+    # The ball is partly over the point already
+    t, normal_x, normal_y = circle_time_of_impact(3, 4, -1, -1, 10, 0, 0)
+    assert t == 0
+    assert math.hypot(normal_x, normal_y) == pytest.approx(1)
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from pongsim.physics import LEFT_UP, RIGHT_RELEASE
+from pongsim.replay import Recorder, Replay, ReplayError, ReplayPlayer
+
+SETTINGS = {"ball_radius": 20, "paddle_speed": 5, "speed_min": 2, "speed_max": 6}
+
+
+def record(seed, swept, max_ticks):
+    """
+    Plays a game with random key presses, like a player would, and
+    returns the recorder
+    """
+    rng = random.Random(seed)
+    recorder = Recorder(tick_rate=120, seed=seed, swept=swept, **SETTINGS)
+    game = recorder.game
+    for _ in range(max_ticks):
+        if rng.random() < 0.05:
+            recorder.press(rng.randint(LEFT_UP, RIGHT_RELEASE))
+        if game.step():
+            break
+    return recorder
+
+
+@pytest.mark.parametrize("swept", (True, False))
+@pytest.mark.parametrize("seed", range(25))
+def test_replay_matches_recorded_game(seed, swept):
+    recorder = record(seed, swept, 3000)
+    recorder.replay.end_tick = recorder.game.tick
+    replay = Replay.from_bytes(recorder.replay.to_bytes())
+
+    game = ReplayPlayer(replay).run()
+
+    assert game.winner == recorder.game.winner
+    assert game.tick == recorder.game.tick
+    assert game.positions() == recorder.game.positions()
+
+
+def test_stops_at_end_of_recording():
+    # Too short for anybody to win
+    recorder = record(3, True, 50)
+    assert recorder.game.winner is None
+    recorder.replay.end_tick = recorder.game.tick
+    player = ReplayPlayer(Replay.from_bytes(recorder.replay.to_bytes()))
+
+    game = player.run()
+
+    assert player.winner == "Nobody"
+    assert game.tick == recorder.game.tick
+    assert game.positions() == recorder.game.positions()
+
+
+def test_rejects_other_files():
+    with pytest.raises(ReplayError):
+        Replay.from_bytes(b"GIF89a" + bytes(100))
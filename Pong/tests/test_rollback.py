@@ -0,0 +1,160 @@
+import random
+
+import pytest
+
+from pongsim.input import ACTIONS
+from pongsim.physics import Game
+from pongsim.rollback import (
+    SIDES,
+    DelayedLink,
+    RollbackSession,
+    common_state,
+    run_harness,
+)
+from pongsim.state import SIZE, pack, unpack_into
+
+
+def new_game(seed):
+    # Paddles taller than the window, so nobody wins and every tick counts
+    return Game(
+        paddle_height=1300,
+        paddle_speed=5,
+        speed_min=2,
+        speed_max=6,
+        rng=random.Random(seed),
+    )
+
+
+def random_directions(seed, ticks):
+    """
+    Which way one player's paddle goes on every tick, changing every few
+    ticks
+    """
+    rng = random.Random(seed)
+    directions = []
+    while len(directions) < ticks:
+        directions += [rng.choice((-1, 0, 1))] * rng.randrange(1, 8)
+    return directions[:ticks]
+
+
+def play_reference(seed, directions, ticks):
+    """
+    Plays the game with both players' inputs known straight away, and
+    returns the state at the start of every tick and at the end
+    """
+    game = new_game(seed)
+    states = []
+    for tick in range(ticks):
+        states.append(pack(game))
+        for side, side_directions in zip(SIDES, directions):
+            game.press(ACTIONS[side][side_directions[tick]])
+        game.step()
+    states.append(pack(game))
+    return states
+
+
+def play_delayed(seed, directions, ticks, delay, max_rollback=10):
+    """
+    Plays a RollbackSession for each player, with each one's inputs getting
+    to the other `delay` ticks late
+    """
+    sessions = [
+        RollbackSession(new_game(seed), side, max_rollback) for side in (0, 1)
+    ]
+    links = [DelayedLink(delay), DelayedLink(delay)]
+    for now in range(ticks):
+        for side, session in enumerate(sessions):
+            for tick, direction in links[1 - side].receive(now):
+                session.add_remote_input(tick, direction)
+            direction = directions[side][now]
+            tick = session.add_local_input(direction)
+            links[side].send(now, (tick, direction))
+            assert session.advance()
+    for side, session in enumerate(sessions):
+        for tick, direction in links[1 - side].receive(float("inf")):
+            session.add_remote_input(tick, direction)
+        if session.rollback_tick is not None:
+            session._roll_back()
+    return sessions
+
+
+@pytest.mark.parametrize("delay", (1, 4, 9))
+@pytest.mark.parametrize("seed", range(5))
+def test_rollback_matches_game_without_delay(seed, delay):
+    ticks = 400
+    directions = [random_directions(seed * 2 + side, ticks) for side in (0, 1)]
+    expected = play_reference(seed, directions, ticks)
+
+    sessions = play_delayed(seed, directions, ticks, delay)
+
+    for session in sessions:
+        assert session.game.winner is None
+        assert session.rollbacks > 0
+        assert pack(session.game) == expected[-1]
+
+
+def test_saved_states_match_game_without_delay():
+    ticks = 300
+    directions = [random_directions(side, ticks) for side in (0, 1)]
+    expected = play_reference(0, directions, ticks)
+    session = play_delayed(0, directions, ticks, delay=5)[0]
+
+    # The ring holds the start of each of the last few ticks
+    for tick in range(ticks - session.slots + 1, ticks):
+        offset = tick % session.slots * SIZE
+        assert bytes(session.states[offset : offset + SIZE]) == expected[tick]
+
+    # And any of them can be gone back to
+    game = new_game(0)
+    tick = ticks - 3
+    unpack_into(game, session.states, tick % session.slots * SIZE)
+    assert game.tick == tick
+    assert pack(game) == expected[tick]
+
+
+def test_wrong_guess_rolls_back_to_its_tick():
+    session = RollbackSession(new_game(0), side=0)
+    for _ in range(5):
+        session.add_local_input(0)
+        session.advance()
+    # Nothing was known, so the other player was guessed to stand still
+    assert session.guesses == {tick: 0 for tick in range(5)}
+
+    session.add_remote_input(0, 0)
+    session.add_remote_input(1, 0)
+    session.add_remote_input(2, 1)
+
+    assert session.rollback_tick == 2
+    session.add_local_input(0)
+    session.advance()
+    assert session.rollbacks == 1
+    assert session.replayed_ticks == 3
+    # Ticks after the rolled back one are guessed again, from the new input
+    assert session.guesses == {3: 1, 4: 1, 5: 1}
+
+
+def test_waits_when_the_other_player_is_too_far_behind():
+    session = RollbackSession(new_game(0), side=0, max_rollback=3)
+    played = 0
+    for _ in range(10):
+        session.add_local_input(0)
+        played += session.advance()
+
+    # Nothing is known from the other player, so it only gets as far as
+    # max_rollback ticks after tick -1
+    assert played == 3
+    assert session.game.tick == 3
+    assert session.stalls == 7
+
+    session.add_remote_input(0, 0)
+    session.add_local_input(0)
+    assert session.advance()
+    assert session.game.tick == 4
+
+
+@pytest.mark.parametrize("latency", (0, 50, 100))
+def test_harness_ends_up_the_same(latency):
+    left, right = run_harness(latency, ticks=1500)
+
+    _, states = common_state(left, right)
+    assert states[0] == states[1]
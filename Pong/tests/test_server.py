@@ -0,0 +1,229 @@
+import time
+
+import pytest
+
+from pongsim.net import (
+    DELTA,
+    KEYFRAME,
+    LEFT,
+    RIGHT,
+    SNAPSHOT,
+    SPECTATE,
+    SPECTATOR,
+    WELCOME,
+    apply_delta,
+    decode,
+    encode_input,
+    encode_join,
+    encode_snapshot,
+)
+from pongsim.server import GameServer, Player
+
+
+class FakePlayer(Player):
+    """
+    A player that keeps everything sent to it
+    """
+
+    def __init__(self, can_time_out=False):
+        self.sent = []
+        self.closed = False
+        # How many bytes are pretending to wait to be sent
+        self.waiting = 0
+        super().__init__(
+            self.sent.append,
+            self.close_fake,
+            backlog=lambda: self.waiting,
+            can_time_out=can_time_out,
+        )
+
+    def close_fake(self):
+        self.closed = True
+
+
+def new_server(**settings):
+    return GameServer(seed=0, speed_min=4, speed_max=6, **settings)
+
+
+def start_match(server, name="lobby", can_time_out=False):
+    left = FakePlayer(can_time_out)
+    right = FakePlayer(can_time_out)
+    server.receive(left, encode_join(name))
+    server.receive(right, encode_join(name))
+    return left, right
+
+
+def test_players_join_the_same_match():
+    server = new_server()
+    left, right = start_match(server)
+
+    assert (left.side, right.side) == (LEFT, RIGHT)
+    assert left.match is right.match
+    assert server.matches == [left.match]
+    assert server.waiting == {}
+
+
+def test_input_moves_the_paddle():
+    server = new_server(paddle_speed=5)
+    left, _ = start_match(server)
+    game = left.match.game
+    start_y = game.left_paddle.pos_y
+
+    server.receive(left, encode_input(1, -1))
+    server.tick()
+
+    assert game.left_paddle.pos_y == start_y - 5
+    assert decode(left.sent[-1])[0] == SNAPSHOT
+
+
+def test_input_after_the_match_finished_is_dropped():
+    server = new_server()
+    left, right = start_match(server)
+    match = left.match
+    for _ in range(10000):
+        if not server.matches:
+            break
+        server.tick()
+    assert match.game.winner
+    assert left.match is None and left.closed
+
+    # Still in the stream's buffer when the match finished
+    server.receive(left, encode_input(1, 1))
+    server.receive(right, encode_input(1, -1))
+
+    assert match.game.left_paddle.direction == 0
+    assert match.game.right_paddle.direction == 0
+
+
+def test_quiet_udp_player_waiting_for_a_match_times_out():
+    server = new_server(timeout=5.0)
+    quiet = FakePlayer(can_time_out=True)
+    server.receive(quiet, encode_join("lobby"))
+    quiet.last_heard = time.monotonic() - 10
+
+    server.tick()
+
+    assert server.waiting == {}
+    assert quiet.match is None and quiet.closed
+
+    # The next player to join waits for somebody new instead
+    joiner = FakePlayer(can_time_out=True)
+    server.receive(joiner, encode_join("lobby"))
+    assert joiner.side == LEFT
+    assert server.waiting["lobby"].players == [joiner]
+
+
+def test_waiting_player_that_keeps_talking_stays():
+    server = new_server(timeout=5.0)
+    player = FakePlayer(can_time_out=True)
+    server.receive(player, encode_join("lobby"))
+
+    server.tick()
+
+    assert server.waiting["lobby"].players == [player]
+    assert not player.closed
+
+
+def test_quiet_udp_spectator_waiting_for_a_match_times_out():
+    server = new_server(timeout=5.0)
+    watcher = FakePlayer(can_time_out=True)
+    server.receive(watcher, encode_join("lobby", SPECTATE))
+    watcher.last_heard = time.monotonic() - 10
+
+    server.tick()
+
+    assert server.waiting == {}
+    assert watcher.closed
+
+
+def watch(server, name="lobby"):
+    spectator = FakePlayer()
+    server.receive(spectator, encode_join(name, SPECTATE))
+    assert decode(spectator.sent.pop())[:2] == (WELCOME, SPECTATOR)
+    return spectator
+
+
+def kinds(player):
+    return [bytes(message)[0] for message in player.sent]
+
+
+def test_spectators_get_keyframes_and_deltas():
+    server = new_server(spectator_every=2, keyframe_every=10)
+    left, _ = start_match(server)
+    game = left.match.game
+    spectator = watch(server)
+
+    keyframe = None
+    checked = 0
+    for _ in range(30):
+        sent = len(spectator.sent)
+        server.tick()
+        if len(spectator.sent) == sent:
+            continue
+        # Sent on this tick, so it should give this tick's snapshot
+        checked += 1
+        message = decode(bytes(spectator.sent[-1]))
+        if message[0] == KEYFRAME:
+            keyframe = message
+            snapshot = (SNAPSHOT, *message[1:])
+        else:
+            snapshot = apply_delta(keyframe, message)
+        expected = decode(encode_snapshot(game))
+        assert snapshot[:2] == expected[:2]
+        assert snapshot[2:8] == pytest.approx(expected[2:8], abs=0.1)
+
+    assert checked == 15
+    assert kinds(spectator) == ([KEYFRAME] + [DELTA] * 4) * 3
+
+
+def test_every_spectator_is_sent_the_same_bytes():
+    server = new_server()
+    start_match(server)
+    first = watch(server)
+    second = watch(server)
+
+    for _ in range(10):
+        server.tick()
+
+    assert first.sent
+    assert all(a is b for a, b in zip(first.sent, second.sent))
+
+
+def test_spectator_that_needs_a_keyframe_ignores_deltas():
+    server = new_server(spectator_every=1, keyframe_every=5)
+    start_match(server)
+    spectator = watch(server)
+    server.tick()
+    assert kinds(spectator) == [KEYFRAME]
+
+    # Like when it was too far behind to be sent the last keyframe
+    spectator.needs_keyframe = True
+    for _ in range(4):
+        server.tick()
+    assert kinds(spectator) == [KEYFRAME]
+
+    server.tick()
+    server.tick()
+    assert kinds(spectator) == [KEYFRAME, KEYFRAME, DELTA]
+    assert not spectator.needs_keyframe
+
+
+def test_slow_spectators_get_keyframes_or_nothing():
+    server = new_server(
+        spectator_every=1,
+        keyframe_every=5,
+        keyframes_only_backlog=100,
+        max_backlog=1000,
+    )
+    start_match(server)
+    slow = watch(server)
+    stuck = watch(server)
+    slow.waiting = 500
+    stuck.waiting = 5000
+
+    for _ in range(10):
+        server.tick()
+
+    assert kinds(slow) == [KEYFRAME, KEYFRAME]
+    assert kinds(stuck) == []
+    assert stuck.needs_keyframe
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from pongsim import state
+from pongsim.physics import LEFT_HOLD_DOWN, RIGHT_HOLD_UP, Game
+
+
+def new_game(seed=0):
+    return Game(
+        ball_radius=20,
+        paddle_speed=5,
+        speed_min=2,
+        speed_max=6,
+        rng=random.Random(seed),
+    )
+
+
+def played_game(seed=0, ticks=200):
+    game = new_game(seed)
+    game.press(LEFT_HOLD_DOWN)
+    game.press(RIGHT_HOLD_UP)
+    for _ in range(ticks):
+        if game.step():
+            break
+    return game
+
+
+def test_layout_size():
+    assert state.SIZE == state.LAYOUT.size == 304
+
+
+def test_round_trip():
+    game = played_game()
+    data = state.pack(game)
+    copy = new_game(seed=99)
+
+    state.unpack_into(copy, data)
+
+    assert len(data) == state.SIZE
+    assert state.pack(copy) == data
+    assert copy.tick == game.tick
+    assert copy.winner == game.winner
+    assert copy.positions() == game.positions()
+    assert copy.left_paddle.direction == 1
+    assert copy.right_paddle.direction == -1
+    for paddle, copied in (
+        (game.left_paddle, copy.left_paddle),
+        (game.right_paddle, copy.right_paddle),
+    ):
+        for edge, copied_edge in zip(paddle.edges, copied.edges):
+            assert (copied_edge.start_y, copied_edge.end_y) == (
+                edge.start_y,
+                edge.end_y,
+            )
+
+
+def test_restored_game_plays_on_the_same():
+    game = played_game(ticks=150)
+    copy = new_game(seed=99)
+    state.unpack_into(copy, state.pack(game))
+
+    game.run(3000)
+    copy.run(3000)
+
+    assert copy.winner == game.winner
+    assert state.pack(copy) == state.pack(game)
+
+
+def test_round_trip_with_winner():
+    game = played_game(ticks=5000)
+    assert game.winner
+    copy = new_game()
+    state.unpack_into(copy, state.pack(game))
+    assert copy.winner == game.winner
+
+
+def test_states_side_by_side():
+    games = [played_game(seed, ticks=seed * 10) for seed in range(4)]
+    buffer = bytearray(state.SIZE * len(games))
+    for number, game in enumerate(games):
+        state.pack_into(game, buffer, number * state.SIZE)
+
+    for number, game in enumerate(games):
+        copy = new_game()
+        state.unpack_into(copy, buffer, number * state.SIZE)
+        assert state.pack(copy) == state.pack(game)
+
+
+@pytest.mark.parametrize(
+    "change",
+    (
+        lambda data: b"GIF8" + data[4:],
+        lambda data: data[:4] + bytes([state.VERSION + 1]) + data[5:],
+        lambda data: data[:-1],
+    ),
+)
+def test_rejects_bad_states(change):
+    with pytest.raises(state.StateError):
+        state.unpack_into(new_game(), change(state.pack(played_game())))
+
+
+def test_dtype_reads_packed_states():
+    np = pytest.importorskip("numpy")
+    game = played_game()
+    states = np.frombuffer(state.pack(game) * 2, dtype=state.dtype())
+
+    assert states["tick"].tolist() == [game.tick] * 2
+    assert states["ball_pos_x"][1] == game.ball.pos_x
+    assert states["right_top_end_y"][0] == game.right_paddle.edges[2].end_y
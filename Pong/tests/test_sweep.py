@@ -0,0 +1,69 @@
+import pytest
+
+from pongsim.sweep import COLUMNS, DEFAULTS, ColumnWriter, play_one, read_columns
+
+
+def rows(count, start=0):
+    return [
+        {
+            name: (number + start) * (0.5 if typecode == "d" else 1)
+            for name, typecode in COLUMNS
+        }
+        for number in range(count)
+    ]
+
+
+def write(path, written, **options):
+    with ColumnWriter(path, flush_rows=7, **options) as writer:
+        for row in written:
+            writer.append(row)
+
+
+def assert_read_back(path, written):
+    columns = read_columns(path)
+    assert list(columns) == [name for name, _ in COLUMNS]
+    for name, values in columns.items():
+        assert values.tolist() == [row[name] for row in written]
+
+
+def test_round_trip(tmp_path):
+    # More than one flush, and some left over at the end
+    written = rows(24)
+    write(tmp_path, written)
+
+    assert_read_back(tmp_path, written)
+
+
+def test_replaces_earlier_results(tmp_path):
+    write(tmp_path, rows(10))
+    written = rows(3, start=100)
+    write(tmp_path, written)
+
+    assert_read_back(tmp_path, written)
+
+
+def test_appends_to_earlier_results(tmp_path):
+    first = rows(10)
+    second = rows(3, start=100)
+    write(tmp_path, first)
+    write(tmp_path, second, append=True)
+
+    assert_read_back(tmp_path, first + second)
+
+
+def test_wont_append_different_columns(tmp_path):
+    write(tmp_path, rows(2))
+    columns = COLUMNS + [("extra", "q")]
+
+    with pytest.raises(ValueError):
+        ColumnWriter(tmp_path, columns=columns, append=True)
+    assert_read_back(tmp_path, rows(2))
+
+
+@pytest.mark.parametrize("players", ("ai", "scripted"))
+def test_played_game_round_trips(tmp_path, players):
+    row = play_one(DEFAULTS, seed=3, players=players, max_ticks=3000)
+    write(tmp_path, [row])
+
+    assert_read_back(tmp_path, [row])
+    assert row["ticks"] > 0
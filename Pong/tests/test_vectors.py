@@ -0,0 +1,71 @@
+import math
+
+import pytest
+
+from pongsim import bench
+
+REPO = bench.find_repo()
+if REPO is None:
+    pytest.skip("needs a copy of the repository", allow_module_level=True)
+
+
+@pytest.fixture(scope="module")
+def ns():
+    return bench.load("pong-vectors", REPO)
+
+
+def test_reflect_about_unit_normal(ns):
+    speed = ns["Vector"](3.0, 4.0)
+    speed.reflect(ns["Vector"](0, -1))
+    assert (speed.x, speed.y) == (3.0, -4.0)
+
+    speed = ns["Vector"](2.0, 0.0)
+    normal = ns["Vector"](-math.sqrt(0.5), math.sqrt(0.5))
+    speed.reflect(normal)
+    assert (speed.x, speed.y) == pytest.approx((0.0, 2.0))
+
+
+def test_packed_vectors_share_one_array(ns):
+    vectors = ns["VectorArray"](3)
+    first = vectors.view(0)
+    second = vectors.view(2)
+    first.x, first.y = 1.0, 2.0
+    second.y = 5.0
+
+    assert len(vectors) == 3
+    assert vectors.data.tolist() == [1.0, 2.0, 0.0, 0.0, 0.0, 5.0]
+    assert vectors.view(0).y == 2.0
+
+
+def test_packed_vector_does_the_same_as_vector(ns):
+    vector = ns["Vector"](1.5, -2.0)
+    packed = ns["VectorArray"](1).view(0)
+    packed.x, packed.y = 1.5, -2.0
+    other = ns["Vector"](0.25, 3.0)
+    normal = ns["Vector"](0.6, 0.8)
+
+    for target in (vector, packed):
+        target.iadd(other)
+        target += other
+        target.scale_add(other, -0.5)
+        target.reflect(normal)
+
+    assert (packed.x, packed.y) == (vector.x, vector.y)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_packed_game_matches(seed):
+    scenario = bench.Scenario(seed, 5000)
+    games = [
+        bench.build(name, scenario, REPO)
+        for name in ("pong-vectors", "pong-vectors-packed")
+    ]
+    for ball, paddles in games:
+        bench.run_ticks(ball, paddles, scenario.presses, 5000)
+
+    (ball, paddles), (packed_ball, packed_paddles) = games
+    assert type(packed_ball.pos).__name__ == "PackedVector"
+    assert (packed_ball.pos.x, packed_ball.pos.y) == (ball.pos.x, ball.pos.y)
+    assert (packed_ball.speed.x, packed_ball.speed.y) == (ball.speed.x, ball.speed.y)
+    for side in ("left", "right"):
+        assert packed_paddles[side].pos_y == paddles[side].pos_y
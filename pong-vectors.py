@@ -1,11 +1,9 @@
-import statistics
+import asyncio
 import tkinter as tk
 import random
 import time
 import math
-from collections import namedtuple
-import random
-import threading
+from array import array
 
 
 def in_between(x, n1, n2):
@@ -17,10 +15,42 @@ def in_between(x, n1, n2):
 
 
 class Vector:
+    # Using __slots__ means vectors don't each need their own __dict__
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
+    # The operators below all make a new vector. These methods change the
+    # vector in place instead, so the game loop doesn't create any objects.
+
+    def iadd(self, other):
+        """
+        Adds 'other' to this vector
+        """
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    __iadd__ = iadd
+
+    def scale_add(self, other, scale):
+        """
+        Adds 'other' times 'scale' to this vector
+        """
+        self.x += other.x * scale
+        self.y += other.y * scale
+        return self
+
+    def reflect(self, unit_normal):
+        """
+        Reflects this vector off a surface, given the surface's normal
+        vector. The normal has to have a length of 1.
+        """
+        dot = self.x * unit_normal.x + self.y * unit_normal.y
+        return self.scale_add(unit_normal, -2 * dot)
+
     def __sub__(self, other):
         return type(self)(self.x - other.x, self.y - other.y)
 
@@ -42,14 +72,67 @@ class Vector:
 
 
 class Point(Vector):
-    def __init__(self, x, y):
-        super(Point, self).__init__(x, y)
+    __slots__ = ()
 
     def __str__(self):
         return f"Point({self.x}, {self.y})"
 
 
-#times = []
+class VectorArray:
+    """
+    Lots of vectors packed next to each other in one array of floats,
+    which takes much less memory than the same number of Vector objects
+    """
+
+    def __init__(self, count):
+        self.data = array("d", bytes(16 * count))
+
+    def __len__(self):
+        return len(self.data) // 2
+
+    def view(self, index):
+        """
+        Returns a vector that reads and writes the vector at 'index'
+        """
+        return PackedVector(self.data, index * 2)
+
+
+class PackedVector:
+    """
+    A vector stored inside a VectorArray. It has the same in-place methods
+    as Vector but no space of its own for x and y, so it can be used for a
+    Ball's position and speed or a StraightLine's ends.
+    """
+
+    __slots__ = ("data", "offset")
+
+    def __init__(self, data, offset):
+        self.data = data
+        self.offset = offset
+
+    @property
+    def x(self):
+        return self.data[self.offset]
+
+    @x.setter
+    def x(self, value):
+        self.data[self.offset] = value
+
+    @property
+    def y(self):
+        return self.data[self.offset + 1]
+
+    @y.setter
+    def y(self, value):
+        self.data[self.offset + 1] = value
+
+    iadd = __iadd__ = Vector.iadd
+    scale_add = Vector.scale_add
+    reflect = Vector.reflect
+
+    def __str__(self):
+        return f"PackedVector({self.x}, {self.y})"
+
 
 # Define ball properties and functions
 
@@ -63,7 +146,6 @@ class Ball:
         self.speed = speed
         self.pos = pos
         self.radius = radius
-        self.last_pos = pos
         self.hit_bottom = False
         self.top_y = pos.y - radius
         self.bottom_y = pos.y + radius
@@ -79,8 +161,6 @@ class Ball:
             angle += 1
 
     def update(self):
-        #starttime = time.time()
-
         if self.is_beyond(left_wall):
             # It passed the left wall, so the right player won
             return 'Right player'
@@ -88,7 +168,7 @@ class Ball:
             # It passed the left wall, so the left player won
             return 'Left player'
 
-        self.pos += self.speed
+        self.pos.iadd(self.speed)
         self.top_y += self.speed.y
         self.bottom_y += self.speed.y
         self.left_x += self.speed.x
@@ -109,13 +189,11 @@ class Ball:
 
         self.draw()
 
-        #times.append(time.time() - starttime)
-
     def bounce(self, line):
         #print("Bouncing off", line.name)
-        normal = line.normal_vec
-        proj = (-self.speed * normal) / (normal * normal) * normal
-        self.speed = 2 * proj + self.speed
+        # The normal vectors all have a length of 1, so this is the same as
+        # adding twice the projection of -speed onto the normal
+        self.speed.reflect(line.normal_vec)
         self.is_bouncing = True
 
     def draw(self):
@@ -234,8 +312,8 @@ class Paddle:
 
         # Update the positions of the lines
         for edge in self.edges:
-            edge.start += Vector(0, movement)
-            edge.end += Vector(0, movement)
+            edge.start.y += movement
+            edge.end.y += movement
 
     def move_up(self, evt):
         if self.pos_y - self.height / 2 >= y_top_limit:
@@ -344,11 +422,16 @@ up_bind_id = root.bind('<KeyPress-Up>', right_paddle.move_up)
 down_bind_id = root.bind('<KeyPress-Down>', right_paddle.move_down)
 
 
-# Randomly choose a speed for the ball
-speed_min = 0.02
-speed_max = 0.09
-x_speed = random.uniform(speed_min, speed_max)
-y_speed = random.uniform(speed_min, speed_max)
+# How many times a second the ball moves, however fast the computer is,
+# and how long to wait between frames
+ticks_per_second = 240
+frame_seconds = 1 / 60
+
+# Randomly choose a speed for the ball, in pixels per second
+speed_min = 150
+speed_max = 400
+x_speed = random.uniform(speed_min, speed_max) / ticks_per_second
+y_speed = random.uniform(speed_min, speed_max) / ticks_per_second
 
 ball_radius = 50
 
@@ -370,22 +453,44 @@ ball = Ball(
 
 won = False
 
-# Loop to actually run the game
-while not won:
-    start_time = time.time()
-    #thread = threading.Thread(target=waitAWhile)
-    # thread.start()
-    root.update_idletasks()
-    root.update()
-    won = ball.update()
-    # thread.join()
-    #times.append(time.time() - start_time)
 
-#print(max(times))
+async def pump_tk():
+    # Let tkinter redraw and handle the keys every few milliseconds, and
+    # let the game have a turn in between
+    while not won:
+        root.update()
+        await asyncio.sleep(0.004)
+
+
+async def run_game():
+    # Once a frame, move the ball as many ticks as fit into the time that
+    # has passed, then sleep until the next frame
+    global won
+    loop = asyncio.get_running_loop()
+    tick_length = 1 / ticks_per_second
+    next_tick = loop.time()
+    while not won:
+        now = loop.time()
+        # After a long pause (like dragging the window), don't try to make
+        # up for more than a few frames
+        next_tick = max(next_tick, now - 4 * frame_seconds)
+        while not won and next_tick <= now:
+            won = ball.update()
+            next_tick += tick_length
+        await asyncio.sleep(frame_seconds)
+
+
+async def run():
+    # Both run on the same thread, taking turns. Anything else that needs to
+    # run while the game is going (like talking to another computer) can be
+    # added here too, without needing a thread.
+    await asyncio.gather(pump_tk(), run_game())
+
+
+asyncio.run(run())
 
 print(won, 'has won!')
 label_text.set(f"{won} has won!")
-# print(max(times))
 
 # stop them from moving afterwards
 root.unbind('w', w_bind_id)